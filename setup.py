@@ -36,7 +36,7 @@ setup(
         'jsonschema>=2.6, <3',
         'python-slugify>=1.2.4',
         'six>=1.11.0',
-        'requests>=2.4.2',
+        'requests>=2.12.0',
     ],
     license='MIT',
     zip_safe=False,
@@ -0,0 +1,147 @@
+"""On-disk cache of responses from read-only API queries.
+
+Caching is opt-in: responses are only served from (and stored in) the cache
+by calls which are given a ``max_age``, so nothing which changes remote state
+ever acts on cached data.
+
+Cached responses may contain secrets (e.g. environment variables in
+application definitions), so the cache directory and its files are only
+readable by the current user. A cache directory which isn't private to the
+current user (e.g. one created in the shared temporary directory by another
+user) is never used, as its entries can't be trusted.
+"""
+# stdlib imports
+import getpass
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+from collections import namedtuple
+
+# local imports
+from shpkpr import exceptions
+
+
+RESPONSE_CACHE_DIR_ENVVAR = "SHPKPR_RESPONSE_CACHE_DIR"
+
+
+class UnsafeCacheDirectory(exceptions.ShpkprException):
+    pass
+
+
+class CacheEntry(namedtuple('CacheEntry', ['body', 'etag', 'stored_at'])):
+
+    @property
+    def age(self):
+        return time.time() - self.stored_at
+
+
+class CachedResponse(object):
+    """Stands in for a successful ``requests.Response`` when a response is
+    served from the cache.
+    """
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    @property
+    def text(self):
+        return json.dumps(self._body)
+
+    def json(self):
+        return self._body
+
+
+class ResponseCache(object):
+    """Stores parsed JSON responses in ``directory``, one file per key.
+
+    The directory defaults to the value of ``SHPKPR_RESPONSE_CACHE_DIR``, or
+    a per-user directory in the system's temporary directory. Entries are
+    written atomically so that the cache can be shared by concurrent shpkpr
+    processes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get(RESPONSE_CACHE_DIR_ENVVAR) or _default_directory()
+
+    def key(self, *parts):
+        """Build a cache key from the given JSON-serialisable parts.
+        """
+        data = json.dumps(parts, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key):
+        """Returns the ``CacheEntry`` stored for ``key``, or ``None``.
+        """
+        if not os.path.lexists(self.directory):
+            return None
+        self._check_directory()
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        return CacheEntry(entry["body"], entry.get("etag"), entry["stored_at"])
+
+    def set(self, key, body, etag=None):
+        """Store ``body`` (and its ``etag``, if any) for ``key``.
+        """
+        self._ensure_directory()
+        entry = {"body": body, "etag": etag, "stored_at": time.time()}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.rename(tmp_path, self._path(key))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def fetch(self, key, max_age, fetch):
+        """Returns the body stored for ``key`` if it's less than ``max_age``
+        seconds old, otherwise calls ``fetch()`` and stores its result.
+        """
+        entry = self.get(key)
+        if entry is not None and entry.age < max_age:
+            return entry.body
+        body = fetch()
+        self.set(key, body)
+        return body
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _ensure_directory(self):
+        try:
+            os.makedirs(self.directory, 0o700)
+        except OSError:
+            if not os.path.lexists(self.directory):
+                raise
+        else:
+            # makedirs' mode is subject to the umask
+            os.chmod(self.directory, 0o700)
+        self._check_directory()
+
+    def _check_directory(self):
+        """Raises ``UnsafeCacheDirectory`` unless the cache directory is a real
+        directory, owned by the current user and accessible only by them.
+
+        The default directory has a predictable path in the shared temporary
+        directory, so another user could create it first and plant entries in
+        it (the same check is made by Jinja's ``FileSystemBytecodeCache``).
+        """
+        if not hasattr(os, "getuid"):
+            return
+        st = os.lstat(self.directory)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) != 0o700:
+            raise UnsafeCacheDirectory(
+                "Refusing to use response cache directory which isn't private to the "
+                "current user: {0}. Remove it or set {1} to a private directory.".format(
+                    self.directory, RESPONSE_CACHE_DIR_ENVVAR))
+
+
+def _default_directory():
+    return os.path.join(tempfile.gettempdir(), "shpkpr-responses-{0}".format(getpass.getuser()))
@@ -2,26 +2,146 @@
 import json
 
 # third-party imports
+import six
 import yaml
 
 
 class OutputFormatter(object):
     """OutputFormatter is used to serialise complex Python objects for printing
     to the log.
+
+    If a list of ``fields`` is given when formatting, each object is first
+    projected down to just those fields. Fields may be nested, using dots to
+    separate the keys at each level e.g. ``container.docker.image``.
     """
 
     def __init__(self, fmt):
         self.fmt = fmt
 
-    def format(self, obj):
+    def format(self, obj, fields=None):
+        if fields:
+            obj = [project(o, fields) for o in obj] if isinstance(obj, list) else project(obj, fields)
+        if self.fmt == "table":
+            return self.to_table(obj, fields)
+
         formatters = {
             "json": self.to_json,
+            "ndjson": self.to_ndjson,
             "yaml": self.to_yaml,
         }
         return formatters[self.fmt](obj)
 
+    def iter_format(self, objs, fields=None):
+        """Serialise a sequence of objects as a list, yielding the output in
+        pieces as each object is serialised instead of building it all at
+        once.
+
+        Joining the yielded pieces with newlines gives the same output as
+        ``format(list(objs))`` (ignoring trailing whitespace). Tables can't be
+        laid out until every row is known, so are only yielded once all
+        objects have been read.
+        """
+        if fields:
+            objs = (project(o, fields) for o in objs)
+        if self.fmt == "table":
+            return iter(self.to_table(list(objs), fields).split("\n"))
+
+        formatters = {
+            "json": self.iter_json,
+            "ndjson": self.iter_ndjson,
+            "yaml": self.iter_yaml,
+        }
+        return formatters[self.fmt](objs)
+
     def to_json(self, obj):
         return json.dumps(obj, indent=4, sort_keys=True)
 
+    def iter_json(self, objs):
+        previous = None
+        for obj in objs:
+            if previous is None:
+                yield "["
+            else:
+                yield previous + ","
+            previous = _indent(self.to_json(obj))
+        if previous is None:
+            yield "[]"
+        else:
+            yield previous
+            yield "]"
+
+    def to_ndjson(self, obj):
+        if isinstance(obj, list):
+            return "\n".join(self.iter_ndjson(obj))
+        return json.dumps(obj, sort_keys=True)
+
+    def iter_ndjson(self, objs):
+        for obj in objs:
+            yield json.dumps(obj, sort_keys=True)
+
     def to_yaml(self, obj):
         return yaml.dump(obj, default_flow_style=False)
+
+    def iter_yaml(self, objs):
+        empty = True
+        for obj in objs:
+            empty = False
+            yield self.to_yaml([obj]).rstrip("\n")
+        if empty:
+            yield self.to_yaml([]).rstrip("\n")
+
+    def to_table(self, obj, columns=None):
+        """Lay out an object, or list of objects, as a table with one row per
+        object, aligning each column to its widest value.
+
+        Columns default to the keys of the first object. Values which aren't
+        scalars are shown as compact JSON.
+        """
+        rows = obj if isinstance(obj, list) else [obj]
+        if columns is None:
+            columns = sorted(rows[0].keys(), key=lambda k: (k != "id", k)) if rows else []
+
+        table = [list(columns)] + [[_table_cell(_get_path(row, c)) for c in columns] for row in rows]
+        widths = [max(len(r[i]) for r in table) for i in range(len(columns))]
+        lines = ["  ".join(cell.ljust(width) for cell, width in zip(r, widths)).rstrip() for r in table]
+        return "\n".join(lines)
+
+
+def project(obj, fields):
+    """Returns a copy of ``obj`` containing only the given (possibly nested,
+    dot-separated) fields. Fields which don't exist in ``obj`` are omitted.
+    """
+    projected = {}
+    for field in fields:
+        keys = field.split(".")
+        value = _get_path(obj, field, _MISSING)
+        if value is _MISSING:
+            continue
+        target = projected
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = value
+    return projected
+
+
+_MISSING = object()
+
+
+def _get_path(obj, field, default=None):
+    for key in field.split("."):
+        if not isinstance(obj, dict) or key not in obj:
+            return default
+        obj = obj[key]
+    return obj
+
+
+def _table_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, six.string_types):
+        return value
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _indent(text, prefix="    "):
+    return "\n".join(prefix + line for line in text.split("\n"))
@@ -4,23 +4,22 @@ All option parameters should be defined in this module, commands should not
 define their options directly, instead all options should be defined here and
 imported as required. This helps maintain consistency where a single option is
 used for multiple commands.
+
+This module is imported by every command, so clients (and their dependencies)
+are imported by the callbacks which build them rather than at module level,
+keeping shpkpr's startup time down for commands which don't use them.
 """
 # stdlib imports
 import os
-from distutils.version import StrictVersion
 
 # third-party imports
 import click
-import hvac
-from chronos import ChronosClient
 from six.moves.urllib import parse
 
 # local imports
 from shpkpr.cli.decorators import multioption
 from shpkpr.cli.entrypoint import CONTEXT_SETTINGS
 from shpkpr.cli.formatter import OutputFormatter
-from shpkpr.marathon import MarathonClient
-from shpkpr.marathon_lb import MarathonLBClient
 
 
 application_id = click.option(
@@ -65,6 +64,20 @@ force = click.option(
 )
 
 
+always_deploy = click.option(
+    '--always-deploy',
+    'always_deploy',
+    is_flag=True,
+    envvar="{0}_ALWAYS_DEPLOY".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    help=(
+        "Deploy applications even if their definition matches what's already "
+        "deployed, e.g. to pick up a new image pushed to the same tag or "
+        "rotated secrets. Only applies to the standard deployment strategy, "
+        "which otherwise skips unchanged applications."
+    ),
+)
+
+
 deployment_strategy = click.option(
     '--strategy',
     'deployment_strategy',
@@ -76,6 +89,21 @@ deployment_strategy = click.option(
 )
 
 
+parallelism = click.option(
+    '--parallelism',
+    'parallelism',
+    type=click.IntRange(min=1),
+    help=(
+        "Maximum number of applications to deploy concurrently. Only applies "
+        "to the bluegreen strategy, standard deployments always deploy all "
+        "applications together."
+    ),
+    envvar="{0}_PARALLELISM".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    default=1,
+    show_default=True,
+)
+
+
 template_path = click.option(
     '--template-dir',
     'template_path',
@@ -109,6 +137,8 @@ def _validate_chronos_version(ctx, param, value):
     """chronos-python requires a version "prefix" to be used, so we convert the
     target Chronos version to the appropriate prefix.
     """
+    from distutils.version import StrictVersion
+
     if StrictVersion(value) >= StrictVersion('3.0.0'):
         return 'v1'
     return None
@@ -132,13 +162,21 @@ job_name = click.option(
 )
 
 
+def _build_marathon_lb_client(ctx, param, value):
+    if value is None:
+        return None
+
+    from shpkpr.marathon_lb import MarathonLBClient
+    return MarathonLBClient(value)
+
+
 marathon_lb_client = click.option(
     '--marathon-lb-url',
     'marathon_lb_client',
     envvar="{0}_MARATHON_LB_URL".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
     default=None,
     help="URL for Marathon-LB used during blue/green deployment.",
-    callback=lambda c, p, v: None if v is None else MarathonLBClient(v)
+    callback=_build_marathon_lb_client,
 )
 
 
@@ -155,14 +193,152 @@ timeout = click.option(
 output_formatter = click.option(
     '--output-format',
     'output_formatter',
-    type=click.Choice(["json", "yaml"]),
-    help='Serialization format to use when printing config data to stdout.',
+    type=click.Choice(["json", "ndjson", "table", "yaml"]),
+    help=(
+        "Serialization format to use when printing config data to stdout. "
+        "``ndjson`` prints each item of a list on its own line, as compact "
+        "JSON, and ``table`` prints one item per row, best used with "
+        "``--fields``."
+    ),
     envvar="{0}_OUTPUT_FORMAT".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
     default="json",
     show_default=True,
     callback=lambda c, p, v: OutputFormatter(v)
 )
 
+serve_host = click.option(
+    '--host',
+    'host',
+    envvar="{0}_SERVE_HOST".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    default="127.0.0.1",
+    show_default=True,
+    help="Address on which to listen for HTTP requests.",
+)
+
+
+serve_port = click.option(
+    '--port',
+    'port',
+    type=int,
+    envvar="{0}_SERVE_PORT".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    default=8000,
+    show_default=True,
+    help="Port on which to listen for HTTP requests.",
+)
+
+
+serve_token = click.option(
+    '--token',
+    'token',
+    envvar="{0}_SERVE_TOKEN".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    required=True,
+    help=(
+        "Shared secret which clients must send in an ``Authorization: Bearer "
+        "<token>`` header. Prefer setting this via the environment so that it "
+        "isn't visible in the process list."
+    ),
+)
+
+
+serve_allowed_hosts = click.option(
+    '--allowed-host',
+    'allowed_hosts',
+    multiple=True,
+    help=(
+        "Additional host name by which clients may address the server (as "
+        "sent in the ``Host`` header). ``localhost``, ``127.0.0.1`` and the "
+        "address the server listens on are always allowed. May be given more "
+        "than once."
+    ),
+)
+
+
+max_age = click.option(
+    '--max-age',
+    'max_age',
+    type=click.IntRange(min=0),
+    envvar="{0}_MAX_AGE".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    default=None,
+    help=(
+        "Allow responses up to this many seconds old to be served from a "
+        "local cache rather than querying the remote API. Responses are "
+        "cached in a per-user temporary directory unless "
+        "SHPKPR_RESPONSE_CACHE_DIR is set."
+    ),
+)
+
+
+timings = click.option(
+    '--timings',
+    'timings',
+    is_flag=True,
+    envvar="{0}_TIMINGS".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    help="Print a summary of the time spent in each phase of the deployment.",
+)
+
+
+timings_report = click.option(
+    '--timings-report',
+    'timings_report',
+    type=click.Path(dir_okay=False, writable=True),
+    envvar="{0}_TIMINGS_REPORT".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    help=(
+        "Write a JSON report of the time spent in each phase of the "
+        "deployment to the given file."
+    ),
+)
+
+
+def _split_fields(ctx, param, value):
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(",")]
+    return [f for f in fields if f] or None
+
+
+fields = click.option(
+    '--fields',
+    'fields',
+    envvar="{0}_FIELDS".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    callback=_split_fields,
+    help=(
+        "Comma-separated list of fields to show for each item, e.g. "
+        "``id,instances,tasksRunning``. Nested fields are separated by dots "
+        "e.g. ``container.docker.image``. Only the data needed to show the "
+        "given fields is requested from Marathon."
+    ),
+)
+
+
+def _build_label_selectors(ctx, param, value):
+    from shpkpr.marathon import label_selector
+
+    selectors = []
+    for label in value:
+        key, sep, label_value = label.partition("=")
+        selectors.append(label_selector(key, label_value if sep else None))
+    return ",".join(selectors) or None
+
+
+label_filter = click.option(
+    '-l', '--label',
+    'label_selector',
+    multiple=True,
+    callback=_build_label_selectors,
+    help=(
+        "Only show applications with the given label, given as ``KEY`` or "
+        "``KEY=VALUE``. May be given more than once, in which case "
+        "applications must match every label."
+    ),
+)
+
+
+id_filter = click.option(
+    '--id-contains',
+    'id_filter',
+    help="Only show applications whose ID contains the given string.",
+)
+
 
 def _validate_authentication(ctx, url, service_name):
     """Validates that authentication-related options required to initialise
@@ -225,18 +401,34 @@ marathon_url = click.option(
 )
 
 
+marathon_event_stream = click.option(
+    '--marathon-event-stream',
+    'marathon_event_stream',
+    is_flag=True,
+    envvar="{0}_MARATHON_EVENT_STREAM".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    help=(
+        "Wait for Marathon deployments to complete by listening to Marathon's "
+        "event stream instead of polling. shpkpr falls back to polling if the "
+        "event stream is unavailable."
+    ),
+)
+
+
 def _validate_marathon_client(ctx, _, __):
     """Validates that all options required to initialise a marathon client have
     been set properly and securely.
 
     A client is then initialised and returned to the command function.
     """
+    from shpkpr.marathon import MarathonClient
+
     _c = ctx.params
     _validate_authentication(ctx, _c["marathon_url"], "Marathon")
     return MarathonClient(_c["marathon_url"],
                           _c["username"],
                           _c["password"],
-                          _c["dry_run"])
+                          _c["dry_run"],
+                          event_stream=_c["marathon_event_stream"])
 
 
 marathon_client = multioption(
@@ -248,6 +440,7 @@ marathon_client = multioption(
         username,
         password,
         marathon_url,
+        marathon_event_stream,
     ],
 )
 
@@ -258,6 +451,8 @@ def _validate_chronos_client(ctx, _, __):
 
     A client is then initialised and returned to the command function.
     """
+    from chronos import ChronosClient
+
     _c = ctx.params
     _validate_authentication(ctx, parse.urlunparse(_c["chronos_url"]), "Chronos")
     return ChronosClient(_c["chronos_url"].netloc,
@@ -280,6 +475,37 @@ chronos_client = multioption(
 )
 
 
+optional_chronos_url = click.option(
+    '--chronos-url',
+    'chronos_url',
+    envvar="{0}_CHRONOS_URL".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    required=False,
+    help='URL of the Chronos endpoint to use',
+    callback=lambda c, p, v: None if v is None else parse.urlparse(v, scheme="https"),
+)
+
+
+def _validate_optional_chronos_client(ctx, _, __):
+    """As ``_validate_chronos_client``, but returns ``None`` rather than a
+    client if no Chronos URL was given.
+    """
+    if ctx.params["chronos_url"] is None:
+        return None
+    return _validate_chronos_client(ctx, _, __)
+
+
+# the authentication options are shared with (and provided by) the marathon
+# client, so this must only be used alongside ``marathon_client``.
+optional_chronos_client = multioption(
+    name='chronos_client',
+    callback=_validate_optional_chronos_client,
+    options=[
+        optional_chronos_url,
+        chronos_version,
+    ],
+)
+
+
 vault_addr = click.option(
     '--vault-addr',
     'vault_addr',
@@ -301,6 +527,8 @@ def _validate_vault_client(ctx, _, __):
 
     A client is then initialised and returned to the command function.
     """
+    import hvac
+
     return hvac.Client(url=ctx.params['vault_addr'],
                        token=ctx.params['vault_token'])
 
@@ -313,3 +541,63 @@ vault_client = multioption(
         vault_token,
     ],
 )
+
+
+metrics_textfile = click.option(
+    '--metrics-textfile',
+    'metrics_textfile',
+    type=click.Path(dir_okay=False, writable=True),
+    envvar="{0}_METRICS_TEXTFILE".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    help=(
+        "Write metrics describing requests made to Marathon and Marathon-LB "
+        "to the given file when the command finishes, in the format read by "
+        "the Prometheus node_exporter's textfile collector."
+    ),
+)
+
+metrics_pushgateway = click.option(
+    '--metrics-pushgateway',
+    'metrics_pushgateway',
+    envvar="{0}_METRICS_PUSHGATEWAY".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    help=(
+        "URL of a Prometheus Pushgateway to push metrics to when the command "
+        "finishes."
+    ),
+)
+
+metrics_job = click.option(
+    '--metrics-job',
+    'metrics_job',
+    default="shpkpr",
+    show_default=True,
+    envvar="{0}_METRICS_JOB".format(CONTEXT_SETTINGS['auto_envvar_prefix']),
+    help="Job name under which metrics are pushed to the Pushgateway.",
+)
+
+
+def _register_metrics_exporter(ctx, _, __):
+    """Arranges for metrics to be exported once the command has finished,
+    whether or not it succeeds.
+    """
+    _c = ctx.params
+    if _c["metrics_textfile"] is None and _c["metrics_pushgateway"] is None:
+        return
+
+    def _export():
+        from shpkpr import metrics
+        metrics.export(textfile=_c["metrics_textfile"],
+                       pushgateway=_c["metrics_pushgateway"],
+                       job=_c["metrics_job"])
+
+    ctx.call_on_close(_export)
+
+
+metrics_exporter = multioption(
+    name='metrics_exporter',
+    callback=_register_metrics_exporter,
+    options=[
+        metrics_textfile,
+        metrics_pushgateway,
+        metrics_job,
+    ],
+)
@@ -4,16 +4,16 @@ import sys
 
 # third-party imports
 import click
-import docker
 
 # local imports
 from shpkpr.cli import arguments
 from shpkpr.cli import options
 from shpkpr.cli.entrypoint import CONTEXT_SETTINGS
-from shpkpr.deployment import BlueGreenDeployment
-from shpkpr.deployment import StandardDeployment
+from shpkpr.cli.formatter import OutputFormatter
 from shpkpr.template import load_values_from_environment
 from shpkpr.template import render_json_template
+from shpkpr.template import render_json_templates
+from shpkpr.timing import Timings
 from shpkpr.vault import resolve_secrets
 
 
@@ -26,14 +26,16 @@ def _validate_strategy_bluegreen(marathon_lb_client, **kw):
         raise click.UsageError(msg)
 
 
+# executors are named rather than imported here as the deployment modules (and
+# their dependencies) are only needed when deploying.
 STRATEGIES = {
     "standard": {
-        "executor": StandardDeployment,
+        "executor": "StandardDeployment",
         "validator": lambda **kw: None,
         "default_template": "marathon/default/standard.json.tmpl",
     },
     "bluegreen": {
-        "executor": BlueGreenDeployment,
+        "executor": "BlueGreenDeployment",
         "validator": _validate_strategy_bluegreen,
         "default_template": "marathon/default/bluegreen.json.tmpl",
     },
@@ -50,16 +52,25 @@ def cli():
              context_settings=CONTEXT_SETTINGS)
 @arguments.env_pairs
 @options.force
+@options.always_deploy
 @options.template_names
 @options.template_path
 @options.env_prefix
 @options.timeout
+@options.parallelism
+@options.timings
+@options.timings_report
 @options.deployment_strategy
+@options.metrics_exporter
 @options.marathon_lb_client
 @options.marathon_client
-def deploy(marathon_client, marathon_lb_client, deployment_strategy, timeout,
-           env_prefix, template_path, template_names, force, env_pairs, **kw):
+def deploy(marathon_client, marathon_lb_client, deployment_strategy, timings, timings_report, parallelism,
+           timeout, env_prefix, template_path, template_names, always_deploy, force, env_pairs, **kw):
     """Deploy one or more applications to Marathon.
+
+    Use ``--timings`` and/or ``--timings-report`` to see how long each phase
+    of the deployment (rendering templates, deploying to Marathon, waiting for
+    traffic to cut over etc.) took.
     """
     # select the appropriate deployment strategy
     strategy = STRATEGIES[deployment_strategy]
@@ -68,35 +79,82 @@ def deploy(marathon_client, marathon_lb_client, deployment_strategy, timeout,
     if not template_names:
         template_names = [strategy["default_template"]]
 
-    # read and render deploy template using values from the environment
-    values = load_values_from_environment(prefix=env_prefix, overrides=env_pairs)
-    rendered_templates = []
-    for template_name in template_names:
-        rendered_templates.append(render_json_template(template_path, template_name, **values))
+    deployment_timings = Timings()
+    try:
+        # read and render deploy templates using values from the environment
+        with deployment_timings.span("render"):
+            values = load_values_from_environment(prefix=env_prefix, overrides=env_pairs)
+            rendered_templates = render_json_templates(template_path, template_names, **values)
+
+        deploy_applications(marathon_client, marathon_lb_client, deployment_strategy,
+                            rendered_templates, timeout, parallelism, force, timings=deployment_timings,
+                            always_deploy=always_deploy)
+    finally:
+        if timings:
+            logger.info("\nDeployment timings:")
+            logger.info(OutputFormatter("table").format(deployment_timings.summary(),
+                                                        fields=["phase", "count", "total"]))
+        if timings_report:
+            deployment_timings.write_report(timings_report)
+
+
+def deploy_applications(marathon_client, marathon_lb_client, deployment_strategy,
+                        app_definitions, timeout, parallelism=1, force=False, timings=None,
+                        always_deploy=False):
+    """Perform any extra pre-flight validation required by the given deployment
+    strategy, and execute the deployment, blocking until complete.
+
+    The time taken by each phase of the deployment is recorded in ``timings``
+    (a ``shpkpr.timing.Timings``) if given. Unless ``always_deploy`` is set,
+    the standard strategy skips applications which are unchanged.
+    """
+    from shpkpr import deployment
 
-    # perform some extra pre-flight validation if required, and execute the
-    # deployment, blocking until complete.
+    strategy = STRATEGIES[deployment_strategy]
+    executor = getattr(deployment, strategy["executor"])
     deployment_params = {"marathon_client": marathon_client,
                          "marathon_lb_client": marathon_lb_client,
                          "timeout": timeout,
-                         "app_definitions": rendered_templates}
+                         "parallelism": parallelism,
+                         "timings": timings,
+                         "always_deploy": always_deploy,
+                         "app_definitions": app_definitions}
     strategy["validator"](**deployment_params)
-    strategy["executor"](**deployment_params).execute(force)
+    executor(**deployment_params).execute(force)
 
 
 @cli.command(short_help='Show application details.',
              context_settings=CONTEXT_SETTINGS)
 @options.output_formatter
+@options.fields
+@options.label_filter
+@options.id_filter
+@options.max_age
 @options.application_id
+@options.metrics_exporter
 @options.marathon_client
-def show(marathon_client, application_id, output_formatter, **kw):
+def show(marathon_client, application_id, max_age, id_filter, label_selector, fields, output_formatter, **kw):
     """Show detailed information for one or more applications.
+
+    Applications can be filtered by label and/or ID, and the fields shown
+    limited using ``--fields``, in which case only the data needed for those
+    fields is fetched from Marathon.
     """
+    from shpkpr.marathon import embeds_for_fields
+
+    embed = embeds_for_fields(fields)
     if application_id is None:
-        payload = marathon_client.list_applications()
+        # stream the list of applications, printing each application as it's
+        # received, as it can be very large on busy clusters.
+        applications = marathon_client.iter_applications(embed=embed,
+                                                         label_selector=label_selector,
+                                                         app_id=id_filter,
+                                                         max_age=max_age)
+        for output in output_formatter.iter_format(applications, fields):
+            logger.info(output)
     else:
-        payload = marathon_client.get_application(application_id)
-    logger.info(output_formatter.format(payload))
+        payload = marathon_client.get_application(application_id, embed=embed, max_age=max_age)
+        logger.info(output_formatter.format(payload, fields))
 
 
 @cli.command(short_help='Run a one-off task in a production-like environment.',
@@ -135,6 +193,10 @@ def run(env_prefix, template_path, template_names, vault_client, command, env_pa
 
     logger.info("Running command for app ({0}): {1}\n".format(app_id, command))
 
+    # docker is slow to import and only needed here, so it's imported on use
+    # rather than for every command.
+    import docker
+
     docker_client = docker.from_env()
     container = docker_client.containers.run(docker_image,
                                              command,
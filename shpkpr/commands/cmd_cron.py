@@ -7,9 +7,10 @@ import click
 # local imports
 from shpkpr.cli import arguments, options
 from shpkpr.cli.entrypoint import CONTEXT_SETTINGS
+from shpkpr.cron import list_jobs
+from shpkpr.cron import set_jobs
 from shpkpr.template import load_values_from_environment
-from shpkpr.template import render_json_template
-from shpkpr.vault import resolve_secrets
+from shpkpr.template import render_json_templates
 
 
 logger = logging.getLogger(__name__)
@@ -24,11 +25,12 @@ def cli():
 @cli.command('show', short_help='List Chronos Jobs as json', context_settings=CONTEXT_SETTINGS)
 @options.chronos_client
 @options.job_name
+@options.max_age
 @options.output_formatter
-def show(chronos_client, job_name, output_formatter, **kw):
+def show(chronos_client, job_name, max_age, output_formatter, **kw):
     """List application configuration.
     """
-    jobs = chronos_client.list()
+    jobs = list_jobs(chronos_client, max_age=max_age)
 
     if job_name is None:
         payload = jobs
@@ -37,20 +39,6 @@ def show(chronos_client, job_name, output_formatter, **kw):
     logger.info(output_formatter.format(payload))
 
 
-def _inject_secrets(template, secrets):
-    """Given an object containing secrets, inject them into a Chronos job prior
-    to deployment.
-    """
-    if not template.get("environmentVariables"):
-        template["environmentVariables"] = []
-    for key, secret in secrets.items():
-        template["environmentVariables"].append({
-            "name": key,
-            "value": secret,
-        })
-    return template
-
-
 @cli.command('set', short_help='Add or Update a Chronos Job', context_settings=CONTEXT_SETTINGS)
 @arguments.env_pairs
 @options.chronos_client
@@ -65,17 +53,11 @@ def set(chronos_client, vault_client, template_path, template_names, env_prefix,
     if not template_names:
         template_names = ["chronos/default/job.json.tmpl"]
 
+    # render all templates up front so that nothing is submitted to Chronos
+    # unless every template is valid.
     values = load_values_from_environment(prefix=env_prefix, overrides=env_pairs)
-    current_jobs = chronos_client.list()
-
-    for template_name in template_names:
-        rendered_template = render_json_template(template_path, template_name, **values)
-        resolved_secrets = resolve_secrets(vault_client, rendered_template)
-        rendered_template = _inject_secrets(rendered_template, resolved_secrets)
-        if _find_job(current_jobs, rendered_template['name']):
-            chronos_client.update(rendered_template)
-        else:
-            chronos_client.add(rendered_template)
+    rendered_templates = render_json_templates(template_path, template_names, **values)
+    set_jobs(chronos_client, vault_client, rendered_templates)
 
 
 @cli.command('delete', short_help='Deletes a Job from Chronos', context_settings=CONTEXT_SETTINGS)
@@ -0,0 +1,73 @@
+# stdlib imports
+import logging
+
+# third-party imports
+import click
+
+# local imports
+from shpkpr.cli import options
+from shpkpr.cli.entrypoint import CONTEXT_SETTINGS
+
+
+logger = logging.getLogger(__name__)
+
+
+@click.command('serve', short_help='Serve deployments over a local HTTP API.',
+               context_settings=CONTEXT_SETTINGS)
+@options.serve_host
+@options.serve_port
+@options.serve_token
+@options.serve_allowed_hosts
+@options.template_path
+@options.env_prefix
+@options.timeout
+@options.vault_client
+@options.marathon_lb_client
+@options.marathon_client
+@options.optional_chronos_client
+def cli(host, port, token, allowed_hosts, template_path, env_prefix, timeout, marathon_client,
+        marathon_lb_client, chronos_client, vault_client, **kw):
+    """Serve the ``apps deploy`` and ``cron set`` workflows over a local HTTP
+    API.
+
+    Clients, connection pools, compiled templates and cached secrets are kept
+    for the lifetime of the server and shared between requests, avoiding the
+    cost of starting shpkpr for every deployment. Chronos jobs can only be
+    set if ``--chronos-url`` is given.
+
+    \b
+    Endpoints:
+      GET  /health       Check that the server is running.
+      GET  /metrics      Metrics in Prometheus' text exposition format.
+      POST /apps/deploy  Deploy applications, as per ``shpkpr apps deploy``.
+      POST /cron/set     Add or update Chronos jobs, as per ``shpkpr cron set``.
+
+    Both POST endpoints accept a JSON object with the ``templates`` to render
+    and the ``values`` to render them with (which override values read from
+    the environment). ``/apps/deploy`` also accepts ``strategy``,
+    ``timeout``, ``parallelism``, ``force`` and ``always_deploy``.
+
+    All endpoints except ``/health`` require an ``Authorization: Bearer
+    <token>`` header carrying the value of ``--token``, and POST requests must
+    be sent with ``Content-Type: application/json``.
+    """
+    from shpkpr.server import ShpkprServer
+
+    server = ShpkprServer((host, port),
+                          marathon_client=marathon_client,
+                          marathon_lb_client=marathon_lb_client,
+                          chronos_client=chronos_client,
+                          vault_client=vault_client,
+                          template_path=template_path,
+                          env_prefix=env_prefix,
+                          timeout=timeout,
+                          token=token,
+                          allowed_hosts=allowed_hosts)
+
+    logger.info("Listening on http://{0}:{1}".format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
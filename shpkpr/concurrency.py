@@ -0,0 +1,28 @@
+"""Helpers for running blocking I/O concurrently.
+
+shpkpr supports Python 2, so rather than an event loop, concurrent remote
+calls are made from a small pool of threads which is sized to the work
+available and torn down once it's complete.
+"""
+# stdlib imports
+from multiprocessing.pool import ThreadPool
+
+
+def map_concurrently(func, items, max_concurrency):
+    """Call ``func`` on each of ``items`` using up to ``max_concurrency``
+    threads, returning the results in the same order as ``items``.
+
+    No threads are started when there's only a single item (or concurrency
+    is limited to 1). If any call raises, the exception is re-raised once
+    all calls have finished.
+    """
+    items = list(items)
+    if len(items) <= 1 or max_concurrency <= 1:
+        return [func(item) for item in items]
+
+    pool = ThreadPool(min(len(items), max_concurrency))
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,160 @@
+"""Helpers used to synchronise Chronos jobs with rendered job templates
+"""
+# stdlib imports
+import logging
+from collections import namedtuple
+
+# local imports
+from shpkpr.cache import ResponseCache
+from shpkpr.vault import resolve_secrets_for_templates
+
+
+logger = logging.getLogger(__name__)
+
+
+JobDiff = namedtuple('JobDiff', ['added', 'changed', 'unchanged'])
+
+# job fields which are updated by Chronos as jobs run, and so are never
+# considered when comparing job definitions.
+CHRONOS_MANAGED_FIELDS = frozenset([
+    'errorCount',
+    'errorsSinceLastSuccess',
+    'lastError',
+    'lastSuccess',
+    'successCount',
+])
+
+# values Chronos gives to job fields which aren't set when a job is submitted.
+# Fields missing from a job definition are only considered to have changed if
+# Chronos has anything other than these (or an empty value) for them.
+CHRONOS_DEFAULTS = {
+    'cpus': 0.1,
+    'disk': 256,
+    'epsilon': 'PT60S',
+    'mem': 128,
+    'retries': 2,
+    'runAsUser': 'root',
+    'shell': True,
+}
+
+
+def list_jobs(chronos_client, max_age=None, response_cache=None):
+    """Returns all jobs known to Chronos.
+
+    If ``max_age`` is given, a cached list up to ``max_age`` seconds old may be
+    returned instead of querying Chronos.
+    """
+    if max_age is None:
+        return chronos_client.list()
+
+    response_cache = response_cache or ResponseCache()
+    key = response_cache.key(chronos_client.servers, chronos_client._user, chronos_client._prefix, "jobs")
+    return response_cache.fetch(key, max_age, chronos_client.list)
+
+
+def set_jobs(chronos_client, vault_client, jobs):
+    """Resolve the secrets for each of ``jobs`` from Vault and submit any jobs
+    which are new or have changed to Chronos, leaving unchanged jobs alone.
+
+    Returns the ``JobDiff`` describing what was submitted.
+    """
+    all_resolved_secrets = resolve_secrets_for_templates(vault_client, jobs)
+    for job, resolved_secrets in zip(jobs, all_resolved_secrets):
+        inject_secrets(job, resolved_secrets)
+
+    diff = diff_jobs(chronos_client.list(), jobs)
+    for job in diff.added:
+        logger.info("Adding job: {0}".format(job['name']))
+        chronos_client.add(job)
+    for job in diff.changed:
+        logger.info("Updating job: {0}".format(job['name']))
+        chronos_client.update(job)
+    for job in diff.unchanged:
+        logger.info("Job unchanged, skipping: {0}".format(job['name']))
+
+    _msg = "Chronos jobs: {0} added, {1} changed, {2} unchanged"
+    logger.info(_msg.format(len(diff.added), len(diff.changed), len(diff.unchanged)))
+    return diff
+
+
+def inject_secrets(job, secrets):
+    """Given an object containing secrets, inject them into a Chronos job prior
+    to deployment.
+    """
+    if not job.get("environmentVariables"):
+        job["environmentVariables"] = []
+    for key, secret in secrets.items():
+        job["environmentVariables"].append({
+            "name": key,
+            "value": secret,
+        })
+    return job
+
+
+def index_jobs(jobs):
+    """Returns a dict of the given Chronos jobs keyed by job name.
+    """
+    return dict((job['name'], job) for job in jobs)
+
+
+def diff_jobs(current_jobs, new_jobs):
+    """Compare job definitions about to be submitted to Chronos against the
+    jobs that Chronos already has, returning a ``JobDiff`` which partitions
+    ``new_jobs`` into those that don't exist yet, those that have changed and
+    those that are unchanged.
+
+    Chronos drops fields it doesn't understand (such as shpkpr's ``secrets``)
+    so fields missing from Chronos' definition are ignored, as are those
+    Chronos manages itself (run counts, last success/error etc.). Chronos
+    replaces the whole job on update, so fields which have been removed from
+    a job are a change unless Chronos only has its default value for them.
+    """
+    current_jobs = index_jobs(current_jobs)
+    diff = JobDiff([], [], [])
+    for job in new_jobs:
+        current_job = current_jobs.get(job['name'])
+        if current_job is None:
+            diff.added.append(job)
+        elif job_has_changed(current_job, job):
+            diff.changed.append(job)
+        else:
+            diff.unchanged.append(job)
+    return diff
+
+
+def job_has_changed(current_job, new_job):
+    """Returns True if any field in ``new_job`` which Chronos knows about
+    differs from the value Chronos currently has for it, or if a field which
+    Chronos has a non-default value for is missing from ``new_job``.
+    """
+    for key, value in new_job.items():
+        if key not in current_job or key in CHRONOS_MANAGED_FIELDS:
+            continue
+        if _normalise(key, value) != _normalise(key, current_job[key]):
+            return True
+    for key, value in current_job.items():
+        if key in new_job or key in CHRONOS_MANAGED_FIELDS:
+            continue
+        if not _is_default(key, value):
+            return True
+    return False
+
+
+def _is_default(key, value):
+    """Returns True if ``value`` is what Chronos would use for the field
+    ``key`` if it wasn't set when the job was submitted.
+    """
+    if key in CHRONOS_DEFAULTS:
+        return value == CHRONOS_DEFAULTS[key]
+    return value in (None, False, 0, "", [], {})
+
+
+def _normalise(key, value):
+    """Normalise a job field so that semantically equal values compare equal.
+
+    Environment variables are order-insensitive, and Chronos may return them
+    in a different order from that in which they were submitted.
+    """
+    if key == 'environmentVariables' and isinstance(value, list):
+        return sorted(value, key=lambda v: (v.get('name'), v.get('value')))
+    return value
@@ -4,11 +4,14 @@ import time
 
 # local imports
 from .prepare import prepare_app_definition
+from .state import ClusterState
+from .state import get_deployment_group
 from .validate import Validator
 from .wait import SwapApplicationTimeout
 from .wait import Waiter
+from shpkpr.concurrency import map_concurrently
 from shpkpr.marathon import DeploymentFailed
-from cached_property import cached_property
+from shpkpr.timing import Timings
 
 logger = logging.getLogger(__name__)
 
@@ -21,18 +24,30 @@ class BlueGreenDeployment(object):
     deployments for HTTP services exposed to the web via Marathon-LB.
     """
 
-    def __init__(self, marathon_client, marathon_lb_client, timeout, app_definitions, **kw):
+    def __init__(self, marathon_client, marathon_lb_client, timeout, app_definitions, parallelism=1,
+                 timings=None, **kw):
         self.marathon_client = marathon_client
         self.marathon_lb_client = marathon_lb_client
         self.timeout = timeout
         self.app_definitions = app_definitions
+        self.parallelism = parallelism
+        self.timings = timings or Timings()
+
+        # a single snapshot of Marathon's state is shared by all applications
+        # deployed by this instance.
+        self.cluster_state = ClusterState(marathon_client)
 
     def execute(self, force=False):
         """Execute a bluegreen deployment.
 
-        The mechanics of a bluegreen deploy mean that we have to deploy each
-        application in turn (instead of the all-at-once approach used for
-        standard deployments).
+        The mechanics of a bluegreen deploy mean that each application has to
+        be deployed on its own (instead of the all-at-once approach used for
+        standard deployments). By default applications are deployed in turn,
+        stopping at the first failure. If ``parallelism`` is greater than one
+        then up to that many applications are deployed concurrently, sharing
+        the same Marathon and Marathon-LB clients (and therefore connection
+        pools and cached state), and any failures are reported once all
+        deployments have finished.
 
         NOTE: We could maybe be smarter here in future e.g. perhaps don't tear
         down old stacks until _all_ new stacks are running so we can roll back
@@ -41,8 +56,48 @@ class BlueGreenDeployment(object):
         app_ids = ", ".join([a["id"] for a in self.app_definitions])
         logger.info("Executing bluegreen deployment: {0}".format(app_ids))
 
-        for app_definition in self.app_definitions:
+        if self.parallelism <= 1 or len(self.app_definitions) <= 1:
+            for app_definition in self.app_definitions:
+                self.execute_for_app(app_definition, force)
+                # later applications may belong to the same deployment group,
+                # in which case they must see the stack that was just deployed.
+                self.cluster_state.refresh()
+            return
+
+        self._execute_concurrently(force)
+
+    def _execute_concurrently(self, force):
+        """Execute bluegreen deployments for all applications, running up to
+        ``parallelism`` at a time.
+        """
+        def _execute(app_definition):
+            return self._execute_collecting_failure(app_definition, force)
+
+        results = map_concurrently(_execute, self.app_definitions, self.parallelism)
+
+        failed = [(app_id, e) for app_id, e in results if e is not None]
+        succeeded = [app_id for app_id, e in results if e is None]
+        if succeeded:
+            logger.info("Bluegreen deployment succeeded: {0}".format(", ".join(succeeded)))
+        for app_id, e in failed:
+            logger.info("Bluegreen deployment failed: {0}: {1}".format(app_id, e))
+        if failed:
+            raise DeploymentFailed("Deployment failed: {0}".format(", ".join(a for a, _ in failed)))
+
+    def _execute_collecting_failure(self, app_definition, force):
+        """Execute a bluegreen deployment for a single application, returning
+        its ID along with the exception that it failed with (or ``None``).
+        """
+        try:
             self.execute_for_app(app_definition, force)
+        except Exception as e:
+            # exceptions with a zero exit code (e.g. DryRun) aren't failures,
+            # so are raised as they would be when deploying applications in
+            # turn.
+            if getattr(e, "exit_code", None) == 0:
+                raise
+            return app_definition["id"], e
+        return app_definition["id"], None
 
     def execute_for_app(self, app_definition, force):
         """Execute a bluegreen deployment for a single application.
@@ -50,31 +105,42 @@ class BlueGreenDeployment(object):
         deployment = BlueGreenDeploymentSingleApp(self.marathon_client,
                                                   self.marathon_lb_client,
                                                   self.timeout,
-                                                  app_definition)
+                                                  app_definition,
+                                                  cluster_state=self.cluster_state,
+                                                  timings=self.timings)
         return deployment.execute(force=force)
 
 
 class BlueGreenDeploymentSingleApp(object):
 
-    def __init__(self, marathon_client, marathon_lb_client, timeout, app_definition):
+    def __init__(self, marathon_client, marathon_lb_client, timeout, app_definition, cluster_state=None,
+                 timings=None):
         self.marathon_client = marathon_client
         self.marathon_lb_client = marathon_lb_client
         self.timeout = timeout
         self.app_definition = app_definition
+        self.cluster_state = cluster_state or ClusterState(marathon_client)
+        self.timings = timings or Timings()
 
     def execute(self, force=False):
         """Execute a bluegreen deployment for a single application.
         """
-        Validator(self.marathon_client).validate(self.app_definition)
+        app_id = self.app_definition["id"]
+        with self.timings.span("validate", app=app_id):
+            Validator(self.marathon_client, cluster_state=self.cluster_state).validate(self.app_definition)
 
         # prepare the new application for deployment by setting the appropriate
         # labels and transforming the app's ID as appropriate. These changes
         # will allow Marathon-LB to cut the traffic over to the new app once
         # deployed.
-        apps_state = self._fetch_apps_state
-        marathon_info = self._fetch_marathon_info
-        old_app_definition = self._fetch_old_app_definition()
-        new_app_definition = prepare_app_definition(self.app_definition, old_app_definition, apps_state, marathon_info)
+        with self.timings.span("prepare", app=app_id):
+            old_app_definition = self._fetch_old_app_definition()
+            # the state of all other applications is only needed to select
+            # ports for a first deploy, so we avoid fetching it otherwise.
+            port_allocator = self.cluster_state.port_allocator if old_app_definition is None else None
+            new_app_definition = prepare_app_definition(self.app_definition,
+                                                        old_app_definition,
+                                                        port_allocator=port_allocator)
 
         # deploy the new application, wait until the traffic is cut over and
         # then tear down the old stack. If the process fails for any reason then
@@ -94,10 +160,13 @@ class BlueGreenDeploymentSingleApp(object):
     def _deploy_new_application(self, new_app_definition):
         """Deploy a new application definition to Marathon.
         """
-        deployment = self.marathon_client.deploy([new_app_definition])
+        app_id = new_app_definition["id"]
+        with self.timings.span("deploy", app=app_id):
+            deployment = self.marathon_client.deploy([new_app_definition])
 
         logger.info("Waiting for marathon deployment to complete: {0}".format(deployment.deployment_id))
-        result = deployment.wait(timeout=self.timeout)
+        with self.timings.span("marathon_wait", app=app_id):
+            result = deployment.wait(timeout=self.timeout)
         logger.info("Marathon deployment complete: {0}".format(deployment.deployment_id))
         return result
 
@@ -110,10 +179,12 @@ class BlueGreenDeploymentSingleApp(object):
         waiter = Waiter(self.marathon_client,
                         self.marathon_lb_client,
                         new_app_id,
-                        old_app_id)
+                        old_app_id,
+                        timings=self.timings)
 
         deadline = time.time() + self.timeout
-        return waiter.wait(deadline)
+        with self.timings.span("traffic_swap", app=new_app_id):
+            return waiter.wait(deadline)
 
     def _remove_application(self, app_id):
         """Remove a deployed application from Marathon
@@ -129,7 +200,8 @@ class BlueGreenDeploymentSingleApp(object):
         """Removes the newly started application after a deploy error
         """
         logger.info("Deployment failed: removing newly deployed stack")
-        self._remove_application(app_id)
+        with self.timings.span("rollback", app=app_id):
+            self._remove_application(app_id)
         raise DeploymentFailed("Deployment failed")
 
     def _remove_old_application(self, app_id):
@@ -139,7 +211,9 @@ class BlueGreenDeploymentSingleApp(object):
             return
 
         logger.info("About to delete old application: %s", app_id)
-        if not self._remove_application(app_id):
+        with self.timings.span("teardown", app=app_id):
+            removed = self._remove_application(app_id)
+        if not removed:
             raise DeploymentFailed("Deployment failed")
 
     def _fetch_old_app_definition(self):
@@ -147,24 +221,6 @@ class BlueGreenDeploymentSingleApp(object):
         from Marathon if one exists. If no existing stacks are found then
         ``None`` is returned instead.
         """
-        def get_deployment_group(app_definition):
-            labels = app_definition.get('labels', {})
-            return labels.get('HAPROXY_DEPLOYMENT_GROUP')
-
         target_deployment_group = get_deployment_group(self.app_definition)
-        for app_definition in self._fetch_apps_state:
-            if get_deployment_group(app_definition) == target_deployment_group:
-                return app_definition
-        return None
-
-    @cached_property
-    def _fetch_marathon_info(self):
-        """Fetch current marathon configuration info
-        """
-        return self.marathon_client.get_info()
-
-    @cached_property
-    def _fetch_apps_state(self):
-        """Fetch current marathon app state
-        """
-        return self.marathon_client.list_applications()
+        existing_apps = self.cluster_state.apps_in_deployment_group(target_deployment_group)
+        return existing_apps[0] if existing_apps else None
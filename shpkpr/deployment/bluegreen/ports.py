@@ -0,0 +1,63 @@
+# stdlib imports
+import random
+import threading
+
+# local imports
+from shpkpr import exceptions
+
+
+class PortsExhausted(exceptions.ShpkprException):
+    exit_code = 2
+
+    def format_message(self):
+        return 'Unable to allocate service port: %s' % self.message
+
+
+class PortAllocator(object):
+    """Allocates unused service ports from Marathon's local port range.
+
+    The set of free ports is built once, after which each allocation picks a
+    random free port in constant time, regardless of how full the range is.
+    Allocated ports are removed from the pool, so a single allocator can be
+    shared (including between threads) by all applications deployed in one
+    invocation without them being given the same port.
+    """
+
+    def __init__(self, min_port, max_port, used_ports=None):
+        used_ports = set(used_ports or [])
+        self._lock = threading.Lock()
+        self._free_ports = [p for p in range(min_port, max_port + 1) if p not in used_ports]
+        self._positions = dict((p, i) for i, p in enumerate(self._free_ports))
+
+    def __len__(self):
+        return len(self._free_ports)
+
+    def allocate(self):
+        """Allocate and return a random free port.
+
+        Raises ``PortsExhausted`` if every port in the range is in use.
+        """
+        with self._lock:
+            if not self._free_ports:
+                raise PortsExhausted("all ports in Marathon's local port range are in use")
+            port = self._free_ports[random.randrange(len(self._free_ports))]
+            self._remove(port)
+            return port
+
+    def reserve(self, *ports):
+        """Mark the given ports as in use so they're never allocated.
+        """
+        with self._lock:
+            for port in ports:
+                if port in self._positions:
+                    self._remove(port)
+
+    def _remove(self, port):
+        """Remove ``port`` from the free list by swapping it with the last
+        element and truncating, avoiding an O(n) deletion.
+        """
+        i = self._positions.pop(port)
+        last = self._free_ports.pop()
+        if last != port:
+            self._free_ports[i] = last
+            self._positions[last] = i
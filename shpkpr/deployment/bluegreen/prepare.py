@@ -1,16 +1,21 @@
 # stdlib imports
 import copy
-import random
 from datetime import datetime
 
+# local imports
+from .ports import PortAllocator
 
-def prepare_app_definition(app_definition, old_app_definition=None, apps_state=None, marathon_info=None):
+
+def prepare_app_definition(app_definition, old_app_definition=None, apps_state=None, marathon_info=None,
+                           port_allocator=None):
     """Prepares ``app_definition`` for blue/green deployment by adding the
     necessary Marathon labels and setting the ID and service port.
 
     If an old app definition is passed in, it will be used to correctly pick the
     color and port for the new deployment, otherwise we default to "blue" and
-    use the ports as defined in the new app definition.
+    use the ports as defined in the new app definition, or allocate new ones
+    using ``port_allocator`` (built from ``apps_state`` and ``marathon_info``
+    if not given) if none are defined.
     """
     # make a deep copy of the new app definition before we start mutating it so
     # we can refer back to properties of the original as needed.
@@ -21,7 +26,7 @@ def prepare_app_definition(app_definition, old_app_definition=None, apps_state=N
         _rotate_port(new_app_definition, old_app_definition)
     else:
         _set_app_colour(new_app_definition, 'blue')
-        _init_ports(new_app_definition, apps_state, marathon_info)
+        _init_ports(new_app_definition, apps_state, marathon_info, port_allocator)
 
     new_app_definition['id'] = new_app_definition['id'] + '-' + _get_app_colour(new_app_definition)
     new_app_definition['labels']['HAPROXY_APP_ID'] = app_definition['id']
@@ -30,16 +35,20 @@ def prepare_app_definition(app_definition, old_app_definition=None, apps_state=N
     return new_app_definition
 
 
-def _init_ports(app_definition, apps_state, marathon_info):
+def _init_ports(app_definition, apps_state, marathon_info, port_allocator=None):
     """Determines that start port for the application and updates the application state.
     This works for both Dockerised and non-Dockerised applications.
     """
     if _is_service_port_defined(app_definition):
         service_port = _get_service_port(app_definition)
         alt_port = _get_alt_port(app_definition)
+        if port_allocator is not None:
+            port_allocator.reserve(service_port, alt_port)
     else:
-        service_port = _select_next_port(apps_state, marathon_info, [])
-        alt_port = _select_next_port(apps_state, marathon_info, [service_port])
+        if port_allocator is None:
+            port_allocator = build_port_allocator(apps_state, marathon_info)
+        service_port = port_allocator.allocate()
+        alt_port = port_allocator.allocate()
 
     app_definition = _set_current_port(app_definition, service_port)
     app_definition = _set_service_port(app_definition, service_port)
@@ -47,21 +56,19 @@ def _init_ports(app_definition, apps_state, marathon_info):
     return app_definition
 
 
-def _select_next_port(apps_state, marathon_info, used_ports):
-    """Given a currently deployed app definition, return the service port to use
-    for the next blue/green deployment.
+def build_port_allocator(apps_state, marathon_info):
+    """Build a ``PortAllocator`` for Marathon's local port range which excludes
+    the service and alt ports of all currently deployed applications.
     """
     min_port = marathon_info['marathon_config']['local_port_min']
     max_port = marathon_info['marathon_config']['local_port_max']
 
+    used_ports = set()
     for app_definition in apps_state:
-        used_ports.append(_get_service_port(app_definition))
-        used_ports.append(_get_alt_port(app_definition))
+        used_ports.add(_get_service_port(app_definition))
+        used_ports.add(_get_alt_port(app_definition))
 
-    while True:
-        port = random.randint(min_port, max_port)
-        if port not in used_ports:
-            return port
+    return PortAllocator(min_port, max_port, used_ports)
 
 
 def _rotate_port(new_app_definition, old_app_definition):
@@ -0,0 +1,100 @@
+# stdlib imports
+import threading
+
+# third-party imports
+from cached_property import threaded_cached_property
+
+# local imports
+from .prepare import build_port_allocator
+from shpkpr.marathon import label_selector
+
+
+DEPLOYMENT_GROUP_LABEL = 'HAPROXY_DEPLOYMENT_GROUP'
+
+
+class ClusterState(object):
+    """A snapshot of the applications currently deployed to Marathon and of
+    Marathon's configuration.
+
+    A single snapshot is shared by everything involved in a bluegreen
+    deployment (validation, preparation and lookup of existing stacks) so that
+    Marathon's application list is fetched once per invocation rather than
+    several times per application. Data is fetched lazily on first use and
+    kept until ``refresh`` is called, which happens after each application is
+    deployed in turn so that the next sees the stacks it left behind.
+
+    None of the resources Marathon can embed in an application (tasks, task
+    stats, etc.) are needed here, so they are never requested, and lookups by
+    deployment group are filtered by Marathon unless the full list of
+    applications has already been fetched.
+    """
+
+    def __init__(self, marathon_client):
+        self.marathon_client = marathon_client
+        self._lock = threading.Lock()
+        self._deployment_groups = {}
+
+    @threaded_cached_property
+    def apps(self):
+        """All applications currently deployed to Marathon.
+        """
+        return self.marathon_client.list_applications(embed=[])
+
+    @threaded_cached_property
+    def marathon_info(self):
+        """Marathon's current configuration info.
+        """
+        return self.marathon_client.get_info()
+
+    @threaded_cached_property
+    def port_allocator(self):
+        """Allocator for the service ports of new applications, shared so that
+        applications deployed together are never given the same ports.
+
+        This is deliberately not discarded by ``refresh`` as ports allocated to
+        applications that haven't been deployed yet wouldn't be accounted for.
+        """
+        return build_port_allocator(self.apps, self.marathon_info)
+
+    def apps_in_deployment_group(self, deployment_group):
+        """Returns all deployed applications belonging to the given deployment
+        group.
+        """
+        if "apps" in self.__dict__ or deployment_group is None:
+            return self._apps_by_deployment_group.get(deployment_group, [])
+
+        with self._lock:
+            apps = self._deployment_groups.get(deployment_group)
+        if apps is not None:
+            return apps
+
+        # the lock isn't held whilst fetching so that lookups of other
+        # deployment groups aren't held up. Concurrent lookups of the same
+        # group may each fetch it, but all use the result stored first.
+        selector = label_selector(DEPLOYMENT_GROUP_LABEL, deployment_group)
+        apps = self.marathon_client.list_applications(embed=[], label_selector=selector)
+        with self._lock:
+            return self._deployment_groups.setdefault(deployment_group, apps)
+
+    def refresh(self):
+        """Discard the snapshot so that it's fetched again on next use.
+        """
+        for attr in ["apps", "marathon_info", "_apps_by_deployment_group"]:
+            self.__dict__.pop(attr, None)
+        with self._lock:
+            self._deployment_groups = {}
+
+    @threaded_cached_property
+    def _apps_by_deployment_group(self):
+        apps_by_deployment_group = {}
+        for app in self.apps:
+            group = get_deployment_group(app)
+            apps_by_deployment_group.setdefault(group, []).append(app)
+        return apps_by_deployment_group
+
+
+def get_deployment_group(app_definition):
+    """Returns the deployment group an application belongs to, or ``None``.
+    """
+    labels = app_definition.get('labels', {})
+    return labels.get(DEPLOYMENT_GROUP_LABEL)
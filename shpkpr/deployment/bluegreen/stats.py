@@ -1,3 +1,6 @@
+# stdlib imports
+from collections import defaultdict
+
 # third-party imports
 from cached_property import cached_property
 
@@ -21,19 +24,36 @@ class ApplicationStats(object):
         """
         return [r for r in self.listeners if r.status == status.upper()]
 
+    def listeners_for_svname(self, svname):
+        """Returns listeners with the given service name (i.e. those routing to
+        a single task), one per HAProxy instance.
+        """
+        return self._listeners_by_svname.get(svname, [])
+
+    @cached_property
+    def _listeners_by_svname(self):
+        index = defaultdict(list)
+        for listener in self.listeners:
+            index[listener.svname].append(listener)
+        return dict(index)
+
     @property
     def listener_count(self):
         return len(self.listeners)
 
     @property
     def _deployment_label(self):
-        """Construct and return a label in the format used by HAProxy to
-        identify this application.
+        return deployment_label(self._app_definition)
 
-        This label can be used when filtering the list of HAProxy listeners to
-        only those for this application.
-        """
-        labels = self._app_definition['labels']
-        group = labels['HAPROXY_DEPLOYMENT_GROUP']
-        port = labels['HAPROXY_0_PORT']
-        return "{0}_{1}".format(group, port)
+
+def deployment_label(app_definition):
+    """Construct and return a label in the format used by HAProxy to identify
+    the given application.
+
+    This label can be used when filtering the list of HAProxy listeners to only
+    those for this application.
+    """
+    labels = app_definition['labels']
+    group = labels['HAPROXY_DEPLOYMENT_GROUP']
+    port = labels['HAPROXY_0_PORT']
+    return "{0}_{1}".format(group, port)
@@ -1,7 +1,6 @@
-# stdlib imports
-from collections import Counter
-
 # local imports
+from .state import ClusterState
+from .state import get_deployment_group
 from shpkpr import exceptions
 
 
@@ -19,10 +18,10 @@ class Validator(object):
     application definition is prepared/transformed for deployment.
     """
 
-    def __init__(self, marathon_client, validators=None):
+    def __init__(self, marathon_client, validators=None, cluster_state=None):
         if validators is None:
             validators = [AppDefinitionValidator, MarathonStateValidator]
-        self.validators = [v(marathon_client) for v in validators]
+        self.validators = [v(marathon_client, cluster_state=cluster_state) for v in validators]
 
     def validate(self, app_definition):
         for validator in self.validators:
@@ -77,18 +76,13 @@ class MarathonStateValidator(object):
         "failed."
     )
 
-    def __init__(self, marathon_client, *args, **kwargs):
+    def __init__(self, marathon_client, cluster_state=None, *args, **kwargs):
         self.marathon_client = marathon_client
+        self.cluster_state = cluster_state or ClusterState(marathon_client)
 
     def validate(self, app_definition):
-        def get_deployment_group(app_definition):
-            labels = app_definition.get('labels', {})
-            return labels.get('HAPROXY_DEPLOYMENT_GROUP')
-
         app_group = get_deployment_group(app_definition)
+        remote_apps = self.cluster_state.apps_in_deployment_group(app_group)
 
-        remote_apps = self.marathon_client.list_applications()
-        remote_groups = [get_deployment_group(app) for app in remote_apps]
-
-        if Counter(remote_groups)[app_group] > 1:
+        if len(remote_apps) > 1:
             raise ValidationError(self.ERROR_MESSAGE)
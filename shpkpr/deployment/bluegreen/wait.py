@@ -5,6 +5,9 @@ import time
 # local imports
 from . import stats
 from shpkpr import exceptions
+from shpkpr import metrics
+from shpkpr.polling import PollSchedule
+from shpkpr.timing import Timings
 
 
 logger = logging.getLogger(__name__)
@@ -23,19 +26,33 @@ class Waiter(object):
     the load-balancer layer.
     """
 
-    # amount of time (in seconds) between subsequent polls of the load balancer
-    # whilst waiting for traffic to cut over to the new application.
-    MARATHON_LB_POLL_INTERVAL = 5
+    # schedule used to determine the time between subsequent polls of the load
+    # balancer whilst waiting for traffic to cut over to the new application.
+    MARATHON_LB_POLL_SCHEDULE = PollSchedule(initial_interval=1, multiplier=2, max_interval=10)
 
-    def __init__(self, marathon_client, marathon_lb_client, new_app_id, old_app_id):
+    def __init__(self, marathon_client, marathon_lb_client, new_app_id, old_app_id, schedule=None, timings=None):
         self.marathon_client = marathon_client
         self.marathon_lb_client = marathon_lb_client
         self.new_app_id = new_app_id
         self.old_app_id = old_app_id
+        self.schedule = schedule or self.MARATHON_LB_POLL_SCHEDULE
+        self.timings = timings or Timings()
 
     def check(self):
         """Check if the cutover is complete
         """
+        with self.timings.span("swap_check", app=self.new_app_id) as attributes:
+            try:
+                with metrics.SWAP_CHECK_DURATION.time():
+                    result = self._check()
+            except Exception:
+                metrics.SWAP_CHECKS.inc(result="error")
+                raise
+            attributes["result"] = result
+        metrics.SWAP_CHECKS.inc(result="complete" if result else "pending")
+        return result
+
+    def _check(self):
         if self.marathon_lb_client.is_reloading():
             logger.info("Waiting for Marathon-LB to settle (reloading detected)")
             return False
@@ -60,17 +77,24 @@ class Waiter(object):
         _msg = "Waiting for traffic to cut over from `{0}` to `{1}`"
         logger.info(_msg.format(self.old_app_id, self.new_app_id))
 
-        while not self.check():
-            if time.time() >= deadline:
-                raise SwapApplicationTimeout('Max wait Time Exceeded')
-            time.sleep(self.MARATHON_LB_POLL_INTERVAL)
+        with metrics.SWAP_DURATION.time(result="error") as labels:
+            if not self.check():
+                for delay in self.schedule.delays(deadline):
+                    time.sleep(delay)
+                    if self.check():
+                        break
+                else:
+                    labels["result"] = "timeout"
+                    raise SwapApplicationTimeout('Max wait Time Exceeded')
+            labels["result"] = "success"
 
         logger.info("Traffic successfully routed to new application")
 
     def _fetch_application_stats(self, app_definition):
         """Fetch stats from HAProxy for the current application.
         """
-        all_stats = self.marathon_lb_client.fetch_stats()
+        label = stats.deployment_label(app_definition)
+        all_stats = self.marathon_lb_client.fetch_stats(pxname=label)
         return stats.ApplicationStats(app_definition, all_stats)
 
     def _new_app_is_up(self, app_stats, app):
@@ -105,35 +129,32 @@ class ListenerCheck(object):
         self.haproxy_count = haproxy_count
 
     def check(self, status, predicate=lambda _: True):
-        # fetch all listeners with the given status
-        listeners = self.app_stats.listeners_with_status(status)
-        # filter the list to contain only those listeners for which
-        # `predicate(listener)` returns `True`
-        listeners = [l for l in listeners if predicate(l)]
-        # ensure that task and listener counts match up
-        return self._check_listeners_for_tasks(listeners)
-
-    def _check_listeners_for_tasks(self, listeners):
-        """Check that the expected number of listeners are present for each task
-        belonging to this application.
+        """Check that every task belonging to this application has the expected
+        number of listeners with the given ``status`` and for which
+        ``predicate(listener)`` returns ``True``.
         """
         for task in self.app["tasks"]:
-            if not self._check_listeners_for_task(listeners, task):
+            if not self._check_listeners_for_task(task, status, predicate):
                 return False
         return True
 
-    def _check_listeners_for_task(self, listeners, task):
+    def _check_listeners_for_task(self, task, status, predicate):
         """Check that the expected number of listeners for the given task are
         present.
         """
-        # build a service name from the given marathon task which matches the
-        # format used by HAProxy's stats CSV
-        _prefix = task['host'].replace('.', '_')
-        _port = task['ports'][0]
-        svname = '{0}_{1}'.format(_prefix, _port)
-
-        # filter listeners to only those for the given task
-        listeners = [l for l in listeners if l.svname == svname]
+        # look up the task's listeners directly rather than scanning every
+        # listener for the application, once per task.
+        listeners = self.app_stats.listeners_for_svname(_task_svname(task))
+        listeners = [l for l in listeners if l.status == status.upper() and predicate(l)]
         # ensure there's exactly one listener for each marathon-lb/haproxy
         # instance
         return len(listeners) == self.haproxy_count
+
+
+def _task_svname(task):
+    """Build a service name from the given marathon task which matches the
+    format used by HAProxy's stats CSV.
+    """
+    _prefix = task['host'].replace('.', '_')
+    _port = task['ports'][0]
+    return '{0}_{1}'.format(_prefix, _port)
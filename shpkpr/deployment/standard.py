@@ -1,10 +1,21 @@
 # stdlib imports
 import logging
 
+# local imports
+from shpkpr.concurrency import map_concurrently
+from shpkpr.marathon import ClientError
+from shpkpr.marathon.compare import has_changed
+from shpkpr.timing import Timings
+
 
 logger = logging.getLogger(__name__)
 
 
+# maximum number of applications fetched from Marathon concurrently when
+# checking for changes.
+MAX_CONCURRENT_FETCHES = 8
+
+
 class StandardDeployment(object):
     """StandardDeployment implements Marathon's basic deployment workflow and
     uses the primitives provided by the Marathon API to perform a standard
@@ -15,23 +26,66 @@ class StandardDeployment(object):
     worker applications.
     """
 
-    def __init__(self, marathon_client, timeout, app_definitions, **kw):
+    def __init__(self, marathon_client, timeout, app_definitions, timings=None, always_deploy=False, **kw):
         self.marathon_client = marathon_client
         self.timeout = timeout
         self.app_definitions = app_definitions
+        self.timings = timings or Timings()
+        self.always_deploy = always_deploy
 
     def execute(self, force=False):
         """Execute standard Marathon deployment.
+
+        Applications whose definition matches what's already deployed are
+        skipped, as redeploying them would needlessly restart all their tasks,
+        unless ``always_deploy`` is set or the application's image is pulled
+        on every deploy (i.e. its definition sets ``forcePullImage``), in
+        which case an unchanged definition may still deploy a new image.
         """
-        app_ids = ", ".join([a["id"] for a in self.app_definitions])
+        if self.always_deploy:
+            app_definitions = self.app_definitions
+        else:
+            with self.timings.span("compare"):
+                changed = map_concurrently(self._has_changed, self.app_definitions, MAX_CONCURRENT_FETCHES)
+            app_definitions = [a for a, c in zip(self.app_definitions, changed) if c]
+        if not app_definitions:
+            logger.info("No changes to deploy")
+            return True
+
+        app_ids = ", ".join([a["id"] for a in app_definitions])
         logger.info("Executing standard deployment: {0}".format(app_ids))
 
-        deployment = self.marathon_client.deploy(
-            self.app_definitions,
-            force=force,
-        )
+        with self.timings.span("deploy", apps=app_ids):
+            deployment = self.marathon_client.deploy(
+                app_definitions,
+                force=force,
+            )
 
         logger.info("Waiting for marathon deployment to complete: {0}".format(deployment.deployment_id))
-        result = deployment.wait(timeout=self.timeout)
+        with self.timings.span("marathon_wait", apps=app_ids):
+            result = deployment.wait(timeout=self.timeout)
         logger.info("Marathon deployment complete: {0}".format(deployment.deployment_id))
         return result
+
+    def _has_changed(self, app_definition):
+        """Returns True if ``app_definition`` differs from the application
+        currently deployed to Marathon, or if it isn't deployed at all.
+        """
+        if _force_pulls_image(app_definition):
+            return True
+
+        try:
+            live_app = self.marathon_client.get_application(app_definition["id"], embed=[])
+        except ClientError:
+            return True
+
+        if has_changed(live_app, app_definition):
+            return True
+
+        logger.info("Application unchanged, skipping: {0}".format(app_definition["id"]))
+        return False
+
+
+def _force_pulls_image(app_definition):
+    docker = (app_definition.get("container") or {}).get("docker") or {}
+    return bool(docker.get("forcePullImage"))
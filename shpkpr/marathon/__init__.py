@@ -2,9 +2,12 @@
 from .client import ClientError
 from .client import DryRun
 from .client import MarathonClient
+from .client import embeds_for_fields
+from .client import label_selector
 from .deployment import DeploymentFailed
 from .deployment import DeploymentNotFound
 from .deployment import MarathonDeployment
+from .events import EventStreamUnavailable
 
 
 __all__ = [
@@ -12,6 +15,9 @@ __all__ = [
     'DeploymentFailed',
     'DeploymentNotFound',
     'DryRun',
+    'EventStreamUnavailable',
     'MarathonClient',
     'MarathonDeployment',
+    'embeds_for_fields',
+    'label_selector',
 ]
@@ -3,13 +3,53 @@
 # future imports
 from __future__ import absolute_import
 
+# stdlib imports
+import re
+import threading
+import time
+
 # third-party imports
 import requests
+from cached_property import threaded_cached_property
 
 # local imports
 from .deployment import DeploymentNotFound
 from .deployment import MarathonDeployment
+from .events import EventStream
+from .events import EventStreamUnavailable
+from .stream import iter_json_array
 from shpkpr import exceptions
+from shpkpr import metrics
+from shpkpr import session
+from shpkpr.cache import CachedResponse
+from shpkpr.cache import ResponseCache
+
+
+# resources that can be embedded in Marathon's app responses. All of them are
+# embedded unless the caller asks for a specific set.
+EMBEDS = [
+    "tasks",
+    "counts",
+    "deployments",
+    "lastTaskFailure",
+    "taskStats",
+]
+
+# top-level application fields which are only present when the corresponding
+# resource is embedded.
+EMBEDDED_FIELDS = {
+    "deployments": "deployments",
+    "lastTaskFailure": "lastTaskFailure",
+    "taskStats": "taskStats",
+    "tasks": "tasks",
+    "tasksHealthy": "counts",
+    "tasksRunning": "counts",
+    "tasksStaged": "counts",
+    "tasksUnhealthy": "counts",
+}
+
+# size of the chunks in which large responses are read when streaming.
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class ClientError(exceptions.ShpkprException):
@@ -24,31 +64,75 @@ class MarathonClient(object):
     """A thin wrapper around marathon.MarathonClient for internal use
     """
 
-    def __init__(self, marathon_url, username=None, password=None, dry_run=False):
+    def __init__(self, marathon_url, username=None, password=None, dry_run=False,
+                 pool_size=session.DEFAULT_POOL_SIZE,
+                 max_retries=session.DEFAULT_MAX_RETRIES,
+                 backoff_factor=session.DEFAULT_BACKOFF_FACTOR,
+                 deployments_max_age=1, event_stream=False, response_cache=None):
         self._marathon_url = marathon_url
         self._dry_run = dry_run
+        self.event_stream = event_stream
+        self._pool_size = pool_size
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+
+        # snapshot of in-progress deployments, indexed by deployment ID and
+        # shared between everything polling Marathon through this client.
+        self._deployments_max_age = deployments_max_age
+        self._deployments_lock = threading.Lock()
+        self._deployments = {}
+        self._deployments_etag = None
+        self._deployments_fetched_at = None
 
         self._basic_auth = None
         if None not in [username, password]:
             self._basic_auth = requests.auth.HTTPBasicAuth(username, password)
 
+        if response_cache is not None:
+            self.response_cache = response_cache
+
+    @threaded_cached_property
+    def _session(self):
+        """Pooled HTTP session shared by all requests made by this client.
+
+        Connections are kept alive between requests so that polling Marathon
+        (e.g. whilst waiting for a deployment) doesn't pay for a new TCP/TLS
+        handshake on every call.
+        """
+        _session = session.pooled_session(pool_size=self._pool_size,
+                                          max_retries=self._max_retries,
+                                          backoff_factor=self._backoff_factor)
+        _session.auth = self._basic_auth
+        return _session
+
     def _build_url(self, path):
         return self._marathon_url.rstrip("/") + path
 
+    @threaded_cached_property
+    def response_cache(self):
+        """Cache used by read-only queries which are given a ``max_age``.
+        """
+        return ResponseCache()
+
     def _make_request(self, method, path, **kwargs):
         if self._dry_run:
             raise DryRun("Exiting as --dry-run requested")
-        request = getattr(requests, method.lower())
-        return request(self._build_url(path), auth=self._basic_auth, **kwargs)
-
-    def embed_params(self, entity_type):
-        return [
-            "{0}.tasks".format(entity_type),
-            "{0}.counts".format(entity_type),
-            "{0}.deployments".format(entity_type),
-            "{0}.lastTaskFailure".format(entity_type),
-            "{0}.taskStats".format(entity_type),
-        ]
+
+        # streamed responses are timed until their headers are received
+        endpoint = metrics.endpoint(path)
+        status = "error"
+        try:
+            with metrics.MARATHON_REQUEST_DURATION.time(method=method, endpoint=endpoint):
+                response = self._session.request(method, self._build_url(path), **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            metrics.MARATHON_REQUESTS.inc(method=method, endpoint=endpoint, status=status)
+
+    def embed_params(self, entity_type, embeds=None):
+        if embeds is None:
+            embeds = EMBEDS
+        return ["{0}.{1}".format(entity_type, embed) for embed in embeds]
 
     def get_info(self):
         """ Returns the marathon info from the /info endpoint
@@ -65,18 +149,52 @@ class MarathonClient(object):
         path = "/v2/apps/" + application_id
         params = {"force": "true"} if force else {}
         response = self._make_request('DELETE', path, params=params)
+        self._invalidate_deployments()
 
         if response.status_code == 200:
             return True
         else:
             return False
 
-    def get_application(self, application_id):
+    def _cached_get(self, path, params=None, max_age=None):
+        """Make a GET request, or serve its response from ``response_cache``.
+
+        The cache is only used if a ``max_age`` (in seconds) is given, in
+        which case a cached response younger than ``max_age`` is returned
+        without contacting Marathon. Older responses are revalidated with a
+        conditional request if Marathon provided an ``ETag``.
+        """
+        if max_age is None:
+            return self._make_request('GET', path, params=params)
+
+        username = self._basic_auth.username if self._basic_auth else None
+        key = self.response_cache.key(self._marathon_url, username, path, params)
+        entry = self.response_cache.get(key)
+        if entry is not None and entry.age < max_age:
+            return CachedResponse(entry.body)
+
+        headers = {}
+        if entry is not None and entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        response = self._make_request('GET', path, params=params, headers=headers)
+
+        if response.status_code == 304 and entry is not None:
+            self.response_cache.set(key, entry.body, entry.etag)
+            return CachedResponse(entry.body)
+        if response.status_code == 200:
+            self.response_cache.set(key, response.json(), response.headers.get("ETag"))
+        return response
+
+    def get_application(self, application_id, embed=None, max_age=None):
         """Returns detailed information for a single application.
+
+        ``embed`` is the list of resources (see ``EMBEDS``) to embed in the
+        application, defaulting to all of them. If ``max_age`` is given, a
+        cached response up to ``max_age`` seconds old may be returned.
         """
         path = "/v2/apps/" + application_id
-        params = {"embed": self.embed_params("app")}
-        response = self._make_request('GET', path, params=params)
+        params = {"embed": self.embed_params("app", embed)}
+        response = self._cached_get(path, params=params, max_age=max_age)
 
         if response.status_code == 200:
             application = response.json()['app']
@@ -88,12 +206,20 @@ class MarathonClient(object):
 
         raise ClientError("Unknown Marathon error: %s\n\n%s" % (response.status_code, response.text))
 
-    def list_applications(self):
+    def list_applications(self, embed=None, label_selector=None, app_id=None, max_age=None):
         """Return a list of all applications currently deployed to marathon.
+
+        ``embed`` is the list of resources (see ``EMBEDS``) to embed in each
+        application, all of them are embedded by default. Marathon can be
+        asked to filter the returned applications by passing a
+        ``label_selector`` (see ``label_selector()``) and/or an ``app_id``, in
+        which case only applications whose ID contains the given string are
+        returned. If ``max_age`` is given, a cached response up to ``max_age``
+        seconds old may be returned.
         """
         path = "/v2/apps"
-        params = {"embed": self.embed_params("apps")}
-        response = self._make_request('GET', path, params=params)
+        params = self._list_applications_params(embed, label_selector, app_id)
+        response = self._cached_get(path, params=params, max_age=max_age)
 
         if response.status_code == 200:
             applications = response.json()['apps']
@@ -104,6 +230,43 @@ class MarathonClient(object):
 
         raise ClientError("Unknown Marathon error: %s\n\n%s" % (response.status_code, response.text))
 
+    def iter_applications(self, embed=None, label_selector=None, app_id=None, max_age=None):
+        """Yield all applications currently deployed to marathon.
+
+        Accepts the same arguments as ``list_applications``, but applications
+        are parsed and yielded as Marathon's response is received rather than
+        after reading it in full, so memory use doesn't grow with the number
+        of applications. Responses which may be cached (i.e. if ``max_age`` is
+        given) are read in full.
+        """
+        if max_age is not None:
+            for app in self.list_applications(embed, label_selector, app_id, max_age=max_age):
+                yield app
+            return
+
+        path = "/v2/apps"
+        params = self._list_applications_params(embed, label_selector, app_id)
+        response = self._make_request('GET', path, params=params, stream=True)
+
+        try:
+            if response.status_code != 200:
+                raise ClientError("Unknown Marathon error: %s\n\n%s" % (response.status_code, response.text))
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            for app in iter_json_array(chunks, "apps"):
+                yield app
+        except ValueError as e:
+            raise ClientError("Unable to parse Marathon response: {0}".format(e))
+        finally:
+            response.close()
+
+    def _list_applications_params(self, embed, label_selector, app_id):
+        params = {"embed": self.embed_params("apps", embed)}
+        if label_selector is not None:
+            params["label"] = label_selector
+        if app_id is not None:
+            params["id"] = app_id
+        return params
+
     def deploy(self, application_payload, force=False):
         """Deploys the given application(s) to Marathon.
         """
@@ -123,6 +286,7 @@ class MarathonClient(object):
 
         params = {"force": "true"} if force else {}
         response = self._make_request('PUT', path, params=params, json=application_payload)
+        self._invalidate_deployments()
 
         if response.status_code in [200, 201]:
             deployment = response.json()
@@ -138,12 +302,103 @@ class MarathonClient(object):
     def get_deployment(self, deployment_id):
         """Returns detailed information for a single deploy
         """
-        response = self._make_request('GET', "/v2/deployments")
+        deployments = self._fetch_deployments()
+        try:
+            return deployments[deployment_id]
+        except KeyError:
+            raise DeploymentNotFound(deployment_id)
+
+    def _fetch_deployments(self):
+        """Returns all in-progress deployments as a dict keyed by deployment ID.
+
+        Marathon has no endpoint to fetch a single deployment, so the full list
+        is fetched and indexed. The result is reused for up to
+        ``deployments_max_age`` seconds so that concurrent waiters sharing this
+        client don't each download the list, and once stale it's revalidated
+        with a conditional request if Marathon provided an ``ETag``.
+        """
+        with self._deployments_lock:
+            if self._deployments_are_fresh():
+                return self._deployments
+
+            headers = {}
+            if self._deployments_etag is not None:
+                headers["If-None-Match"] = self._deployments_etag
+            response = self._make_request('GET', "/v2/deployments", headers=headers)
+
+            if response.status_code == 200:
+                self._deployments = dict((d['id'], d) for d in response.json())
+                self._deployments_etag = response.headers.get("ETag")
+            elif response.status_code != 304:
+                raise ClientError("Unknown Marathon error: %s\n\n%s" % (response.status_code, response.text))
+
+            self._deployments_fetched_at = time.time()
+            return self._deployments
+
+    def _deployments_are_fresh(self):
+        if self._deployments_fetched_at is None:
+            return False
+        return time.time() - self._deployments_fetched_at < self._deployments_max_age
+
+    def _invalidate_deployments(self):
+        """Discard the cached deployments snapshot.
+
+        Called after any request that may start a new deployment, otherwise a
+        snapshot taken beforehand would report the new deployment as finished.
+        """
+        with self._deployments_lock:
+            self._deployments = {}
+            self._deployments_etag = None
+            self._deployments_fetched_at = None
+
+    def stream_events(self, event_types=None, read_timeout=None):
+        """Subscribe to Marathon's event stream and return an ``EventStream``
+        which yields events as they arrive.
+
+        ``event_types`` can be used to limit the events sent by Marathon to
+        those of interest. If no data is received for ``read_timeout`` seconds
+        iteration over the returned stream will stop.
+
+        Raises ``EventStreamUnavailable`` if the stream cannot be opened, e.g.
+        when Marathon's HTTP event subscriber is disabled.
+        """
+        path = "/v2/events"
+        params = {"event_type": event_types} if event_types else {}
+        headers = {"Accept": "text/event-stream"}
+        try:
+            response = self._make_request('GET', path, params=params, headers=headers,
+                                          stream=True, timeout=read_timeout)
+        except requests.RequestException as e:
+            raise EventStreamUnavailable("Unable to connect to Marathon event stream: %s" % e)
 
         if response.status_code == 200:
-            for deployment in response.json():
-                if deployment['id'] == deployment_id:
-                    return deployment
-            raise DeploymentNotFound(deployment_id)
+            return EventStream(response)
 
-        raise ClientError("Unknown Marathon error: %s\n\n%s" % (response.status_code, response.text))
+        response.close()
+        raise EventStreamUnavailable("Unable to connect to Marathon event stream: %s" % response.status_code)
+
+
+def label_selector(key, value=None):
+    """Build a Marathon label selector matching applications with the given
+    label, or with the given label set to ``value`` if one is provided.
+
+    Characters which have a special meaning in selectors are escaped.
+    """
+    if value is None:
+        return _escape_label_selector(key)
+    return "{0}=={1}".format(_escape_label_selector(key), _escape_label_selector(value))
+
+
+def embeds_for_fields(fields):
+    """Returns the list of resources which need to be embedded in Marathon's
+    app responses to include the given (possibly nested, dot-separated)
+    fields, or ``None`` (i.e. embed everything) if no fields are given.
+    """
+    if fields is None:
+        return None
+    embeds = set(EMBEDDED_FIELDS.get(f.split(".")[0]) for f in fields)
+    return [e for e in EMBEDS if e in embeds]
+
+
+def _escape_label_selector(s):
+    return re.sub(r'([^\w.-])', r'\\\1', s)
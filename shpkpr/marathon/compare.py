@@ -0,0 +1,148 @@
+"""Comparison of application definitions against the live state of deployed
+applications in Marathon.
+"""
+
+
+# application fields which are updated by Marathon as the application runs,
+# and so are never considered when comparing application definitions.
+MARATHON_MANAGED_FIELDS = frozenset([
+    "deployments",
+    "lastTaskFailure",
+    "readinessCheckResults",
+    "taskStats",
+    "tasks",
+    "tasksHealthy",
+    "tasksRunning",
+    "tasksStaged",
+    "tasksUnhealthy",
+    "version",
+    "versionInfo",
+])
+
+# values Marathon gives to fields which aren't set when an application is
+# deployed, keyed by the field's path within the application (list indices
+# are omitted e.g. ``healthChecks.path``). Fields missing from an application
+# definition are only considered to have changed if Marathon has anything
+# other than these (or an empty value) for them.
+MARATHON_DEFAULTS = {
+    "backoffFactor": 1.15,
+    "backoffSeconds": 1,
+    "container.docker.portMappings.protocol": "tcp",
+    "container.type": "DOCKER",
+    "cpus": 1,
+    "healthChecks.delaySeconds": 15,
+    "healthChecks.gracePeriodSeconds": 300,
+    "healthChecks.intervalSeconds": 60,
+    "healthChecks.maxConsecutiveFailures": 3,
+    "healthChecks.path": "/",
+    "healthChecks.protocol": "HTTP",
+    "healthChecks.timeoutSeconds": 20,
+    "instances": 1,
+    "killSelection": "YOUNGEST_FIRST",
+    "maxLaunchDelaySeconds": 3600,
+    "mem": 128,
+    "unreachableStrategy.expungeAfterSeconds": 600,
+    "unreachableStrategy.inactiveAfterSeconds": 300,
+    "upgradeStrategy.maximumOverCapacity": 1,
+    "upgradeStrategy.minimumHealthCapacity": 1,
+}
+
+# top-level fields whose value is entirely owned by the app definition, so
+# anything present on Marathon but missing from the definition is a change
+# (e.g. a removed environment variable), even if it looks like a default.
+EXACT_FIELDS = frozenset([
+    "args",
+    "constraints",
+    "env",
+    "labels",
+    "secrets",
+    "uris",
+])
+
+# fields for which a value of zero asks Marathon to assign a port, so any
+# assigned port on Marathon is a match.
+PORT_FIELDS = frozenset([
+    "port",
+    "ports",
+    "servicePort",
+])
+
+# fields which Marathon assigns values to if they aren't set, so they're never
+# considered to have changed when missing from an application definition.
+ASSIGNED_FIELDS = PORT_FIELDS | frozenset(["portDefinitions"])
+
+
+def has_changed(live_app, app_definition):
+    """Returns True if deploying ``app_definition`` would change the
+    application currently deployed as ``live_app``.
+
+    Marathon fills in defaults for any fields not set when an application is
+    deployed, so fields missing from ``app_definition`` are only a change if
+    Marathon has a value other than its default for them.
+    """
+    if _normalise_id(app_definition.get("id", "")) != _normalise_id(live_app.get("id", "")):
+        return True
+
+    live_app = dict((k, v) for k, v in live_app.items() if k not in MARATHON_MANAGED_FIELDS)
+    return not _dicts_match(app_definition, live_app, ignore=["id"])
+
+
+def _matches(expected, actual, path):
+    """Recursively check that ``actual`` matches ``expected``, ignoring any
+    dict keys in ``actual`` which aren't in ``expected`` if they have their
+    default values.
+    """
+    if _field(path) in PORT_FIELDS:
+        return _ports_match(expected, actual)
+    if path in EXACT_FIELDS:
+        return expected == actual
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and _dicts_match(expected, actual, path)
+    if isinstance(expected, list):
+        if not isinstance(actual, list) or len(expected) != len(actual):
+            return False
+        return all(_matches(e, a, path) for e, a in zip(expected, actual))
+    return expected == actual
+
+
+def _dicts_match(expected, actual, path="", ignore=()):
+    for key, value in expected.items():
+        if key in ignore:
+            continue
+        if key not in actual or not _matches(value, actual[key], _join(path, key)):
+            return False
+    removed = [(k, v) for k, v in actual.items() if k not in expected and k not in ignore]
+    return all(_is_default(_join(path, k), v) for k, v in removed)
+
+
+def _is_default(path, value):
+    """Returns True if ``value`` is what Marathon would use for the field at
+    ``path`` if it wasn't set when the application was deployed.
+    """
+    if _field(path) in ASSIGNED_FIELDS:
+        return True
+    if path in MARATHON_DEFAULTS:
+        return value == MARATHON_DEFAULTS[path]
+    if isinstance(value, dict):
+        return all(_is_default(_join(path, k), v) for k, v in value.items())
+    return value in (None, False, 0, "", [], {})
+
+
+def _ports_match(expected, actual):
+    if isinstance(expected, list):
+        if not isinstance(actual, list) or len(expected) != len(actual):
+            return False
+        return all(_ports_match(e, a) for e, a in zip(expected, actual))
+    return expected == 0 or expected == actual
+
+
+def _join(path, key):
+    return path + "." + key if path else key
+
+
+def _field(path):
+    return path.rsplit(".", 1)[-1]
+
+
+def _normalise_id(app_id):
+    return "/" + app_id.strip("/")
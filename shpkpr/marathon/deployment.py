@@ -1,9 +1,15 @@
 # stdlib imports
-import datetime
+import logging
 import time
 
 # local imports
+from . import events
 from shpkpr import exceptions
+from shpkpr import metrics
+from shpkpr.polling import PollSchedule
+
+
+logger = logging.getLogger(__name__)
 
 
 class DeploymentFailed(exceptions.ShpkprException):
@@ -21,6 +27,10 @@ class MarathonDeployment(object):
     deployment.
     """
 
+    # schedule used when polling Marathon for the deployment's status, unless
+    # an explicit interval is requested by the caller.
+    DEFAULT_POLL_SCHEDULE = PollSchedule(initial_interval=0.5, multiplier=2, max_interval=10)
+
     def __init__(self, client, deployment_id):
         self._client = client
         self.deployment_id = deployment_id
@@ -31,6 +41,7 @@ class MarathonDeployment(object):
         This method returns a True when a deployment is complete, False when a
         deployment is in progress.
         """
+        metrics.MARATHON_DEPLOYMENT_CHECKS.inc()
         try:
             self._client.get_deployment(self.deployment_id)
         except DeploymentNotFound:
@@ -41,7 +52,7 @@ class MarathonDeployment(object):
 
         return False
 
-    def wait(self, timeout=900, check_interval_secs=5):
+    def wait(self, timeout=900, check_interval_secs=None):
         """Waits for a deployment to finish
 
         If a deployment completes successfully, True is returned, if it fails
@@ -49,21 +60,129 @@ class MarathonDeployment(object):
         deployment does not complete within ``timeout`` seconds, a
         DeploymentFailed exception is raised.
 
-        ``check_interval_secs`` is used to determine the delay between
-        subsequent checks. The default of 5 seconds is adequate for normal
-        use.
+        If the client was configured to use Marathon's event stream then the
+        wait resolves as soon as Marathon reports the deployment's outcome,
+        otherwise Marathon is polled according to ``DEFAULT_POLL_SCHEDULE``
+        (or every ``check_interval_secs`` seconds if given).
         """
-        _started = datetime.datetime.utcnow()
-
-        while True:
+        with metrics.MARATHON_DEPLOYMENT_WAIT_DURATION.time(result="error") as labels:
+            try:
+                if getattr(self._client, "event_stream", False):
+                    result = self.wait_for_events(timeout=timeout, check_interval_secs=check_interval_secs)
+                else:
+                    result = self.wait_by_polling(timeout=timeout, check_interval_secs=check_interval_secs)
+            except DeploymentFailed:
+                labels["result"] = "failed"
+                raise
+            else:
+                labels["result"] = "success"
+            finally:
+                metrics.MARATHON_DEPLOYMENT_WAITS.inc(**labels)
+        return result
+
+    def wait_by_polling(self, timeout=900, check_interval_secs=None, schedule=None):
+        """Waits for a deployment to finish by repeatedly checking its status.
+
+        ``schedule`` is the ``PollSchedule`` used to determine the delay between
+        subsequent checks, if ``check_interval_secs`` is given a constant
+        interval is used instead. Polls start quickly and back off so that
+        short deployments are noticed almost immediately, while long ones
+        don't make needless requests to Marathon.
+        """
+        schedule = self._poll_schedule(check_interval_secs, schedule)
 
-            time.sleep(check_interval_secs)
+        deadline = time.time() + timeout
+        for delay in schedule.delays(deadline):
+            time.sleep(delay)
 
             # check if the deployment has completed, if it has we return True
             if self.check():
                 return True
 
-            # if the specified timeout has elapsed we raise a DeploymentFailed error
-            delta = datetime.datetime.utcnow() - _started
-            if delta.total_seconds() > timeout:
+        # if the specified timeout has elapsed we raise a DeploymentFailed error
+        raise DeploymentFailed('Timed out: %d seconds' % timeout)
+
+    def wait_for_events(self, timeout=900, check_interval_secs=None, stream_read_timeout=30):
+        """Waits for a deployment to finish by listening to Marathon's event
+        stream.
+
+        Returns as soon as a ``deployment_success`` event is received for this
+        deployment and raises DeploymentFailed on ``deployment_failed``. If
+        nothing is heard for ``stream_read_timeout`` seconds the deployment's
+        status is checked directly (in case an event was missed) before
+        subscribing again.
+
+        If the stream is closed before ``stream_read_timeout`` has elapsed
+        (e.g. by a proxy which drops idle connections), subscriptions are
+        retried according to ``DEFAULT_POLL_SCHEDULE`` (or every
+        ``check_interval_secs`` seconds) rather than immediately.
+
+        If the event stream is unavailable this falls back to polling (see
+        ``wait_by_polling``) for the remainder of ``timeout``.
+        """
+        deadline = time.time() + timeout
+        schedule = self._poll_schedule(check_interval_secs)
+        retry_delays = None
+
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
                 raise DeploymentFailed('Timed out: %d seconds' % timeout)
+
+            read_timeout = min(remaining, stream_read_timeout)
+            try:
+                stream = self._client.stream_events(events.DEPLOYMENT_EVENTS, read_timeout=read_timeout)
+            except events.EventStreamUnavailable as e:
+                logger.info("{0}, falling back to polling".format(e.message))
+                return self.wait_by_polling(timeout=remaining, check_interval_secs=check_interval_secs)
+
+            subscribed_at = time.time()
+            if self._wait_on_stream(stream):
+                return True
+
+            # a stream which stayed open until the read timeout is healthy, so
+            # we can resubscribe straight away, otherwise back off so that we
+            # don't hammer Marathon with subscriptions which are closed early.
+            if time.time() - subscribed_at >= read_timeout:
+                retry_delays = None
+            else:
+                retry_delays = retry_delays or schedule.delays(deadline)
+                self._backoff(retry_delays, timeout)
+
+    def _poll_schedule(self, check_interval_secs=None, schedule=None):
+        if check_interval_secs is not None:
+            return PollSchedule.constant(check_interval_secs)
+        return schedule or self.DEFAULT_POLL_SCHEDULE
+
+    def _wait_on_stream(self, stream):
+        """Wait for this deployment to complete using an open event stream,
+        returning True if it does or False if the stream ends first.
+        """
+        try:
+            # the deployment may have finished before we subscribed (or whilst
+            # we were resubscribing), in which case we'll never see an event
+            # for it.
+            return self.check() or self._consume_events(stream)
+        finally:
+            stream.close()
+
+    def _backoff(self, delays, timeout):
+        delay = next(delays, None)
+        if delay is None:
+            raise DeploymentFailed('Timed out: %d seconds' % timeout)
+        time.sleep(delay)
+
+    def _consume_events(self, stream):
+        """Read events from ``stream`` until this deployment completes (returns
+        True) or the stream ends (returns False).
+        """
+        for event_type, event in stream:
+            if events.deployment_id_for_event(event) != self.deployment_id:
+                continue
+            if event_type == events.DEPLOYMENT_SUCCESS:
+                return True
+            if event_type == events.DEPLOYMENT_FAILED:
+                raise DeploymentFailed('Marathon reported deployment failure: %s' % self.deployment_id)
+            if event_type == events.DEPLOYMENT_STEP_SUCCESS:
+                logger.info("Marathon deployment step complete: {0}".format(self.deployment_id))
+        return False
@@ -0,0 +1,104 @@
+"""Helpers for consuming Marathon's server-sent event stream (``/v2/events``)
+"""
+# stdlib imports
+import codecs
+import json
+
+# third-party imports
+import requests
+
+# local imports
+from shpkpr import exceptions
+
+
+DEPLOYMENT_SUCCESS = "deployment_success"
+DEPLOYMENT_FAILED = "deployment_failed"
+DEPLOYMENT_STEP_SUCCESS = "deployment_step_success"
+
+DEPLOYMENT_EVENTS = [
+    DEPLOYMENT_SUCCESS,
+    DEPLOYMENT_FAILED,
+    DEPLOYMENT_STEP_SUCCESS,
+]
+
+
+class EventStreamUnavailable(exceptions.ShpkprException):
+    pass
+
+
+class EventStream(object):
+    """An open subscription to Marathon's event stream.
+
+    Iterating over an ``EventStream`` yields ``(event_type, payload)`` tuples
+    as events arrive. Iteration stops when the server closes the connection or
+    no data is received within the read timeout the stream was opened with,
+    callers that need to keep listening should check for any missed state and
+    subscribe again.
+    """
+
+    def __init__(self, response):
+        self._response = response
+
+    def __iter__(self):
+        return parse_events(self._lines())
+
+    def close(self):
+        self._response.close()
+
+    def _lines(self):
+        # events are small and need to be acted upon as soon as they arrive,
+        # so we handle each chunk as it's received (Marathon sends the stream
+        # with chunked transfer encoding) rather than waiting for a fixed
+        # amount of data to fill up.
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buffered = ""
+        try:
+            for chunk in self._response.iter_content(chunk_size=None):
+                lines = (buffered + decoder.decode(chunk)).split("\n")
+                buffered = lines.pop()
+                for line in lines:
+                    yield line.rstrip("\r")
+        except requests.RequestException:
+            return
+
+
+def parse_events(lines):
+    """Parse an iterable of lines in ``text/event-stream`` format, yielding an
+    ``(event_type, payload)`` tuple for each complete event.
+
+    Marathon sends a JSON-encoded payload with each event, events without a
+    payload (e.g. keep-alive comments) are skipped.
+    """
+    event_type, data = None, []
+    for line in lines:
+        if not line:
+            if data:
+                yield event_type or "message", json.loads("\n".join(data))
+            event_type, data = None, []
+            continue
+        if line.startswith(":"):
+            continue
+
+        field, value = _parse_field(line)
+        if field == "event":
+            event_type = value
+        elif field == "data":
+            data.append(value)
+
+
+def _parse_field(line):
+    field, _, value = line.partition(":")
+    if value.startswith(" "):
+        value = value[1:]
+    return field, value
+
+
+def deployment_id_for_event(event):
+    """Return the ID of the deployment that a deployment event relates to.
+
+    ``deployment_success`` and ``deployment_failed`` events carry the ID at the
+    top level, whereas ``deployment_step_success`` events only include it as
+    part of the embedded deployment plan.
+    """
+    plan = event.get("plan") or {}
+    return event.get("id") or plan.get("id")
@@ -0,0 +1,83 @@
+"""Incremental parsing of large JSON responses from Marathon.
+"""
+# stdlib imports
+import codecs
+import json
+import re
+
+
+_WHITESPACE = re.compile(r"[\s,]*")
+
+
+class TruncatedResponse(ValueError):
+    pass
+
+
+def iter_json_array(chunks, key):
+    """Yields each element of the array stored under ``key`` in a JSON object,
+    parsing the object from an iterable of byte ``chunks`` as they arrive.
+
+    Only the element currently being parsed is held in memory, rather than
+    the whole document. Elements must be JSON objects, and ``key`` must be the
+    first key in the document (as it is in Marathon's responses).
+    """
+    decoder = json.JSONDecoder()
+    chunks = _iter_decoded(chunks)
+    buf = _find_array_start(chunks, key)
+
+    pos = 0
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if buf[pos:pos + 1] == "]":
+            return
+        decoded = _decode_element(decoder, buf, pos)
+        if decoded is None:
+            # the element is incomplete, so read more of the response and retry
+            message = "Response ended before the end of the array: {0}".format(key)
+            buf, pos = buf[pos:] + _read_more(chunks, message), 0
+            continue
+        element, end = decoded
+        yield element
+        buf, pos = buf[end:], 0
+
+
+def _find_array_start(chunks, key):
+    """Read from ``chunks`` until the start of the array stored under ``key``
+    is found, returning whatever was read after it.
+    """
+    start = re.compile(r'\s*\{\s*"%s"\s*:\s*\[' % re.escape(key))
+    buf = ""
+    while True:
+        match = start.match(buf)
+        if match is not None:
+            return buf[match.end():]
+        buf += _read_more(chunks, "Unable to find array in response: {0}".format(key))
+
+
+def _decode_element(decoder, buf, pos):
+    """Returns the element starting at ``pos`` and the position after it, or
+    ``None`` if the element is incomplete.
+    """
+    if pos >= len(buf):
+        return None
+    try:
+        return decoder.raw_decode(buf, pos)
+    except ValueError:
+        return None
+
+
+def _read_more(chunks, message):
+    chunk = next(chunks, None)
+    if chunk is None:
+        raise TruncatedResponse(message)
+    return chunk
+
+
+def _iter_decoded(chunks):
+    """Decode UTF-8 byte chunks, handling characters split across chunks.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
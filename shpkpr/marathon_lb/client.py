@@ -1,25 +1,52 @@
+# stdlib imports
+import functools
+
 # third-party imports
 import requests
-from cached_property import cached_property
+from cached_property import threaded_cached_property
+from cached_property import threaded_cached_property_with_ttl
+from six.moves.urllib.parse import quote
 
 # local imports
 from . import resolver
 from . import stats
+from shpkpr import metrics
+from shpkpr import session
+from shpkpr.concurrency import map_concurrently
+
+
+# number of seconds for which the resolved addresses of Marathon-LB instances
+# are reused before resolving them again.
+RESOLVE_TTL = 60
 
 
 class MarathonLBClient(object):
     """A high-level client used to interact with a set of load-balanced
     Marathon-LB instances.
+
+    Requests to individual instances are made concurrently (up to
+    ``max_concurrency`` at a time) over a shared pool of keep-alive
+    connections, and each one is limited to ``timeout`` seconds.
     """
 
-    def __init__(self, url):
+    def __init__(self, url, timeout=10, max_concurrency=16):
         self.url = url
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
 
-    @cached_property
+    @threaded_cached_property
+    def _session(self):
+        return session.pooled_session(pool_size=self.max_concurrency)
+
+    @threaded_cached_property_with_ttl(ttl=RESOLVE_TTL)
     def urls(self):
         """Resolves the provided URL using DNS and returns a list of URLs that
         can be used to contact each individual Marathon-LB instance in a
         load-balanced set.
+
+        The URL is resolved again after ``RESOLVE_TTL`` seconds so that a
+        long-running process (e.g. ``shpkpr serve``) sees instances which are
+        added to or removed from the set.
         """
         return resolver.resolve(self.url)
 
@@ -41,38 +68,72 @@ class MarathonLBClient(object):
                 return True
         return False
 
-    def fetch_stats(self):
+    def fetch_stats(self, pxname=None):
         """Returns an iterable containing aggregated statistics from all
         configured Marathon-LB instances.
 
+        If ``pxname`` is given, only statistics for the named HAProxy proxy
+        (backend) are returned. HAProxy is asked to scope its output to the
+        proxy, which greatly reduces the size of each response on instances
+        serving many applications.
+
         See https://cbonte.github.io/haproxy-dconv/1.7/management.html#9.1 for a
         detailed breakdown of exactly what is available in the returned CSV and
         what the values in each column mean.
         """
-        instance_stats = []
-        for url in self.urls:
-            instance_stats.append(self._fetch_instance_stats(url))
-        return stats.Stats(*instance_stats)
+        fetch = functools.partial(self._fetch_instance_stats, pxname=pxname)
+        instance_stats = self._map_instances(fetch)
+        return stats.Stats(*instance_stats, pxname=pxname)
 
     def _fetch_pids(self):
         """Fetch active PIDs from all Marathon-LB instances.
         """
-        pids = {}
-        for url in self.urls:
-            pids[url] = self._fetch_instance_pids(url)
-        return pids
+        pids = self._map_instances(self._fetch_instance_pids)
+        return dict(zip(self.urls, pids))
+
+    def _map_instances(self, func):
+        """Call ``func(url)`` for every Marathon-LB instance concurrently,
+        returning the results in the same order as ``urls``.
+
+        The total time taken is that of the slowest instance rather than the
+        sum across all instances. If any call raises, the exception is
+        propagated to the caller.
+        """
+        return map_concurrently(func, self.urls, self.max_concurrency)
 
     def _fetch_instance_pids(self, url):
         """Fetch a list of active PIDs from a single Marathon-LB instance.
         """
-        response = requests.get(url + "/_haproxy_getpids")
+        response = self._get(url + "/_haproxy_getpids", "pids")
         if not response.status_code == requests.codes.ok:
             return []
         return response.text.split()
 
-    def _fetch_instance_stats(self, url):
+    def _fetch_instance_stats(self, url, pxname=None):
         """Fetch statistics from a single Marathon-LB instance in CSV format.
+
+        HAProxy's ``scope`` matches any proxy whose name contains the given
+        string (and truncates long names) so callers must still filter the
+        returned rows by exact name. The name is quoted so that it can't add
+        parameters of its own to the request.
         """
-        response = requests.get(url + "/haproxy?stats;csv")
+        path = "/haproxy?stats;csv"
+        if pxname is not None:
+            path += ";scope=" + quote(pxname, safe="")
+        response = self._get(url + path, "stats")
         response.raise_for_status()
+        metrics.MARATHON_LB_STATS_BYTES.inc(len(response.content))
         return response.text
+
+    def _get(self, url, resource):
+        """Make a GET request to a single Marathon-LB instance, recording
+        metrics about the request under the given ``resource`` name.
+        """
+        status = "error"
+        try:
+            with metrics.MARATHON_LB_REQUEST_DURATION.time(resource=resource):
+                response = self._session.get(url, timeout=self.timeout)
+            status = response.status_code
+            return response
+        finally:
+            metrics.MARATHON_LB_REQUESTS.inc(resource=resource, status=status)
@@ -3,13 +3,26 @@ import csv
 from collections import namedtuple
 
 # third-party imports
+import six
 from cached_property import cached_property
 
 
+# HAProxy's stats CSV contains ~80 columns, we only extract those that are
+# actually used when inspecting the state of an application's listeners.
+COLUMNS = ("pxname", "svname", "qcur", "scur", "status")
+
+Row = namedtuple('Row', COLUMNS)
+
+
 class Stats(object):
+    """Aggregated HAProxy statistics from one or more Marathon-LB instances.
+
+    If ``pxname`` is given, only rows belonging to that proxy are kept.
+    """
 
-    def __init__(self, *instance_stats):
+    def __init__(self, *instance_stats, **kwargs):
         self._raw_stats = instance_stats
+        self._pxname = kwargs.pop("pxname", None)
 
     def __iter__(self):
         return (r for r in self._stats)
@@ -31,10 +44,26 @@ class Stats(object):
 
     def _parse_instance_stats(self, instance_stats):
         """Parse a single HAProxy stats CSV file.
+
+        Lines are read one at a time and those for other proxies are discarded
+        before being parsed as CSV, and only the fields in ``COLUMNS`` are
+        kept for the remaining rows.
         """
-        rows = instance_stats.splitlines()
-        headers = rows[0].lstrip('# ').rstrip(',\n').split(',')
-        csv_reader = csv.reader(rows[1:], quotechar="'")
+        lines = six.StringIO(instance_stats)
+        headers = next(lines).lstrip('# ').rstrip(',\n').split(',')
+        indexes = [headers.index(column) for column in COLUMNS]
+
+        csv_reader = csv.reader(self._filter_lines(lines), quotechar="'")
+        return [Row(*[row[i] for i in indexes]) for row in csv_reader]
 
-        Row = namedtuple('Row', headers)
-        return [Row(*row[0:-1]) for row in csv_reader if row[0][0] != '#']
+    def _filter_lines(self, lines):
+        """Skip comments, blank lines and (if filtering by proxy) lines for
+        other proxies.
+        """
+        prefix = None if self._pxname is None else self._pxname + ","
+        for line in lines:
+            if not line.strip() or line.startswith('#'):
+                continue
+            if prefix is not None and not line.startswith(prefix):
+                continue
+            yield line
@@ -0,0 +1,356 @@
+"""Metrics describing shpkpr's use of remote services, in a form which can be
+collected by Prometheus.
+
+Metrics are recorded in a process-wide registry and exported in Prometheus'
+text exposition format. shpkpr usually runs as a short-lived process (e.g. in
+a CI job) which can't be scraped, so the metrics can instead be written to a
+file for node_exporter's textfile collector, or pushed to a Pushgateway, when
+a command finishes. ``shpkpr serve`` exposes them at ``GET /metrics``.
+"""
+# stdlib imports
+import bisect
+import contextlib
+import logging
+import math
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# third-party imports
+from six.moves.urllib.parse import quote
+
+
+logger = logging.getLogger(__name__)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# upper bounds (in seconds) of the buckets used by histograms unless others
+# are given. These cover everything from a single API call to a long wait for
+# a deployment to complete.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class _Metric(object):
+    """Base class for metrics, which hold a value for each combination of
+    label values they're recorded with.
+
+    ``initial_value`` is called to create the value for each new combination
+    of label values.
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames, initial_value):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._initial_value = initial_value
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+            # metrics without labels are always reported, even before they're
+            # first recorded.
+            if not self.labelnames:
+                self._values[()] = self._initial_value()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError("Incorrect labels for {0}: {1}".format(self.name, sorted(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, **extra):
+        labels = OrderedDict(zip(self.labelnames, key))
+        labels.update(extra)
+        return labels
+
+    def _items(self):
+        with self._lock:
+            return sorted((key, self._copy(value)) for key, value in self._values.items())
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(_Metric):
+    """A count of events which only ever increases e.g. requests made.
+    """
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super(Counter, self).__init__(name, documentation, labelnames, initial_value=int)
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only be increased: {0}".format(self.name))
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in self._items():
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    """The distribution of observed values (e.g. request latencies) across a
+    set of buckets, along with their count and sum.
+    """
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        # the +Inf bucket is always present, so needn't be given
+        self.buckets = tuple(sorted(b for b in buckets if b != float("inf")))
+        super(Histogram, self).__init__(name, documentation, labelnames, initial_value=self._empty_state)
+
+    def _empty_state(self):
+        # the number of observations falling in each bucket (but not the
+        # smaller ones), then their total count and sum.
+        return [[0] * len(self.buckets), 0, 0]
+
+    def _copy(self, value):
+        return [list(value[0]), value[1], value[2]]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._initial_value()
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the time taken by the enclosed block, in seconds.
+
+        The labels dict is yielded so that the block can change label values
+        which depend on its outcome. The time is observed whether or not the
+        block raises.
+        """
+        start = time.time()
+        try:
+            yield labels
+        finally:
+            self.observe(time.time() - start, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[1] if state is not None else 0
+
+    def samples(self):
+        for key, (bucket_counts, count, total) in self._items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket", self._labels(key, le=_format_value(float(bound))), cumulative
+            yield self.name + "_bucket", self._labels(key, le="+Inf"), count
+            yield self.name + "_sum", self._labels(key), total
+            yield self.name + "_count", self._labels(key), count
+
+
+class Registry(object):
+    """A collection of metrics which are exported together.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = OrderedDict()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError("Metric already registered: {0}".format(metric.name))
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self):
+        """Discard all recorded values.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def exposition(self):
+        """Returns all metrics in Prometheus' text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append("# HELP {0} {1}".format(metric.name, _escape(metric.documentation)))
+            lines.append("# TYPE {0} {1}".format(metric.name, metric.type))
+            for name, labels, value in metric.samples():
+                lines.append("{0}{1} {2}".format(name, _format_labels(labels), _format_value(value)))
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Write all metrics to ``path``, in the format read by node_exporter's
+        textfile collector.
+
+        The file is replaced atomically so that the collector never reads a
+        partially written file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".shpkpr-metrics-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.exposition())
+            os.chmod(tmp_path, 0o644)
+            os.rename(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def push(self, gateway_url, job, grouping=None, timeout=10):
+        """Push all metrics to the Prometheus Pushgateway at ``gateway_url``,
+        replacing any previously pushed under the same ``job`` and
+        ``grouping`` labels.
+        """
+        import requests
+
+        url = gateway_url.rstrip("/") + "/metrics/job/" + quote(job, safe="")
+        for name, value in sorted((grouping or {}).items()):
+            url += "/{0}/{1}".format(quote(name, safe=""), quote(value, safe=""))
+        response = requests.put(url, data=self.exposition().encode("utf-8"),
+                                headers={"Content-Type": CONTENT_TYPE}, timeout=timeout)
+        response.raise_for_status()
+
+
+def _escape(s, quotes=False):
+    s = s.replace("\\", "\\\\").replace("\n", "\\n")
+    if quotes:
+        s = s.replace('"', '\\"')
+    return s
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ['{0}="{1}"'.format(name, _escape(value, quotes=True)) for name, value in labels.items()]
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    """Format a sample value (or bucket bound) as per the exposition format,
+    which uses Go's float syntax.
+
+    Bucket bounds are always formatted as floats (e.g. ``1.0``) so that each
+    bucket's ``le`` label is the same as that used by other clients.
+    """
+    if not isinstance(value, float):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return "{0:.1f}".format(value)
+    return repr(value)
+
+
+REGISTRY = Registry()
+
+MARATHON_REQUESTS = REGISTRY.counter(
+    "shpkpr_marathon_requests_total",
+    "Requests made to the Marathon API, by response status.",
+    ["method", "endpoint", "status"],
+)
+MARATHON_REQUEST_DURATION = REGISTRY.histogram(
+    "shpkpr_marathon_request_duration_seconds",
+    "Time taken for the Marathon API to respond to requests.",
+    ["method", "endpoint"],
+)
+MARATHON_LB_REQUESTS = REGISTRY.counter(
+    "shpkpr_marathon_lb_requests_total",
+    "Requests made to Marathon-LB instances, by response status.",
+    ["resource", "status"],
+)
+MARATHON_LB_REQUEST_DURATION = REGISTRY.histogram(
+    "shpkpr_marathon_lb_request_duration_seconds",
+    "Time taken for Marathon-LB instances to respond to requests.",
+    ["resource"],
+)
+MARATHON_LB_STATS_BYTES = REGISTRY.counter(
+    "shpkpr_marathon_lb_stats_bytes_total",
+    "Bytes of HAProxy stats CSV fetched from Marathon-LB instances.",
+)
+MARATHON_DEPLOYMENT_CHECKS = REGISTRY.counter(
+    "shpkpr_marathon_deployment_checks_total",
+    "Times Marathon was checked for the status of a deployment.",
+)
+MARATHON_DEPLOYMENT_WAITS = REGISTRY.counter(
+    "shpkpr_marathon_deployment_waits_total",
+    "Waits for Marathon deployments to complete, by outcome.",
+    ["result"],
+)
+MARATHON_DEPLOYMENT_WAIT_DURATION = REGISTRY.histogram(
+    "shpkpr_marathon_deployment_wait_duration_seconds",
+    "Time spent waiting for Marathon deployments to complete.",
+    ["result"],
+)
+SWAP_CHECKS = REGISTRY.counter(
+    "shpkpr_swap_checks_total",
+    "Checks of whether traffic has cut over to a new application, by result.",
+    ["result"],
+)
+SWAP_CHECK_DURATION = REGISTRY.histogram(
+    "shpkpr_swap_check_duration_seconds",
+    "Time taken to check whether traffic has cut over to a new application.",
+)
+SWAP_DURATION = REGISTRY.histogram(
+    "shpkpr_swap_duration_seconds",
+    "Time taken for traffic to cut over to a new application, by outcome.",
+    ["result"],
+)
+
+
+def endpoint(path):
+    """Returns the API endpoint (e.g. ``/v2/apps``) a request path belongs to,
+    so that requests can be labelled without a label value per resource.
+    """
+    return "/".join(path.split("?", 1)[0].split("/")[:3])
+
+
+def export(textfile=None, pushgateway=None, job="shpkpr", registry=REGISTRY):
+    """Write metrics to ``textfile`` and/or push them to the Pushgateway at
+    ``pushgateway``.
+
+    Pushed metrics are grouped by job and hostname, so that shpkpr running on
+    one machine doesn't replace the metrics pushed from another. Failures are
+    logged rather than raised, as failing to export metrics shouldn't fail
+    the command they describe.
+    """
+    if textfile is not None:
+        try:
+            registry.write_textfile(textfile)
+        except (IOError, OSError) as e:
+            logger.warning("Unable to write metrics to {0}: {1}".format(textfile, e))
+
+    if pushgateway is not None:
+        import requests
+
+        try:
+            registry.push(pushgateway, job, grouping={"instance": socket.gethostname()})
+        except requests.RequestException as e:
+            logger.warning("Unable to push metrics to {0}: {1}".format(pushgateway, e))
@@ -0,0 +1,55 @@
+"""Scheduling for code that repeatedly polls a remote service whilst waiting
+for something to happen.
+"""
+# stdlib imports
+import random
+import time
+
+
+class PollSchedule(object):
+    """Determines how long to wait between subsequent polls.
+
+    The first poll happens after ``initial_interval`` seconds with each
+    following interval ``multiplier`` times longer than the last, up to a
+    maximum of ``max_interval`` seconds. Each interval is randomly adjusted by
+    up to ``jitter`` (a fraction of the interval) so that many processes
+    polling the same service don't end up doing so in lockstep.
+
+    This means that short operations are noticed almost immediately, while
+    long operations don't hammer the remote service with requests.
+    """
+
+    def __init__(self, initial_interval=0.5, multiplier=2, max_interval=10, jitter=0.1):
+        self.initial_interval = initial_interval
+        self.multiplier = multiplier
+        self.max_interval = max(initial_interval, max_interval)
+        self.jitter = jitter
+
+    @classmethod
+    def constant(cls, interval):
+        """Returns a schedule which always waits exactly ``interval`` seconds.
+        """
+        return cls(initial_interval=interval, multiplier=1, max_interval=interval, jitter=0)
+
+    def delays(self, deadline=None):
+        """Yields the number of seconds to wait before each subsequent poll.
+
+        If a ``deadline`` (as returned by ``time.time()``) is given, no delay
+        will extend beyond it, ensuring a final poll happens at the deadline,
+        and the generator is exhausted once the deadline has passed.
+        """
+        interval = self.initial_interval
+        while True:
+            delay = self._apply_jitter(interval)
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return
+                delay = min(delay, remaining)
+            yield delay
+            interval = min(interval * self.multiplier, self.max_interval)
+
+    def _apply_jitter(self, interval):
+        if not self.jitter:
+            return interval
+        return max(0, interval * (1 + random.uniform(-self.jitter, self.jitter)))
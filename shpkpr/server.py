@@ -0,0 +1,276 @@
+"""A small HTTP API exposing shpkpr's deployment workflows.
+
+Running shpkpr as a long-lived server means that the work done when shpkpr
+starts up (importing dependencies, building clients, resolving Marathon-LB
+instances) is done once, and that connection pools, compiled templates and
+cached Vault secrets are reused by every request rather than discarded after
+each deployment.
+
+Requests (other than health checks) must carry a shared-secret token, and
+must be addressed to an allowed ``Host`` so that web pages can't reach the API
+through DNS rebinding. POST requests must be sent as ``application/json``,
+which browsers won't send cross-origin without the API's consent.
+"""
+# stdlib imports
+import hmac
+import json
+import logging
+
+# third-party imports
+import click
+import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+# local imports
+from shpkpr import metrics
+from shpkpr.commands.cmd_apps import STRATEGIES
+from shpkpr.commands.cmd_apps import deploy_applications
+from shpkpr.cron import set_jobs
+from shpkpr.deployment.bluegreen.validate import ValidationError
+from shpkpr.template import InvalidJSONError
+from shpkpr.template import MissingTemplateError
+from shpkpr.template import UndefinedError
+from shpkpr.template import load_values_from_environment
+from shpkpr.template import render_json_templates
+
+
+logger = logging.getLogger(__name__)
+
+
+# errors caused by the content of a request rather than by a failure while
+# carrying it out.
+BAD_REQUEST_ERRORS = (
+    click.UsageError,
+    InvalidJSONError,
+    MissingTemplateError,
+    UndefinedError,
+    ValidationError,
+)
+
+
+# host names by which the server may always be addressed, in addition to the
+# one it's bound to.
+LOCAL_HOSTS = frozenset(["localhost", "127.0.0.1", "::1"])
+
+
+class BadRequest(Exception):
+    pass
+
+
+class ShpkprServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded HTTP server holding the clients and configuration shared by
+    all requests.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address, marathon_client, marathon_lb_client=None,
+                 chronos_client=None, vault_client=None, template_path=None,
+                 env_prefix="", timeout=300, token=None, allowed_hosts=()):
+        if not token:
+            raise ValueError("A token is required to authenticate requests")
+        BaseHTTPServer.HTTPServer.__init__(self, server_address, RequestHandler)
+        self.token = token
+        self.allowed_hosts = LOCAL_HOSTS.union(h.lower() for h in [server_address[0]] + list(allowed_hosts))
+        self.marathon_client = marathon_client
+        self.marathon_lb_client = marathon_lb_client
+        self.chronos_client = chronos_client
+        self.vault_client = vault_client
+        self.template_path = template_path
+        self.env_prefix = env_prefix
+        self.timeout = timeout
+
+
+class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Routes requests to the workflow they invoke, responding with JSON.
+
+    Every request except ``GET /health`` must be authenticated with an
+    ``Authorization: Bearer <token>`` header, and POST requests must have a
+    ``Content-Type`` of ``application/json``.
+
+    ``POST /apps/deploy`` and ``POST /cron/set`` accept a JSON object with the
+    template names to render (``templates``) and values to render them with
+    (``values``), which take precedence over values read from the server's
+    environment. ``/apps/deploy`` additionally accepts ``strategy``,
+    ``timeout``, ``parallelism``, ``force`` and ``always_deploy``, as per
+    ``shpkpr apps deploy``.
+
+    ``GET /metrics`` returns metrics in Prometheus' text exposition format, so
+    that a long-lived server can be scraped directly.
+    """
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        logger.info("{0} - {1}".format(self.address_string(), format % args))
+
+    def _health(self, payload):
+        return {"status": "ok"}
+
+    def _metrics(self, payload):
+        return metrics.REGISTRY.exposition()
+
+    def _deploy_apps(self, payload):
+        server = self.server
+        strategy = payload.get("strategy", "standard")
+        if strategy not in STRATEGIES:
+            raise BadRequest("Unknown deployment strategy: {0}".format(strategy))
+
+        template_names = _get_list(payload, "templates") or [STRATEGIES[strategy]["default_template"]]
+        timeout = _get_int(payload, "timeout", server.timeout)
+        parallelism = _get_int(payload, "parallelism", 1)
+        if parallelism < 1:
+            raise BadRequest("parallelism must be at least 1")
+
+        values = self._load_values(payload)
+        app_definitions = _render(server.template_path, template_names, values)
+        deploy_applications(server.marathon_client, server.marathon_lb_client, strategy,
+                            app_definitions, timeout, parallelism, bool(payload.get("force")),
+                            always_deploy=bool(payload.get("always_deploy")))
+        return {"applications": [a["id"] for a in app_definitions]}
+
+    def _set_jobs(self, payload):
+        server = self.server
+        if server.chronos_client is None:
+            raise BadRequest("Chronos is not configured, see --chronos-url")
+
+        template_names = _get_list(payload, "templates") or ["chronos/default/job.json.tmpl"]
+        values = self._load_values(payload)
+        jobs = _render(server.template_path, template_names, values)
+        diff = set_jobs(server.chronos_client, server.vault_client, jobs)
+        return dict((k, [j["name"] for j in v]) for k, v in diff._asdict().items())
+
+    ROUTES = {
+        ("GET", "/health"): _health,
+        ("GET", "/metrics"): _metrics,
+        ("POST", "/apps/deploy"): _deploy_apps,
+        ("POST", "/cron/set"): _set_jobs,
+    }
+
+    # routes which can be requested without a token
+    PUBLIC_ROUTES = frozenset([("GET", "/health")])
+
+    def _dispatch(self, method):
+        route_key = (method, self.path.split("?", 1)[0])
+        route = self.ROUTES.get(route_key)
+        if route is None:
+            self._respond(404, {"error": "Not found: {0} {1}".format(method, self.path)})
+            return
+
+        rejection = self._check_request(route_key)
+        if rejection is not None:
+            self._respond(*rejection)
+            return
+        self._respond(*self._call_route(route))
+
+    def _check_request(self, route_key):
+        """Returns the response that a request for ``route_key`` should be
+        rejected with, or ``None`` if it can be handled.
+        """
+        if not self._host_is_allowed():
+            return 400, {"error": "Invalid Host header"}
+        if route_key not in self.PUBLIC_ROUTES and not self._is_authenticated():
+            return 401, {"error": "A valid token is required"}, {"WWW-Authenticate": "Bearer"}
+        if route_key[0] == "POST" and not self._is_json():
+            return 415, {"error": "Content-Type must be application/json"}
+        return None
+
+    def _call_route(self, route):
+        """Call ``route`` with the request's payload, returning the response
+        (status and body) to send.
+        """
+        try:
+            return 200, route(self, self._read_payload())
+        except BadRequest as e:
+            return 400, {"error": str(e)}
+        except BAD_REQUEST_ERRORS as e:
+            return 400, {"error": e.format_message()}
+        except click.ClickException as e:
+            # exceptions with a zero exit code (e.g. DryRun) aren't failures
+            if getattr(e, "exit_code", 1) == 0:
+                return 200, {"message": e.format_message()}
+            return 500, {"error": e.format_message()}
+        except Exception:
+            logger.exception("Unhandled error processing request: {0} {1}".format(self.command, self.path))
+            return 500, {"error": "Internal server error"}
+
+    def _host_is_allowed(self):
+        host = self.headers.get("Host") or ""
+        if host.startswith("["):
+            # IPv6 address e.g. [::1]:8000
+            host = host[1:].partition("]")[0]
+        else:
+            host = host.partition(":")[0]
+        return host.lower() in self.server.allowed_hosts
+
+    def _is_authenticated(self):
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        if scheme.lower() != "bearer":
+            return False
+        return hmac.compare_digest(token.strip().encode("utf-8"), self.server.token.encode("utf-8"))
+
+    def _is_json(self):
+        content_type = (self.headers.get("Content-Type") or "").partition(";")[0]
+        return content_type.strip().lower() == "application/json"
+
+    def _read_payload(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            raise BadRequest("Request body must be valid JSON")
+        if not isinstance(payload, dict):
+            raise BadRequest("Request body must be a JSON object")
+        return payload
+
+    def _load_values(self, payload):
+        values = payload.get("values") or {}
+        if not isinstance(values, dict):
+            raise BadRequest("values must be a JSON object")
+        return load_values_from_environment(prefix=self.server.env_prefix, overrides=values)
+
+    def _respond(self, status, body, headers=None):
+        # routes return text (i.e. metrics) as-is and anything else as JSON
+        if isinstance(body, six.string_types):
+            content, content_type = body.encode("utf-8"), metrics.CONTENT_TYPE
+        else:
+            content, content_type = json.dumps(body).encode("utf-8"), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def _render(template_path, template_names, values):
+    """Render templates in the request's thread.
+
+    Forking a pool of worker processes from a threaded server risks deadlock
+    in the workers (if another thread holds a lock when the fork happens) and
+    would render with copies of the server's template environments, which are
+    then thrown away rather than kept warm.
+    """
+    return render_json_templates(template_path, template_names, processes=1, **values)
+
+
+def _get_list(payload, key):
+    value = payload.get(key) or []
+    if not isinstance(value, list) or not all(isinstance(v, six.string_types) for v in value):
+        raise BadRequest("{0} must be a list of strings".format(key))
+    return value
+
+
+def _get_int(payload, key, default):
+    value = payload.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, six.integer_types):
+        raise BadRequest("{0} must be an integer".format(key))
+    return value
@@ -0,0 +1,63 @@
+"""Shared HTTP session helpers
+"""
+# third-party imports
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+
+# default number of pooled connections kept alive per host.
+DEFAULT_POOL_SIZE = 10
+
+# default number of times a failed request will be retried before giving up.
+DEFAULT_MAX_RETRIES = 3
+
+# backoff factor applied between retries, the delay before the nth retry is
+# ``backoff_factor * (2 ** (n - 1))`` seconds.
+DEFAULT_BACKOFF_FACTOR = 0.3
+
+# HTTP status codes returned by proxies or an overloaded/leaderless API which
+# indicate that the request may succeed if retried.
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# HTTP methods which are safe to retry. PUT and DELETE are idempotent but
+# Marathon starts a new deployment for each one it receives, so a request
+# which timed out after reaching Marathon mustn't be sent again.
+RETRY_METHODS = frozenset(["GET", "HEAD"])
+
+
+def pooled_session(pool_size=DEFAULT_POOL_SIZE,
+                   max_retries=DEFAULT_MAX_RETRIES,
+                   backoff_factor=DEFAULT_BACKOFF_FACTOR):
+    """Build a ``requests.Session`` which keeps connections alive between
+    requests and retries failed requests with an exponential backoff.
+
+    Retries are only attempted for ``GET`` and ``HEAD`` requests, so requests
+    which change state (e.g. ``PUT`` or ``DELETE``) are never sent twice.
+    """
+    retries = _retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retries,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _retry(**kwargs):
+    # urllib3 1.26 renamed ``method_whitelist`` to ``allowed_methods`` and 2.0
+    # removed the old name, but older versions are still vendored by the
+    # versions of requests we support.
+    try:
+        return Retry(allowed_methods=RETRY_METHODS, **kwargs)
+    except TypeError:
+        return Retry(method_whitelist=RETRY_METHODS, **kwargs)
@@ -1,8 +1,11 @@
 """Templating related utilities
 """
 # stdlib imports
+import functools
 import json
+import multiprocessing
 import os
+import threading
 
 # third-party imports
 import jinja2
@@ -12,6 +15,25 @@ from shpkpr import exceptions
 from shpkpr import template_filters
 
 
+# shpkpr ships with a number of built-in templates for each deployment type,
+# so we need to tell jinja where to look for them
+BUILT_IN_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "templates")
+
+# compiled templates are cached on disk between invocations in this directory,
+# if unset jinja2 picks a user-specific directory under the system's temp dir.
+TEMPLATE_CACHE_DIR_ENVVAR = "SHPKPR_TEMPLATE_CACHE_DIR"
+
+# rendering is CPU-bound, so when rendering many templates at once they're
+# spread across a pool of processes. Below this many templates the cost of
+# starting the pool outweighs any benefit.
+PARALLEL_RENDER_THRESHOLD = 4
+
+# Jinja2 environments (and therefore their compiled templates) are cached
+# per-process, keyed by the user-supplied template path.
+_template_environments = {}
+_template_environments_lock = threading.Lock()
+
+
 class InvalidJSONError(exceptions.ShpkprException):
     """Raised when a template can be rendered successfully but does not parse
     as valid JSON afterwards.
@@ -92,25 +114,74 @@ def render_json_template(template_path, template_name, **values):
     ``values`` should be regular keyword arguments to the function which will
     be passed to the template at render time.
     """
-    # shpkpr ships with a number of built-in templates for each deployment type,
-    # so we need to tell jinja where to look for them
-    here = os.path.dirname(os.path.abspath(__file__))
-    built_in_template_path = os.path.join(here, "resources", "templates")
+    template_env = get_template_environment(template_path)
+    template = template_env.get_template(template_name)
+    rendered_template = template.render(_all_env=values, **values)
+    return json.loads(rendered_template)
+
+
+def render_json_templates(template_path, template_names, processes=None, **values):
+    """Render multiple templates with the same values, returning a list of
+    rendered templates in the same order as ``template_names``.
+
+    When there are enough templates to make it worthwhile they are rendered
+    concurrently by a pool of up to ``processes`` worker processes (one per CPU
+    by default). All templates are rendered before anything is returned, so
+    callers can be sure every template is valid before acting on any of them.
+    Errors are raised as per ``render_json_template``.
+    """
+    render = functools.partial(_render_json_template, template_path, values)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(template_names))
+
+    if processes <= 1 or len(template_names) < PARALLEL_RENDER_THRESHOLD:
+        return [render(template_name) for template_name in template_names]
 
-    # build a new Jinja2 environment so we can inject some custom filters into
-    # the template we're rendering.
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(render, template_names)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _render_json_template(template_path, values, template_name):
+    """Argument-reordered ``render_json_template`` for use with ``functools.partial``
+    (which must be picklable to be sent to a worker process).
+    """
+    return render_json_template(template_path, template_name, **values)
+
+
+def get_template_environment(template_path):
+    """Return a Jinja2 environment that loads templates from ``template_path``
+    and shpkpr's built-in templates, with shpkpr's custom filters installed.
+
+    Environments are cached for the lifetime of the process so that templates
+    are only loaded and compiled once, no matter how many times they're
+    rendered. Compiled templates are also written to a bytecode cache on disk
+    so that subsequent invocations can skip compilation too. Templates that
+    change on disk are reloaded automatically.
+    """
+    template_path = os.path.abspath(template_path)
+    with _template_environments_lock:
+        if template_path not in _template_environments:
+            _template_environments[template_path] = _build_template_environment(template_path)
+        return _template_environments[template_path]
+
+
+def _build_template_environment(template_path):
     template_env = jinja2.Environment(
         undefined=jinja2.StrictUndefined,
         loader=jinja2.FileSystemLoader([
-            built_in_template_path,
+            BUILT_IN_TEMPLATE_PATH,
             template_path,
         ]),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(os.environ.get(TEMPLATE_CACHE_DIR_ENVVAR)),
+        auto_reload=True,
     )
     template_env.filters['filter_items'] = template_filters.filter_items
     template_env.filters['require_int'] = template_filters.require_int
     template_env.filters['require_float'] = template_filters.require_float
     template_env.filters['slugify'] = template_filters.slugify
-
-    template = template_env.get_template(template_name)
-    rendered_template = template.render(_all_env=values, **values)
-    return json.loads(rendered_template)
+    return template_env
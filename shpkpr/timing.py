@@ -0,0 +1,83 @@
+"""Timing of the individual phases of a deployment.
+"""
+# stdlib imports
+import contextlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections import namedtuple
+
+
+logger = logging.getLogger(__name__)
+
+
+Span = namedtuple('Span', ['name', 'start', 'duration', 'attributes'])
+
+
+class Timings(object):
+    """Records how long each phase of a deployment takes as a list of named
+    spans, along with attributes describing them (e.g. the application being
+    deployed).
+
+    Spans can be recorded from multiple threads, so one instance can be shared
+    by applications deployed concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = []
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block as a span called ``name``.
+
+        The attributes dict is yielded so that the block can add to it. If the
+        block raises, the name of the exception is recorded as the span's
+        ``error`` attribute.
+        """
+        start = time.time()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            duration = time.time() - start
+            with self._lock:
+                self.spans.append(Span(name, start, duration, attributes))
+            logger.debug("{0} took {1:.3f}s {2}".format(name, duration, attributes))
+
+    def phases(self):
+        """Returns the number of spans recorded for each phase and their total
+        duration, in the order in which each phase first finished.
+        """
+        phases = OrderedDict()
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            phase = phases.setdefault(span.name, {"count": 0, "total": 0.0})
+            phase["count"] += 1
+            phase["total"] += span.duration
+        return phases
+
+    def summary(self):
+        """Returns a summary of the time spent in each phase, one row per phase.
+        """
+        return [{"phase": name, "count": phase["count"], "total": "{0:.3f}s".format(phase["total"])}
+                for name, phase in self.phases().items()]
+
+    def report(self):
+        """Returns a JSON-serialisable report of all phases and spans.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "phases": self.phases(),
+            "spans": [dict(s._asdict()) for s in spans],
+        }
+
+    def write_report(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=4)
@@ -1,10 +1,53 @@
 # stdlib imports
 import logging
+import threading
+import time
+
+# local imports
+from shpkpr.concurrency import map_concurrently
 
 
 logger = logging.getLogger(__name__)
 
 
+# maximum number of concurrent reads made against Vault.
+MAX_CONCURRENT_READS = 8
+
+
+class SecretCache(object):
+    """Process-wide cache of secrets read from Vault, keyed by Vault address
+    and path.
+
+    Secrets are kept for their lease duration, or ``default_ttl`` seconds if
+    Vault doesn't specify one.
+    """
+
+    def __init__(self, default_ttl=300):
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._secrets = {}
+
+    def get(self, key):
+        with self._lock:
+            expires_at, secret = self._secrets.get(key, (0, None))
+            if expires_at <= time.time():
+                self._secrets.pop(key, None)
+                return None
+            return secret
+
+    def set(self, key, secret):
+        ttl = secret.get("lease_duration") or self.default_ttl
+        with self._lock:
+            self._secrets[key] = (time.time() + ttl, secret)
+
+    def clear(self):
+        with self._lock:
+            self._secrets = {}
+
+
+secret_cache = SecretCache()
+
+
 def resolve_secrets(vault_client, rendered_template):
     """Parse a rendered template, extract any secret definitions, retrieve them
     from vault and return them to the caller.
@@ -12,16 +55,57 @@ def resolve_secrets(vault_client, rendered_template):
     This is used in situations where direct Vault support is not available e.g.
     Chronos.
     """
-    resolved_secrets = {}
+    return resolve_secrets_for_templates(vault_client, [rendered_template])[0]
 
-    secrets = rendered_template.get("secrets", {})
-    for name, definition in secrets.items():
-        # parse the secret source and retrieve from vault
+
+def resolve_secrets_for_templates(vault_client, rendered_templates):
+    """Resolve the secrets for multiple rendered templates at once, returning
+    a list of resolved secrets in the same order as ``rendered_templates``.
+
+    Each Vault path is only read once, no matter how many secrets (in how many
+    templates) refer to it, and paths not already in ``secret_cache`` are read
+    concurrently.
+    """
+    definitions = [_parse_secret_definitions(t) for t in rendered_templates]
+    paths = set(path for d in definitions for path, _ in d.values())
+    secrets = _read_secrets(vault_client, paths)
+
+    all_resolved_secrets = []
+    for secret_definitions in definitions:
+        resolved_secrets = {}
+        for name, (path, key) in secret_definitions.items():
+            secret = secrets.get(path)
+            if secret:
+                resolved_secrets[name] = secret["data"][key]
+            else:
+                logger.info("Couldn't locate secret in Vault: {0}".format(path))
+        all_resolved_secrets.append(resolved_secrets)
+    return all_resolved_secrets
+
+
+def _parse_secret_definitions(rendered_template):
+    """Returns a dict mapping each secret's name to a ``(path, key)`` tuple.
+    """
+    definitions = {}
+    for name, definition in rendered_template.get("secrets", {}).items():
         path, key = definition["source"].split(":")
-        secret = vault_client.read(path)
-        if secret:
-            resolved_secrets[name] = secret["data"][key]
-        else:
-            logger.info("Couldn't locate secret in Vault: {0}".format(path))
+        definitions[name] = (path, key)
+    return definitions
+
 
-    return resolved_secrets
+def _read_secrets(vault_client, paths):
+    """Read the given paths from Vault (or the cache), returning a dict keyed
+    by path. Paths that couldn't be found map to ``None``.
+    """
+    vault_addr = getattr(vault_client, "url", None)
+    secrets = {}
+    for path in paths:
+        secrets[path] = secret_cache.get((vault_addr, path))
+
+    missing = [path for path, secret in secrets.items() if secret is None]
+    read_secrets = map_concurrently(vault_client.read, missing, MAX_CONCURRENT_READS)
+    for path, secret in zip(missing, read_secrets):
+        secrets[path] = secret
+        if secret:
+            secret_cache.set((vault_addr, path), secret)
+    return secrets
@@ -0,0 +1,82 @@
+# stdlib imports
+import json
+
+# third-party imports
+import pytest
+import yaml
+
+# local imports
+from shpkpr.cli.formatter import OutputFormatter
+
+
+OBJS = [
+    {"id": "/app-a", "instances": 2, "labels": {"A": "B"}},
+    {"id": "/app-b", "instances": 1, "ports": [10000, 10001]},
+]
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson", "yaml"])
+@pytest.mark.parametrize("objs", [OBJS, OBJS[:1], []])
+def test_iter_format_matches_format(fmt, objs):
+    formatter = OutputFormatter(fmt)
+
+    streamed = "\n".join(formatter.iter_format(iter(objs)))
+
+    assert streamed.rstrip() == formatter.format(objs).rstrip()
+
+
+def test_iter_format_json_parses():
+    output = "\n".join(OutputFormatter("json").iter_format(OBJS))
+
+    assert json.loads(output) == OBJS
+
+
+def test_iter_format_yaml_parses():
+    output = "\n".join(OutputFormatter("yaml").iter_format(OBJS))
+
+    assert yaml.safe_load(output) == OBJS
+
+
+def test_format_ndjson():
+    output = OutputFormatter("ndjson").format(OBJS)
+
+    assert [json.loads(line) for line in output.split("\n")] == OBJS
+
+
+def test_format_fields():
+    obj = {"id": "/app-a", "instances": 2, "container": {"docker": {"image": "app:1", "network": "BRIDGE"}}}
+
+    output = OutputFormatter("json").format(obj, fields=["id", "container.docker.image", "missing"])
+
+    assert json.loads(output) == {"id": "/app-a", "container": {"docker": {"image": "app:1"}}}
+
+
+def test_iter_format_fields():
+    output = "\n".join(OutputFormatter("ndjson").iter_format(iter(OBJS), fields=["id"]))
+
+    assert output == '{"id": "/app-a"}\n{"id": "/app-b"}'
+
+
+def test_format_table():
+    output = OutputFormatter("table").format(OBJS, fields=["id", "instances", "labels.A", "ports"])
+
+    assert output.split("\n") == [
+        "id      instances  labels.A  ports",
+        "/app-a  2          B",
+        "/app-b  1                    [10000,10001]",
+    ]
+
+
+def test_format_table_default_columns():
+    output = OutputFormatter("table").format({"instances": 2, "id": "/app-a"})
+
+    assert output.split("\n") == [
+        "id      instances",
+        "/app-a  2",
+    ]
+
+
+def test_iter_format_table():
+    output = list(OutputFormatter("table").iter_format(iter(OBJS), fields=["id"]))
+
+    assert output == ["id", "/app-a", "/app-b"]
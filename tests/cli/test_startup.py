@@ -0,0 +1,98 @@
+"""Startup time checks for the shpkpr CLI.
+
+Each check runs the CLI in a fresh interpreter so that nothing imported by the
+test suite itself is already loaded.
+
+Timing checks are marked ``startup_time`` so that they can be deselected (with
+``-m 'not startup_time'``) on machines where they're unreliable, and their
+threshold can be raised with ``SHPKPR_STARTUP_THRESHOLD_SECS`` on slower
+interpreters or loaded CI runners.
+"""
+# stdlib imports
+import json
+import os
+import subprocess
+import sys
+
+# third-party imports
+import pytest
+from six.moves import BaseHTTPServer
+
+
+# maximum time (in seconds) allowed to import shpkpr and run a command.
+STARTUP_THRESHOLD_SECS = float(os.environ.get("SHPKPR_STARTUP_THRESHOLD_SECS", 0.5))
+
+# dependencies which should only be imported by the commands which use them.
+HEAVY_MODULES = ["chronos", "distutils", "docker", "hvac", "requests"]
+
+_SCRIPT = """
+import json, sys, time
+start = time.time()
+from click.testing import CliRunner
+from shpkpr.cli.entrypoint import cli
+result = CliRunner().invoke(cli, %r)
+print(json.dumps({
+    "elapsed": time.time() - start,
+    "exit_code": result.exit_code,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+class _MarathonHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Stand-in for Marathon with no applications deployed.
+    """
+
+    def do_GET(self):
+        body = json.dumps({"apps": []}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def marathon_url(local_http_server):
+    return local_http_server(BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _MarathonHandler)).url
+
+
+def _run_cli(args, env=None):
+    env = dict(os.environ, **(env or {}))
+    output = subprocess.check_output([sys.executable, "-c", _SCRIPT % (args,)], env=env)
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("args", [
+    ["--help"],
+    ["apps", "show", "--help"],
+    ["cron", "show", "--help"],
+])
+def test_startup_does_not_import_heavy_modules(args):
+    result = _run_cli(args)
+
+    assert result["exit_code"] == 0
+    assert [m for m in HEAVY_MODULES if m in result["modules"]] == []
+
+
+def test_apps_show_only_imports_modules_it_uses(marathon_url):
+    result = _run_cli(["apps", "show"], env={"SHPKPR_MARATHON_URL": marathon_url})
+
+    assert result["exit_code"] == 0
+    assert [m for m in HEAVY_MODULES if m in result["modules"]] == ["requests"]
+
+
+@pytest.mark.startup_time
+@pytest.mark.parametrize("args", [
+    ["--help"],
+    ["apps", "show"],
+])
+def test_startup_time(args, marathon_url):
+    # take the best of a few runs to reduce noise from other processes
+    env = {"SHPKPR_MARATHON_URL": marathon_url}
+    elapsed = min(_run_cli(args, env)["elapsed"] for _ in range(3))
+
+    assert elapsed < STARTUP_THRESHOLD_SECS
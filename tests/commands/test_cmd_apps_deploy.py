@@ -1,3 +1,6 @@
+# stdlib imports
+import json
+
 # third-party imports
 import mock
 import responses
@@ -21,6 +24,9 @@ def test_help(runner):
 @responses.activate
 @mock.patch('shpkpr.marathon.MarathonDeployment.wait')
 def test_no_force(mock_deployment_wait, runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404)
     responses.add(responses.PUT,
                   'http://marathon.somedomain.com:8080/v2/apps/test-app',
                   status=201,
@@ -44,6 +50,9 @@ def test_no_force(mock_deployment_wait, runner, json_fixture):
 @responses.activate
 @mock.patch('shpkpr.marathon.MarathonDeployment.wait')
 def test_force(mock_deployment_wait, runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404)
     responses.add(responses.PUT,
                   'http://marathon.somedomain.com:8080/v2/apps/test-app?force=true',
                   status=201,
@@ -67,6 +76,12 @@ def test_force(mock_deployment_wait, runner, json_fixture):
 @responses.activate
 @mock.patch('shpkpr.marathon.MarathonDeployment.wait')
 def test_multiple_templates(mock_deployment_wait, runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404)
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app-2',
+                  status=404)
     responses.add(responses.PUT,
                   'http://marathon.somedomain.com:8080/v2/apps/',
                   status=201,
@@ -155,6 +170,9 @@ def test_strategy_bluegreen(runner):
 @responses.activate
 @mock.patch('shpkpr.marathon.MarathonDeployment.wait')
 def test_default_template(mock_deployment_wait, runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404)
     responses.add(responses.PUT,
                   'http://marathon.somedomain.com:8080/v2/apps/test-app',
                   status=201,
@@ -175,6 +193,9 @@ def test_default_template(mock_deployment_wait, runner, json_fixture):
 @responses.activate
 @mock.patch('shpkpr.marathon.MarathonDeployment.wait')
 def test_default_template_labels(mock_deployment_wait, runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404)
     responses.add(responses.PUT,
                   'http://marathon.somedomain.com:8080/v2/apps/test-app',
                   status=201,
@@ -191,3 +212,161 @@ def test_default_template_labels(mock_deployment_wait, runner, json_fixture):
     result = runner(['apps', 'deploy'], env=env)
 
     assert result.exit_code == 0
+
+
+def test_parallelism_must_be_positive(runner):
+    env = {
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+    }
+    result = runner(['apps', 'deploy', '--parallelism', '0'], env=env)
+
+    assert result.exit_code == 2
+    assert '--parallelism' in result.output
+
+
+def _live_test_app():
+    """Returns the app Marathon would have after deploying marathon/test.json.tmpl.
+    """
+    return {
+        "id": "/test-app",
+        "cmd": None,
+        "cpus": 0.1,
+        "mem": 512,
+        "disk": 0,
+        "instances": 1,
+        "container": {
+            "type": "DOCKER",
+            "volumes": [],
+            "docker": {
+                "image": "goexample/outyet:latest",
+                "forcePullImage": False,
+                "network": "BRIDGE",
+                "privileged": False,
+                "parameters": [],
+                "portMappings": [
+                    {"containerPort": 8080, "hostPort": 0, "servicePort": 10004, "protocol": "tcp"},
+                ],
+            },
+        },
+        "healthChecks": [
+            {
+                "path": "/",
+                "protocol": "HTTP",
+                "portIndex": 0,
+                "gracePeriodSeconds": 300,
+                "intervalSeconds": 10,
+                "timeoutSeconds": 5,
+                "maxConsecutiveFailures": 3,
+                "ignoreHttp1xx": False,
+            },
+        ],
+        "taskKillGracePeriodSeconds": 10,
+        "constraints": [["hostname", "UNIQUE"], ["subnet", "LIKE", "internal"]],
+        "upgradeStrategy": {"minimumHealthCapacity": 1, "maximumOverCapacity": 1},
+        "labels": {"RANDOM_LABEL": "some_value"},
+        "version": "2017-01-01T00:00:00.000Z",
+    }
+
+
+@responses.activate
+@mock.patch('shpkpr.marathon.MarathonDeployment.wait')
+def test_unchanged_app_is_not_deployed(mock_deployment_wait, runner, json_fixture):
+    live_app = _live_test_app()
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=200,
+                  json={"app": live_app})
+
+    env = {
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+        'SHPKPR_APPLICATION': 'test-app',
+        'SHPKPR_DOCKER_REPOTAG': 'goexample/outyet:latest',
+        'SHPKPR_DOCKER_EXPOSED_PORT': '8080',
+    }
+    _tmpl_path = "tests/fixtures/templates/marathon/test.json.tmpl"
+    result = runner(['apps', 'deploy', '--template', _tmpl_path, 'RANDOM_LABEL=some_value'], env=env)
+
+    assert result.exit_code == 0
+    assert len(responses.calls) == 1
+    assert not mock_deployment_wait.called
+
+
+@responses.activate
+@mock.patch('shpkpr.marathon.MarathonDeployment.wait')
+def test_unchanged_app_is_deployed_with_always_deploy(mock_deployment_wait, runner, json_fixture):
+    responses.add(responses.PUT,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=201,
+                  json=json_fixture("deployment"))
+    mock_deployment_wait.return_value = True
+
+    env = {
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+        'SHPKPR_APPLICATION': 'test-app',
+        'SHPKPR_DOCKER_REPOTAG': 'goexample/outyet:latest',
+        'SHPKPR_DOCKER_EXPOSED_PORT': '8080',
+        'SHPKPR_ALWAYS_DEPLOY': 'true',
+    }
+    _tmpl_path = "tests/fixtures/templates/marathon/test.json.tmpl"
+    result = runner(['apps', 'deploy', '--template', _tmpl_path, 'RANDOM_LABEL=some_value'], env=env)
+
+    assert result.exit_code == 0
+    assert [c.request.method for c in responses.calls] == ["PUT"]
+    assert mock_deployment_wait.called
+
+
+@responses.activate
+@mock.patch('shpkpr.marathon.MarathonDeployment.wait')
+def test_timings(mock_deployment_wait, runner, json_fixture, tmpdir):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404)
+    responses.add(responses.PUT,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=201,
+                  json=json_fixture("deployment"))
+    mock_deployment_wait.return_value = True
+
+    env = {
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+        'SHPKPR_MARATHON_APP_ID': 'test-app',
+        'SHPKPR_DOCKER_REPOTAG': 'goexample/outyet:latest',
+    }
+    report_path = str(tmpdir.join("timings.json"))
+    result = runner(['apps', 'deploy', '--timings', '--timings-report', report_path], env=env)
+
+    assert result.exit_code == 0
+    assert 'Deployment timings:' in result.output
+    for phase in ["render", "compare", "deploy", "marathon_wait"]:
+        assert phase in result.output
+
+    with open(report_path) as f:
+        report = json.load(f)
+    assert list(report["phases"]) == ["render", "compare", "deploy", "marathon_wait"]
+
+
+@responses.activate
+@mock.patch('shpkpr.marathon.MarathonDeployment.wait')
+def test_metrics_textfile(mock_deployment_wait, runner, json_fixture, tmpdir, metrics_registry):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404)
+    responses.add(responses.PUT,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=201,
+                  json=json_fixture("deployment"))
+    mock_deployment_wait.return_value = True
+
+    env = {
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+        'SHPKPR_MARATHON_APP_ID': 'test-app',
+        'SHPKPR_DOCKER_REPOTAG': 'goexample/outyet:latest',
+    }
+    textfile_path = str(tmpdir.join("shpkpr.prom"))
+    result = runner(['apps', 'deploy', '--metrics-textfile', textfile_path], env=env)
+
+    assert result.exit_code == 0
+    with open(textfile_path) as f:
+        textfile = f.read()
+    assert 'shpkpr_marathon_requests_total{method="GET",endpoint="/v2/apps",status="404"} 1' in textfile
+    assert 'shpkpr_marathon_requests_total{method="PUT",endpoint="/v2/apps",status="201"} 1' in textfile
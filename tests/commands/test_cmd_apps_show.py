@@ -96,3 +96,95 @@ def test_show_format_yaml(runner, json_fixture):
 
     parsed_payload = yaml.load(result.output)
     assert isinstance(parsed_payload, dict)
+
+
+@responses.activate
+def test_show_multiple_apps_format_ndjson(runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=json_fixture("valid_apps"))
+
+    result = runner(['apps', 'show', '--output-format', 'ndjson'], env={
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+    })
+    assert result.exit_code == 0
+
+    lines = result.output.strip().split("\n")
+    app_ids = sorted([json.loads(line)['id'] for line in lines])
+    assert app_ids == ["/test-app-a", "/test-app-b", "/test-app-c"]
+
+
+@responses.activate
+def test_show_fields_table(runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=json_fixture("valid_apps"))
+
+    result = runner(['apps', 'show', '--output-format', 'table', '--fields', 'id,instances,tasksRunning'], env={
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+    })
+    assert result.exit_code == 0
+
+    lines = result.output.strip().split("\n")
+    assert lines[0].split() == ["id", "instances", "tasksRunning"]
+    assert sorted(line.split()[0] for line in lines[1:]) == ["/test-app-a", "/test-app-b", "/test-app-c"]
+
+    # only counts are needed to show tasksRunning, so nothing else is embedded
+    url = responses.calls[0].request.url
+    assert "embed=apps.counts" in url
+    assert "embed=apps.tasks" not in url
+
+
+@responses.activate
+def test_show_filters(runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=json_fixture("valid_apps"))
+
+    result = runner(['apps', 'show', '--id-contains', '/test-app', '-l', 'HAPROXY_MODE=http', '-l', 'DOMAIN'], env={
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+    })
+    assert result.exit_code == 0
+
+    url = responses.calls[0].request.url
+    assert "id=%2Ftest-app" in url
+    assert "label=HAPROXY_MODE%3D%3Dhttp%2CDOMAIN" in url
+
+
+@responses.activate
+def test_show_single_app_fields(runner, json_fixture):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=200,
+                  json=json_fixture("valid_app"))
+
+    result = runner(['apps', 'show', '--fields', 'id,instances'], env={
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+        'SHPKPR_APPLICATION': 'test-app',
+    })
+    assert result.exit_code == 0
+
+    assert json.loads(result.output) == {"id": "/test-app", "instances": 2}
+    assert "embed" not in responses.calls[0].request.url
+
+
+@responses.activate
+def test_show_max_age(runner, json_fixture, tmpdir):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=json_fixture("valid_apps"))
+
+    env = {
+        'SHPKPR_MARATHON_URL': "http://marathon.somedomain.com:8080",
+        'SHPKPR_RESPONSE_CACHE_DIR': str(tmpdir),
+    }
+    first = runner(['apps', 'show', '--max-age', '60'], env=env)
+    second = runner(['apps', 'show', '--max-age', '60'], env=env)
+
+    assert first.exit_code == 0
+    assert first.output == second.output
+    assert len(responses.calls) == 1
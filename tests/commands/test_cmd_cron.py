@@ -17,7 +17,7 @@ def test_help(runner):
     assert 'Manage Chronos jobs' in result.output
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.list")
 def test_show(mock_chronos_client, runner, json_fixture):
     mock_chronos_client.return_value = json_fixture("chronos_jobs")
 
@@ -30,7 +30,7 @@ def test_show(mock_chronos_client, runner, json_fixture):
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.list")
 def test_show_job_name(mock_chronos_client, runner, json_fixture):
     mock_chronos_client.return_value = json_fixture("chronos_jobs")
 
@@ -43,8 +43,24 @@ def test_show_job_name(mock_chronos_client, runner, json_fixture):
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.list")
-@mock.patch("shpkpr.cli.options.ChronosClient.add")
+@mock.patch("chronos.ChronosClient.list")
+def test_show_max_age(mock_chronos_client, runner, json_fixture, tmpdir):
+    mock_chronos_client.return_value = json_fixture("chronos_jobs")
+    env = {
+        'SHPKPR_CHRONOS_URL': "chronos.somedomain.com:4400",
+        'SHPKPR_RESPONSE_CACHE_DIR': str(tmpdir),
+    }
+
+    first = runner(['cron', 'show', '--max-age', '60'], env=env)
+    second = runner(['cron', 'show', '--max-age', '60'], env=env)
+
+    assert first.exit_code == 0
+    assert first.output == second.output
+    assert mock_chronos_client.call_count == 1
+
+
+@mock.patch("chronos.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.add")
 def test_set(mock_chronos_add, mock_chronos_list, runner, json_fixture):
     mock_chronos_list.return_value = []
     mock_chronos_add.return_value = True
@@ -59,8 +75,8 @@ def test_set(mock_chronos_add, mock_chronos_list, runner, json_fixture):
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.list")
-@mock.patch("shpkpr.cli.options.ChronosClient.add")
+@mock.patch("chronos.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.add")
 def test_set_default_template(mock_chronos_add, mock_chronos_list, runner, json_fixture):
     mock_chronos_list.return_value = []
     mock_chronos_add.return_value = True
@@ -77,8 +93,8 @@ def test_set_default_template(mock_chronos_add, mock_chronos_list, runner, json_
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.list")
-@mock.patch("shpkpr.cli.options.ChronosClient.add")
+@mock.patch("chronos.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.add")
 def test_set_default_template_labels(mock_chronos_add, mock_chronos_list, runner, json_fixture):
     mock_chronos_list.return_value = []
     mock_chronos_add.return_value = True
@@ -96,8 +112,8 @@ def test_set_default_template_labels(mock_chronos_add, mock_chronos_list, runner
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.list")
-@mock.patch("shpkpr.cli.options.ChronosClient.add")
+@mock.patch("chronos.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.add")
 def test_set_multiple(mock_chronos_add, mock_chronos_list, runner):
     mock_chronos_list.return_value = []
     mock_chronos_add.return_value = True
@@ -121,11 +137,11 @@ def test_set_multiple(mock_chronos_add, mock_chronos_list, runner):
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.list")
-@mock.patch("shpkpr.cli.options.ChronosClient.update")
-@mock.patch("shpkpr.cli.options.ChronosClient.add")
+@mock.patch("chronos.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.update")
+@mock.patch("chronos.ChronosClient.add")
 def test_set_update(mock_chronos_add, mock_chronos_update, mock_chronos_list, runner):
-    mock_chronos_list.return_value = [{'name': 'shpkpr-test-job'}]
+    mock_chronos_list.return_value = [{'name': 'shpkpr-test-job', 'command': 'sleep 60'}]
     mock_chronos_update.return_value = True
 
     _tmpl_path = 'tests/fixtures/templates/chronos/test-chronos.json.tmpl'
@@ -140,7 +156,25 @@ def test_set_update(mock_chronos_add, mock_chronos_update, mock_chronos_list, ru
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.delete")
+@mock.patch("chronos.ChronosClient.list")
+@mock.patch("chronos.ChronosClient.update")
+@mock.patch("chronos.ChronosClient.add")
+def test_set_unchanged(mock_chronos_add, mock_chronos_update, mock_chronos_list, runner):
+    mock_chronos_list.return_value = [{'name': 'shpkpr-test-job', 'command': 'sleep 30', 'successCount': 1}]
+
+    _tmpl_path = 'tests/fixtures/templates/chronos/test-chronos.json.tmpl'
+    result = runner(['cron', 'set', '--template', _tmpl_path], env={
+        'SHPKPR_CHRONOS_URL': "chronos.somedomain.com:4400",
+        'SHPKPR_CHRONOS_JOB_NAME': 'shpkpr-test-job',
+    })
+
+    mock_chronos_add.assert_not_called()
+    mock_chronos_update.assert_not_called()
+    assert '0 added, 0 changed, 1 unchanged' in result.output
+    assert result.exit_code == 0
+
+
+@mock.patch("chronos.ChronosClient.delete")
 def test_delete(mock_chronos_client, runner):
     mock_chronos_client.return_value = True
 
@@ -152,7 +186,7 @@ def test_delete(mock_chronos_client, runner):
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.delete_tasks")
+@mock.patch("chronos.ChronosClient.delete_tasks")
 def test_delete_tasks(mock_chronos_client, runner):
     mock_chronos_client.return_value = True
 
@@ -164,7 +198,7 @@ def test_delete_tasks(mock_chronos_client, runner):
     assert result.exit_code == 0
 
 
-@mock.patch("shpkpr.cli.options.ChronosClient.run")
+@mock.patch("chronos.ChronosClient.run")
 def test_run(mock_chronos_client, runner):
     mock_chronos_client.return_value = True
 
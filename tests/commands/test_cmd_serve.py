@@ -0,0 +1,20 @@
+def test_help(runner):
+    result = runner(['serve', '--help'])
+
+    assert result.exit_code == 0
+    assert 'Usage:' in result.output
+    assert '/apps/deploy' in result.output
+
+
+def test_requires_marathon_url(runner):
+    result = runner(['serve'], env={'SHPKPR_SERVE_TOKEN': 's3cret'})
+
+    assert result.exit_code == 2
+    assert '--marathon-url' in result.output
+
+
+def test_requires_token(runner):
+    result = runner(['serve'], env={'SHPKPR_MARATHON_URL': 'http://marathon.somedomain.com:8080'})
+
+    assert result.exit_code == 2
+    assert '--token' in result.output
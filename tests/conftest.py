@@ -1,6 +1,7 @@
 # stdlib imports
 import json
 import os
+import threading
 
 # third-party imports
 import pytest
@@ -22,3 +23,33 @@ def json_fixture(file_fixture):
     def _json_fixture(name):
         return json.loads(file_fixture(name + ".json"))
     return _json_fixture
+
+
+@pytest.fixture
+def local_http_server(request):
+    """Serve requests to a local stand-in for a remote service.
+
+    Returns a function which starts the given ``HTTPServer`` (bound to a local
+    port) in a background thread, sets its ``url`` and shuts it down at the
+    end of the test.
+    """
+    def _local_http_server(server):
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01})
+        thread.daemon = True
+        thread.start()
+        server.url = "http://{0}:{1}".format(*server.server_address[:2])
+
+        def _shutdown():
+            server.shutdown()
+            server.server_close()
+        request.addfinalizer(_shutdown)
+        return server
+    return _local_http_server
+
+
+@pytest.fixture
+def metrics_registry(request):
+    from shpkpr import metrics
+    metrics.REGISTRY.reset()
+    request.addfinalizer(metrics.REGISTRY.reset)
+    return metrics.REGISTRY
@@ -0,0 +1,83 @@
+# stdlib imports
+import threading
+import time
+
+# third-party imports
+import mock
+import pytest
+
+# local imports
+from shpkpr.deployment.bluegreen import BlueGreenDeployment
+from shpkpr.marathon import DeploymentFailed
+from shpkpr.marathon import DryRun
+
+
+def _app_definitions(count):
+    return [{"id": "app-{0}".format(i)} for i in range(count)]
+
+
+def _deployment(app_definitions, parallelism):
+    return BlueGreenDeployment(mock.Mock(), mock.Mock(), 60, app_definitions, parallelism=parallelism)
+
+
+@mock.patch.object(BlueGreenDeployment, 'execute_for_app')
+def test_sequential_stops_at_first_failure(mock_execute_for_app):
+    mock_execute_for_app.side_effect = [None, DeploymentFailed("boom"), None]
+
+    with pytest.raises(DeploymentFailed):
+        _deployment(_app_definitions(3), parallelism=1).execute()
+    assert mock_execute_for_app.call_count == 2
+
+
+@mock.patch.object(BlueGreenDeployment, 'execute_for_app')
+def test_sequential_refreshes_cluster_state_after_each_app(mock_execute_for_app):
+    deployment = _deployment(_app_definitions(2), parallelism=1)
+    calls = []
+    mock_execute_for_app.side_effect = lambda app_definition, force: calls.append(app_definition["id"])
+
+    with mock.patch.object(deployment.cluster_state, 'refresh') as mock_refresh:
+        mock_refresh.side_effect = lambda: calls.append("refresh")
+        deployment.execute()
+    assert calls == ["app-0", "refresh", "app-1", "refresh"]
+
+
+@mock.patch.object(BlueGreenDeployment, 'execute_for_app')
+def test_parallel_respects_limit(mock_execute_for_app):
+    active = []
+    max_active = []
+    lock = threading.Lock()
+
+    def _execute(app_definition, force):
+        with lock:
+            active.append(app_definition["id"])
+            max_active.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(app_definition["id"])
+    mock_execute_for_app.side_effect = _execute
+
+    _deployment(_app_definitions(6), parallelism=3).execute()
+    assert mock_execute_for_app.call_count == 6
+    assert max(max_active) == 3
+
+
+@mock.patch.object(BlueGreenDeployment, 'execute_for_app')
+def test_parallel_reports_all_failures(mock_execute_for_app):
+    def _execute(app_definition, force):
+        if app_definition["id"] in ["app-1", "app-3"]:
+            raise DeploymentFailed("boom")
+    mock_execute_for_app.side_effect = _execute
+
+    with pytest.raises(DeploymentFailed) as e:
+        _deployment(_app_definitions(4), parallelism=4).execute()
+    assert mock_execute_for_app.call_count == 4
+    assert "app-1, app-3" in str(e.value)
+
+
+@mock.patch.object(BlueGreenDeployment, 'execute_for_app')
+def test_parallel_dry_run_is_not_a_failure(mock_execute_for_app):
+    mock_execute_for_app.side_effect = DryRun("Exiting as --dry-run requested")
+
+    with pytest.raises(DryRun):
+        _deployment(_app_definitions(4), parallelism=4).execute()
+    assert mock_execute_for_app.call_count == 4
@@ -0,0 +1,53 @@
+# third-party imports
+import pytest
+
+# local imports
+from shpkpr.deployment.bluegreen.ports import PortAllocator
+from shpkpr.deployment.bluegreen.ports import PortsExhausted
+from shpkpr.deployment.bluegreen.prepare import build_port_allocator
+from shpkpr.deployment.bluegreen.prepare import prepare_app_definition
+
+
+def test_allocates_every_free_port_once():
+    allocator = PortAllocator(10000, 10009, used_ports=[10000, 10005])
+
+    ports = [allocator.allocate() for _ in range(8)]
+    assert sorted(ports) == [10001, 10002, 10003, 10004, 10006, 10007, 10008, 10009]
+
+
+def test_exhaustion():
+    allocator = PortAllocator(10000, 10001)
+    allocator.allocate()
+    allocator.allocate()
+
+    with pytest.raises(PortsExhausted):
+        allocator.allocate()
+
+
+def test_reserve():
+    allocator = PortAllocator(10000, 10002)
+    allocator.reserve(10000, 10002, 20000)
+
+    assert len(allocator) == 1
+    assert allocator.allocate() == 10001
+
+
+def test_build_port_allocator_excludes_deployed_ports(json_fixture):
+    apps_state = json_fixture("valid_apps")["apps"]
+    marathon_info = {"marathon_config": {"local_port_min": 10036, "local_port_max": 10038}}
+
+    allocator = build_port_allocator(apps_state, marathon_info)
+    assert sorted([allocator.allocate(), allocator.allocate()]) == [10036, 10038]
+
+
+def test_shared_allocator_avoids_collisions(json_fixture):
+    allocator = PortAllocator(10000, 10003)
+
+    ports = set()
+    for _ in range(2):
+        app_definition = json_fixture("marathon/bluegreen_app_auto_port_new")
+        prepared = prepare_app_definition(app_definition, port_allocator=allocator)
+        ports.add(prepared['labels']['HAPROXY_0_PORT'])
+        ports.add(prepared['labels']['HAPROXY_DEPLOYMENT_ALT_PORT'])
+
+    assert ports == set(["10000", "10001", "10002", "10003"])
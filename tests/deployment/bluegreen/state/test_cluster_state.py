@@ -0,0 +1,91 @@
+# third-party imports
+import mock
+
+# local imports
+from shpkpr.deployment.bluegreen.state import ClusterState
+from shpkpr.deployment.bluegreen.validate import Validator
+
+
+def _app(app_id, group):
+    return {"id": app_id, "labels": {"HAPROXY_DEPLOYMENT_GROUP": group}}
+
+
+APPS = [
+    _app("/a-blue", "a"),
+    _app("/b-green", "b"),
+    _app("/c", None),
+]
+
+
+def _list_applications(embed=None, label_selector=None):
+    if label_selector is None:
+        return APPS
+    group = label_selector.split("==")[1]
+    return [app for app in APPS if app["labels"]["HAPROXY_DEPLOYMENT_GROUP"] == group]
+
+
+def _marathon_client():
+    marathon_client = mock.Mock()
+    marathon_client.list_applications.side_effect = _list_applications
+    return marathon_client
+
+
+def test_apps_are_fetched_once():
+    marathon_client = _marathon_client()
+    cluster_state = ClusterState(marathon_client)
+
+    cluster_state.apps
+    cluster_state.apps_in_deployment_group("a")
+    cluster_state.apps_in_deployment_group("b")
+    assert marathon_client.list_applications.call_count == 1
+
+
+def test_apps_in_deployment_group():
+    cluster_state = ClusterState(_marathon_client())
+
+    assert [a["id"] for a in cluster_state.apps_in_deployment_group("a")] == ["/a-blue"]
+    assert cluster_state.apps_in_deployment_group("d") == []
+
+
+def test_apps_in_deployment_group_filtered_by_marathon():
+    marathon_client = _marathon_client()
+    cluster_state = ClusterState(marathon_client)
+
+    cluster_state.apps_in_deployment_group("a")
+    cluster_state.apps_in_deployment_group("a")
+    marathon_client.list_applications.assert_called_once_with(
+        embed=[],
+        label_selector="HAPROXY_DEPLOYMENT_GROUP==a",
+    )
+
+
+def test_apps_in_deployment_group_fetched_without_lock():
+    marathon_client = _marathon_client()
+    cluster_state = ClusterState(marathon_client)
+
+    def _list_applications_unlocked(**kwargs):
+        assert not cluster_state._lock.locked()
+        return _list_applications(**kwargs)
+    marathon_client.list_applications.side_effect = _list_applications_unlocked
+
+    assert [a["id"] for a in cluster_state.apps_in_deployment_group("a")] == ["/a-blue"]
+
+
+def test_refresh():
+    marathon_client = _marathon_client()
+    cluster_state = ClusterState(marathon_client)
+
+    cluster_state.apps_in_deployment_group("a")
+    cluster_state.refresh()
+    cluster_state.apps_in_deployment_group("a")
+    assert marathon_client.list_applications.call_count == 2
+
+
+def test_snapshot_shared_by_validators():
+    marathon_client = _marathon_client()
+    cluster_state = ClusterState(marathon_client)
+    validator = Validator(marathon_client, cluster_state=cluster_state)
+
+    validator.validate(_app("/a", "a"))
+    validator.validate(_app("/a", "a"))
+    assert marathon_client.list_applications.call_count == 1
@@ -0,0 +1,35 @@
+# third-party imports
+import pytest
+
+# local imports
+from shpkpr.deployment.bluegreen.stats import ApplicationStats
+from shpkpr.marathon_lb.stats import Row
+
+
+@pytest.fixture
+def app_stats(json_fixture):
+    app_definition = json_fixture("marathon/bluegreen_app_existing")
+    rows = [
+        Row("my-group_11090", "FRONTEND", "", "0", "OPEN"),
+        Row("my-group_11090", "10_0_0_1_31000", "0", "0", "UP"),
+        Row("my-group_11090", "10_0_0_1_31000", "0", "1", "UP"),
+        Row("my-group_11090", "10_0_0_2_31000", "0", "0", "MAINT"),
+        Row("my-group_11090", "BACKEND", "0", "1", "UP"),
+        Row("other-group_11092", "10_0_0_3_31000", "0", "0", "UP"),
+    ]
+    return ApplicationStats(app_definition, rows)
+
+
+def test_listeners(app_stats):
+    assert app_stats.listener_count == 3
+
+
+def test_listeners_with_status(app_stats):
+    assert len(app_stats.listeners_with_status("up")) == 2
+    assert len(app_stats.listeners_with_status("MAINT")) == 1
+    assert app_stats.listeners_with_status("DOWN") == []
+
+
+def test_listeners_for_svname(app_stats):
+    assert len(app_stats.listeners_for_svname("10_0_0_1_31000")) == 2
+    assert app_stats.listeners_for_svname("10_0_0_3_31000") == []
@@ -21,7 +21,7 @@ def test_valid_state(valid_app_definition):
     # return values or exceptions to be raised and a single empty list causes an
     # error. the two options are wrapping the empty list in an outer list, or a
     # function that returns the empty list.
-    marathon_client.list_applications.side_effect = lambda: []
+    marathon_client.list_applications.side_effect = lambda **kw: []
 
     validator = MarathonStateValidator(marathon_client)
     try:
@@ -35,7 +35,7 @@ def test_valid_state_one_existing_stack(valid_app_definition, json_fixture):
     present on Marathon.
     """
     marathon_client = mock.Mock()
-    marathon_client.list_applications.side_effect = lambda: [
+    marathon_client.list_applications.side_effect = lambda **kw: [
         json_fixture("marathon/bluegreen_app_existing"),
     ]
 
@@ -51,7 +51,7 @@ def test_invalid_state_two_existing_stacks(valid_app_definition, json_fixture):
     present on Marathon.
     """
     marathon_client = mock.Mock()
-    marathon_client.list_applications.side_effect = lambda: [
+    marathon_client.list_applications.side_effect = lambda **kw: [
         json_fixture("marathon/bluegreen_app_existing"),
         json_fixture("marathon/bluegreen_app_existing"),
     ]
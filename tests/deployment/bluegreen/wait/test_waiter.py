@@ -0,0 +1,109 @@
+# stdlib imports
+import time
+
+# third-party imports
+import mock
+import pytest
+
+# local imports
+from shpkpr import metrics
+from shpkpr.deployment.bluegreen.stats import ApplicationStats
+from shpkpr.deployment.bluegreen.wait import ListenerCheck
+from shpkpr.deployment.bluegreen.wait import SwapApplicationTimeout
+from shpkpr.deployment.bluegreen.wait import Waiter
+from shpkpr.marathon_lb.stats import Row
+from shpkpr.polling import PollSchedule
+
+
+def _waiter():
+    schedule = PollSchedule.constant(0.01)
+    return Waiter(mock.Mock(), mock.Mock(), "my-app-green", "my-app-blue", schedule=schedule)
+
+
+@mock.patch.object(Waiter, 'check')
+def test_wait_returns_once_check_succeeds(mock_check):
+    mock_check.side_effect = [False, False, True]
+
+    _waiter().wait(time.time() + 5)
+    assert mock_check.call_count == 3
+
+
+@mock.patch.object(Waiter, 'check')
+def test_wait_does_not_sleep_if_already_complete(mock_check):
+    mock_check.return_value = True
+
+    with mock.patch('time.sleep') as mock_sleep:
+        _waiter().wait(time.time() + 5)
+    assert not mock_sleep.called
+
+
+@mock.patch.object(Waiter, 'check')
+def test_wait_times_out(mock_check):
+    mock_check.return_value = False
+
+    with pytest.raises(SwapApplicationTimeout):
+        _waiter().wait(time.time() + 0.1)
+
+
+def test_check_records_timings():
+    waiter = _waiter()
+    waiter.marathon_lb_client.is_reloading.return_value = True
+
+    assert not waiter.check()
+    assert not waiter.check()
+
+    spans = waiter.timings.spans
+    assert [s.name for s in spans] == ["swap_check", "swap_check"]
+    assert spans[0].attributes == {"app": "my-app-green", "result": False}
+
+
+def test_check_records_metrics(metrics_registry):
+    waiter = _waiter()
+    waiter.marathon_lb_client.is_reloading.side_effect = [True, RuntimeError()]
+
+    assert not waiter.check()
+    with pytest.raises(RuntimeError):
+        waiter.check()
+
+    assert metrics.SWAP_CHECKS.value(result="pending") == 1
+    assert metrics.SWAP_CHECKS.value(result="error") == 1
+    assert metrics.SWAP_CHECK_DURATION.count() == 2
+
+
+@mock.patch.object(Waiter, 'check')
+def test_wait_records_metrics(mock_check, metrics_registry):
+    mock_check.return_value = False
+
+    with pytest.raises(SwapApplicationTimeout):
+        _waiter().wait(time.time() + 0.05)
+
+    assert metrics.SWAP_DURATION.count(result="timeout") == 1
+
+
+def test_fetch_application_stats_filters_by_deployment_label(json_fixture):
+    app_definition = json_fixture("marathon/bluegreen_app_existing")
+    waiter = _waiter()
+
+    waiter._fetch_application_stats(app_definition)
+    waiter.marathon_lb_client.fetch_stats.assert_called_once_with(pxname="my-group_11090")
+
+
+def _task(host, port):
+    return {"host": host, "ports": [port]}
+
+
+def test_listener_check(json_fixture):
+    app_definition = json_fixture("marathon/bluegreen_app_existing")
+    rows = [
+        Row("my-group_11090", "10_0_0_1_31000", "0", "0", "UP"),
+        Row("my-group_11090", "10_0_0_1_31000", "0", "0", "UP"),
+        Row("my-group_11090", "10_0_0_2_31000", "0", "3", "UP"),
+        Row("my-group_11090", "10_0_0_2_31000", "0", "0", "UP"),
+    ]
+    app_stats = ApplicationStats(app_definition, rows)
+    app = {"tasks": [_task("10.0.0.1", 31000), _task("10.0.0.2", 31000)]}
+
+    checker = ListenerCheck(app_stats, app, haproxy_count=2)
+    assert checker.check("UP")
+    assert not checker.check("UP", predicate=lambda l: int(l.scur) == 0)
+    assert not checker.check("MAINT")
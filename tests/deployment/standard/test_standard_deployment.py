@@ -0,0 +1,42 @@
+# third-party imports
+import mock
+
+# local imports
+from shpkpr.deployment import StandardDeployment
+
+
+def _app(force_pull_image=False):
+    return {
+        "id": "/test-app",
+        "container": {"docker": {"image": "goexample/outyet:latest", "forcePullImage": force_pull_image}},
+    }
+
+
+def test_unchanged_app_is_skipped():
+    app = _app()
+    marathon_client = mock.Mock()
+    marathon_client.get_application.return_value = app
+
+    assert StandardDeployment(marathon_client, 10, [app]).execute()
+    assert not marathon_client.deploy.called
+
+
+def test_app_which_force_pulls_image_is_always_deployed():
+    app = _app(force_pull_image=True)
+    marathon_client = mock.Mock()
+    marathon_client.get_application.return_value = app
+
+    StandardDeployment(marathon_client, 10, [app]).execute()
+
+    assert not marathon_client.get_application.called
+    marathon_client.deploy.assert_called_once_with([app], force=False)
+
+
+def test_always_deploy_skips_comparison():
+    app = _app()
+    marathon_client = mock.Mock()
+
+    StandardDeployment(marathon_client, 10, [app], always_deploy=True).execute()
+
+    assert not marathon_client.get_application.called
+    marathon_client.deploy.assert_called_once_with([app], force=False)
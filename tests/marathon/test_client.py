@@ -6,12 +6,17 @@ import os
 import mock
 import pytest
 import responses
+from freezegun import freeze_time
 
 # local imports
+from shpkpr import metrics
+from shpkpr.cache import ResponseCache
 from shpkpr.marathon import ClientError
 from shpkpr.marathon import DeploymentNotFound
 from shpkpr.marathon import DryRun
 from shpkpr.marathon import MarathonClient
+from shpkpr.marathon import embeds_for_fields
+from shpkpr.marathon import label_selector
 
 
 def _load_json_fixture(name):
@@ -46,6 +51,22 @@ def test_get_application_not_found():
         client.get_application('test-app')
 
 
+@responses.activate
+def test_requests_are_counted(metrics_registry):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=404,
+                  json={"message": "App '/test-app' does not exist"})
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    with pytest.raises(ClientError):
+        client.get_application('test-app')
+
+    requests_total = metrics.MARATHON_REQUESTS
+    assert requests_total.value(method="GET", endpoint="/v2/apps", status=404) == 1
+    assert metrics.MARATHON_REQUEST_DURATION.count(method="GET", endpoint="/v2/apps") == 1
+
+
 @responses.activate
 def test_get_application_internal_server_error():
     responses.add(responses.GET,
@@ -182,3 +203,236 @@ def test_basic_auth_headers_not_present():
     client.get_application('test-app')
 
     assert "Authorization" not in responses.calls[0].request.headers
+
+
+@responses.activate
+def test_connections_are_pooled():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=200,
+                  json=_load_json_fixture("valid_app"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    session = client._session
+    client.get_application('test-app')
+    client.get_application('test-app')
+
+    assert client._session is session
+    assert len(responses.calls) == 2
+
+
+def test_session_configuration():
+    client = MarathonClient("http://marathon.somedomain.com:8080",
+                            pool_size=4,
+                            max_retries=7)
+    adapter = client._session.get_adapter("http://marathon.somedomain.com:8080")
+
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 7
+
+
+@responses.activate
+def test_get_deployment_reuses_snapshot():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/deployments',
+                  status=200,
+                  json=_load_json_fixture("deployments"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080", deployments_max_age=60)
+    client.get_deployment("97c136bf-5a28-4821-9d94-480d9fbb01c8")
+    with pytest.raises(DeploymentNotFound):
+        client.get_deployment("1234")
+
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_get_deployment_revalidates_with_etag():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/deployments',
+                  status=200,
+                  json=_load_json_fixture("deployments"),
+                  headers={"ETag": '"abc123"'})
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/deployments',
+                  status=304)
+
+    client = MarathonClient("http://marathon.somedomain.com:8080", deployments_max_age=0)
+    client.get_deployment("97c136bf-5a28-4821-9d94-480d9fbb01c8")
+    deployment = client.get_deployment("97c136bf-5a28-4821-9d94-480d9fbb01c8")
+
+    assert deployment['id'] == "97c136bf-5a28-4821-9d94-480d9fbb01c8"
+    assert "If-None-Match" not in responses.calls[0].request.headers
+    assert responses.calls[1].request.headers["If-None-Match"] == '"abc123"'
+
+
+@responses.activate
+def test_deploy_invalidates_deployments_snapshot():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/deployments',
+                  status=200,
+                  json=[])
+    responses.add(responses.PUT,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=201,
+                  json=_load_json_fixture("deployment"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080", deployments_max_age=60)
+    with pytest.raises(DeploymentNotFound):
+        client.get_deployment("1234")
+    client.deploy({"id": "test-app"})
+    with pytest.raises(DeploymentNotFound):
+        client.get_deployment("1234")
+
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_list_applications_with_filters():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=_load_json_fixture("valid_apps"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    client.list_applications(embed=["counts"],
+                             label_selector=label_selector("HAPROXY_DEPLOYMENT_GROUP", "my group"),
+                             app_id="/my-app")
+
+    url = responses.calls[0].request.url
+    assert "embed=apps.counts" in url
+    assert "embed=apps.tasks" not in url
+    assert "label=HAPROXY_DEPLOYMENT_GROUP%3D%3Dmy%5C+group" in url
+    assert "id=%2Fmy-app" in url
+
+
+@responses.activate
+def test_iter_applications():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=_load_json_fixture("valid_apps"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    applications = client.iter_applications(embed=[], app_id="/test-app")
+
+    assert [a["id"] for a in applications] == ["/test-app-c", "/test-app-a", "/test-app-b"]
+    url = responses.calls[0].request.url
+    assert "embed" not in url
+    assert "id=%2Ftest-app" in url
+
+
+@responses.activate
+def test_iter_applications_error():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=500)
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    with pytest.raises(ClientError):
+        list(client.iter_applications())
+
+
+@responses.activate
+def test_iter_applications_truncated_response():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  body='{"apps": [{"id": "/test-app-a"}, {"id": "/test-ap')
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    with pytest.raises(ClientError):
+        list(client.iter_applications())
+
+
+@responses.activate
+def test_list_applications_embeds_everything_by_default():
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=_load_json_fixture("valid_apps"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    client.list_applications()
+
+    url = responses.calls[0].request.url
+    for embed in ["tasks", "counts", "deployments", "lastTaskFailure", "taskStats"]:
+        assert "embed=apps.{0}".format(embed) in url
+
+
+def test_embeds_for_fields():
+    assert embeds_for_fields(None) is None
+    assert embeds_for_fields(["id", "instances"]) == []
+    assert embeds_for_fields(["id", "tasksRunning", "tasksHealthy", "tasks.host"]) == ["tasks", "counts"]
+
+
+@responses.activate
+def test_get_application_max_age(tmpdir):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=200,
+                  json=_load_json_fixture("valid_app"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080",
+                            response_cache=ResponseCache(str(tmpdir)))
+    with freeze_time("2017-01-01 00:00:00"):
+        first = client.get_application("test-app", max_age=60)
+    with freeze_time("2017-01-01 00:00:59"):
+        second = client.get_application("test-app", max_age=60)
+
+    assert first == second
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_get_application_max_age_revalidates_with_etag(tmpdir):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=200,
+                  json=_load_json_fixture("valid_app"),
+                  headers={"ETag": '"v1"'})
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps/test-app',
+                  status=304)
+
+    client = MarathonClient("http://marathon.somedomain.com:8080",
+                            response_cache=ResponseCache(str(tmpdir)))
+    with freeze_time("2017-01-01 00:00:00"):
+        first = client.get_application("test-app", max_age=60)
+    with freeze_time("2017-01-01 00:01:01"):
+        second = client.get_application("test-app", max_age=60)
+
+    assert first == second
+    assert len(responses.calls) == 2
+    assert responses.calls[1].request.headers["If-None-Match"] == '"v1"'
+
+
+@responses.activate
+def test_list_applications_not_cached_without_max_age(tmpdir):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=200,
+                  json=_load_json_fixture("valid_apps"))
+
+    client = MarathonClient("http://marathon.somedomain.com:8080",
+                            response_cache=ResponseCache(str(tmpdir)))
+    client.list_applications()
+    client.list_applications()
+
+    assert len(responses.calls) == 2
+    assert tmpdir.listdir() == []
+
+
+@responses.activate
+def test_list_applications_errors_not_cached(tmpdir):
+    responses.add(responses.GET,
+                  'http://marathon.somedomain.com:8080/v2/apps',
+                  status=500)
+
+    client = MarathonClient("http://marathon.somedomain.com:8080",
+                            response_cache=ResponseCache(str(tmpdir)))
+    for _ in range(2):
+        with pytest.raises(ClientError):
+            client.list_applications(max_age=60)
+
+    assert len(responses.calls) == 2
@@ -0,0 +1,127 @@
+from shpkpr.marathon.compare import has_changed
+
+
+def _live_app(**kw):
+    app = {
+        "id": "/my-app",
+        "cmd": None,
+        "cpus": 0.1,
+        "mem": 512,
+        "instances": 2,
+        "env": {"FOO": "bar"},
+        "labels": {"HAPROXY_GROUP": "external"},
+        "container": {
+            "type": "DOCKER",
+            "volumes": [],
+            "docker": {
+                "image": "my-app:1.0",
+                "privileged": False,
+                "portMappings": [
+                    {"containerPort": 8080, "hostPort": 0, "servicePort": 10001, "protocol": "tcp"},
+                ],
+            },
+        },
+        "version": "2017-01-01T00:00:00.000Z",
+    }
+    app.update(kw)
+    return app
+
+
+def _app_definition(**kw):
+    app = {
+        "id": "my-app",
+        "cpus": 0.1,
+        "mem": 512,
+        "instances": 2,
+        "env": {"FOO": "bar"},
+        "labels": {"HAPROXY_GROUP": "external"},
+        "container": {
+            "type": "DOCKER",
+            "docker": {
+                "image": "my-app:1.0",
+                "portMappings": [
+                    {"containerPort": 8080, "hostPort": 0, "servicePort": 0, "protocol": "tcp"},
+                ],
+            },
+        },
+    }
+    app.update(kw)
+    return app
+
+
+def test_unchanged_ignores_marathon_defaults():
+    assert not has_changed(_live_app(), _app_definition())
+
+
+def test_changed_value():
+    assert has_changed(_live_app(), _app_definition(instances=3))
+
+
+def test_changed_nested_value():
+    app_definition = _app_definition()
+    app_definition["container"]["docker"]["image"] = "my-app:1.1"
+
+    assert has_changed(_live_app(), app_definition)
+
+
+def test_changed_fixed_service_port():
+    app_definition = _app_definition()
+    app_definition["container"]["docker"]["portMappings"][0]["servicePort"] = 10002
+
+    assert has_changed(_live_app(), app_definition)
+
+
+def test_changed_when_field_missing_from_live_app():
+    assert has_changed(_live_app(), _app_definition(args=["--verbose"]))
+
+
+def test_changed_when_env_var_removed():
+    assert has_changed(_live_app(env={"FOO": "bar", "BAZ": "qux"}), _app_definition())
+
+
+def test_changed_id():
+    assert has_changed(_live_app(), _app_definition(id="my-other-app"))
+
+
+def test_changed_when_field_removed():
+    live_app = _live_app(constraints=[["hostname", "UNIQUE"]])
+
+    assert has_changed(live_app, _app_definition())
+
+
+def test_changed_when_non_default_upgrade_strategy_removed():
+    live_app = _live_app(upgradeStrategy={"minimumHealthCapacity": 0.5, "maximumOverCapacity": 1})
+
+    assert has_changed(live_app, _app_definition())
+
+
+def test_unchanged_when_removed_field_has_marathon_default():
+    live_app = _live_app(
+        upgradeStrategy={"minimumHealthCapacity": 1, "maximumOverCapacity": 1},
+        healthChecks=[],
+        backoffSeconds=1,
+    )
+
+    assert not has_changed(live_app, _app_definition())
+
+
+def test_changed_when_nested_field_removed():
+    live_app = _live_app()
+    live_app["container"]["docker"]["portMappings"][0]["hostPort"] = 31000
+
+    assert has_changed(live_app, _app_definition())
+
+
+def test_changed_when_removed_health_check_field_is_not_default():
+    health_check = {"protocol": "HTTP", "path": "/health", "intervalSeconds": 60}
+    live_app = _live_app(healthChecks=[dict(health_check, timeoutSeconds=5)])
+
+    assert has_changed(live_app, _app_definition(healthChecks=[health_check]))
+    assert not has_changed(_live_app(healthChecks=[dict(health_check, timeoutSeconds=20)]),
+                           _app_definition(healthChecks=[health_check]))
+
+
+def test_unchanged_ignores_fields_managed_by_marathon():
+    live_app = _live_app(tasksRunning=2, deployments=[{"id": "1234"}])
+
+    assert not has_changed(live_app, _app_definition())
@@ -3,10 +3,12 @@ import mock
 import pytest
 
 # local imports
+from shpkpr import metrics
 from shpkpr.marathon import DeploymentFailed
 from shpkpr.marathon import DeploymentNotFound
 from shpkpr.marathon import MarathonClient
 from shpkpr.marathon import MarathonDeployment
+from shpkpr.polling import PollSchedule
 
 
 @mock.patch('shpkpr.marathon.MarathonDeployment.check')
@@ -37,6 +39,21 @@ def test_deployment_wait_with_timeout(mock_deployment_check):
     assert mock_deployment_check.call_count == 2
 
 
+@mock.patch('shpkpr.marathon.MarathonDeployment.check')
+def test_deployment_wait_records_metrics(mock_deployment_check, metrics_registry):
+    mock_deployment_check.side_effect = [False, True, False]
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    deployment = MarathonDeployment(client, '1234')
+    deployment.wait(check_interval_secs=0.01)
+    with pytest.raises(DeploymentFailed):
+        deployment.wait(timeout=0.05, check_interval_secs=0.1)
+
+    assert metrics.MARATHON_DEPLOYMENT_WAITS.value(result="success") == 1
+    assert metrics.MARATHON_DEPLOYMENT_WAITS.value(result="failed") == 1
+    assert metrics.MARATHON_DEPLOYMENT_WAIT_DURATION.count(result="success") == 1
+
+
 @mock.patch('shpkpr.marathon.MarathonClient.get_deployment')
 def test_deployment_check(mock_get_deployment):
     """ Test that deployment.check() returns True when the app has deployed successfully.
@@ -84,3 +101,17 @@ def test_deployment_check_with_deployment_in_progress(mock_get_deployment):
     client = MarathonClient("http://marathon.somedomian.com:8080")
     deployment = MarathonDeployment(client, "97c136bf-5a28-4821-9d94-480d9fbb01c8")
     assert not deployment.check()
+
+
+@mock.patch('shpkpr.marathon.MarathonDeployment.check')
+def test_deployment_wait_with_schedule(mock_deployment_check):
+    """ Test that deployment.wait_by_polling() follows the given poll schedule.
+    """
+    mock_deployment_check.side_effect = [False, False, True]
+
+    client = MarathonClient("http://marathon.somedomain.com:8080")
+    deployment = MarathonDeployment(client, '1234')
+    schedule = PollSchedule(initial_interval=0.01, max_interval=0.02, jitter=0)
+    with mock.patch('time.sleep') as mock_sleep:
+        assert deployment.wait_by_polling(schedule=schedule)
+    assert [c[0][0] for c in mock_sleep.call_args_list] == [0.01, 0.02, 0.02]
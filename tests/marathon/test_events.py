@@ -0,0 +1,197 @@
+# stdlib imports
+import json
+import threading
+import time
+
+# third-party imports
+import pytest
+from six.moves import BaseHTTPServer
+
+# local imports
+from shpkpr.marathon import DeploymentFailed
+from shpkpr.marathon import EventStreamUnavailable
+from shpkpr.marathon import MarathonClient
+from shpkpr.marathon import MarathonDeployment
+from shpkpr.marathon.events import EventStream
+from shpkpr.marathon.events import parse_events
+
+
+DEPLOYMENT_ID = "97c136bf-5a28-4821-9d94-480d9fbb01c8"
+
+
+def _sse(event_type, payload):
+    return "event: {0}\ndata: {1}\n\n".format(event_type, json.dumps(payload)).encode('utf-8')
+
+
+class _MarathonHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Minimal stand-in for the parts of the Marathon API used when waiting for
+    a deployment.
+
+    Like Marathon, the event stream is sent with chunked transfer encoding.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # the server handles a single connection at a time, so connections
+        # can't be kept alive between requests.
+        self.close_connection = True
+        if self.path.startswith("/v2/events"):
+            return self._events()
+        if self.path.startswith("/v2/deployments"):
+            return self._json(self.server.deployments)
+        self._not_found()
+
+    def _not_found(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _json(self, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _events(self):
+        if self.server.events is None:
+            return self._not_found()
+        self.server.subscriptions += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._chunk(b": keep-alive\n\n")
+        for event in self.server.events:
+            time.sleep(0.05)
+            self._chunk(event)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data):
+        self.wfile.write("{0:x}\r\n".format(len(data)).encode('utf-8') + data + b"\r\n")
+        self.wfile.flush()
+
+    def end_headers(self):
+        self.send_header("Connection", "close")
+        BaseHTTPServer.BaseHTTPRequestHandler.end_headers(self)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def marathon_server(local_http_server):
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _MarathonHandler)
+    server.deployments = [{"id": DEPLOYMENT_ID}]
+    server.events = []
+    server.subscriptions = 0
+    return local_http_server(server)
+
+
+def _client(server, **kwargs):
+    return MarathonClient(server.url, deployments_max_age=0, **kwargs)
+
+
+def test_parse_events():
+    lines = [
+        ": comment",
+        "",
+        "event: deployment_success",
+        'data: {"id": "1234"}',
+        "",
+        'data: {"id": "5678"}',
+        "",
+    ]
+    assert list(parse_events(lines)) == [
+        ("deployment_success", {"id": "1234"}),
+        ("message", {"id": "5678"}),
+    ]
+
+
+def test_event_stream_joins_lines_split_across_chunks():
+    class _Response(object):
+        def iter_content(self, chunk_size):
+            assert chunk_size is None
+            data = u'event: deployment_success\r\ndata: {"id": "caf\u00e9"}\r\n\r\n'.encode('utf-8')
+            for i in range(len(data)):
+                yield data[i:i + 1]
+
+    assert list(EventStream(_Response())) == [("deployment_success", {"id": u"caf\u00e9"})]
+
+
+def test_wait_for_events_success(marathon_server):
+    marathon_server.events = [
+        _sse("deployment_step_success", {"plan": {"id": DEPLOYMENT_ID}}),
+        _sse("deployment_success", {"id": "some-other-deployment"}),
+        _sse("deployment_success", {"id": DEPLOYMENT_ID}),
+    ]
+
+    deployment = MarathonDeployment(_client(marathon_server), DEPLOYMENT_ID)
+    assert deployment.wait_for_events(timeout=5)
+    assert marathon_server.subscriptions == 1
+
+
+def test_wait_for_events_failure(marathon_server):
+    marathon_server.events = [
+        _sse("deployment_failed", {"id": DEPLOYMENT_ID}),
+    ]
+
+    deployment = MarathonDeployment(_client(marathon_server), DEPLOYMENT_ID)
+    with pytest.raises(DeploymentFailed):
+        deployment.wait_for_events(timeout=5)
+
+
+def test_wait_for_events_already_complete(marathon_server):
+    marathon_server.deployments = []
+
+    deployment = MarathonDeployment(_client(marathon_server), DEPLOYMENT_ID)
+    assert deployment.wait_for_events(timeout=5)
+
+
+def test_wait_for_events_resubscribes_when_stream_ends(marathon_server):
+    marathon_server.events = []
+
+    def _complete_deployment():
+        time.sleep(0.3)
+        marathon_server.deployments = []
+    threading.Thread(target=_complete_deployment).start()
+
+    deployment = MarathonDeployment(_client(marathon_server), DEPLOYMENT_ID)
+    assert deployment.wait_for_events(timeout=5)
+    assert marathon_server.subscriptions > 1
+
+
+def test_wait_for_events_backs_off_when_stream_closes_early(marathon_server):
+    marathon_server.events = []
+
+    deployment = MarathonDeployment(_client(marathon_server), DEPLOYMENT_ID)
+    with pytest.raises(DeploymentFailed):
+        deployment.wait_for_events(timeout=1)
+
+    # subscriptions are retried after ~0.5s and ~1s (capped at the deadline)
+    assert 1 < marathon_server.subscriptions <= 3
+
+
+def test_wait_for_events_falls_back_to_polling(marathon_server):
+    marathon_server.events = None
+    marathon_server.deployments = []
+
+    deployment = MarathonDeployment(_client(marathon_server), DEPLOYMENT_ID)
+    assert deployment.wait_for_events(timeout=5, check_interval_secs=0.01)
+
+
+def test_wait_uses_event_stream_when_enabled(marathon_server):
+    marathon_server.events = [
+        _sse("deployment_success", {"id": DEPLOYMENT_ID}),
+    ]
+
+    deployment = MarathonDeployment(_client(marathon_server, event_stream=True), DEPLOYMENT_ID)
+    assert deployment.wait(timeout=5, check_interval_secs=60)
+
+
+def test_stream_events_unavailable(marathon_server):
+    marathon_server.events = None
+
+    with pytest.raises(EventStreamUnavailable):
+        _client(marathon_server).stream_events()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# stdlib imports
+import json
+
+# third-party imports
+import pytest
+
+# local imports
+from shpkpr.marathon.stream import TruncatedResponse
+from shpkpr.marathon.stream import iter_json_array
+
+
+APPS = [
+    {"id": "/app-a", "instances": 2, "labels": {"NAME": u"café ]},{"}},
+    {"id": "/app-b", "instances": 1, "tasks": [{"id": "task-1", "ports": [31000]}]},
+    {"id": "/app-c", "instances": 0, "env": {}},
+]
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 65536])
+def test_iter_json_array(chunk_size):
+    data = json.dumps({"apps": APPS}, indent=2).encode("utf-8")
+
+    assert list(iter_json_array(_chunks(data, chunk_size), "apps")) == APPS
+
+
+def test_iter_json_array_compact():
+    data = json.dumps({"apps": APPS}, separators=(",", ":")).encode("utf-8")
+
+    assert list(iter_json_array(_chunks(data, 5), "apps")) == APPS
+
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array([b'{"apps": []}'], "apps")) == []
+
+
+def test_iter_json_array_is_incremental():
+    data = json.dumps({"apps": APPS}).encode("utf-8")
+    chunks = iter(_chunks(data, 10))
+
+    first = next(iter_json_array(chunks, "apps"))
+
+    assert first == APPS[0]
+    assert len(list(chunks)) > 0
+
+
+def test_iter_json_array_missing_key():
+    with pytest.raises(TruncatedResponse):
+        list(iter_json_array([b'{"message": "Internal error"}'], "apps"))
+
+
+def test_iter_json_array_truncated():
+    data = json.dumps({"apps": APPS}).encode("utf-8")[:-20]
+
+    with pytest.raises(TruncatedResponse):
+        list(iter_json_array(_chunks(data, 10), "apps"))
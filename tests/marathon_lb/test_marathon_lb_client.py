@@ -0,0 +1,137 @@
+# stdlib imports
+import datetime
+import threading
+import time
+
+# third-party imports
+import mock
+import pytest
+import requests
+import responses
+from freezegun import freeze_time
+
+# local imports
+from shpkpr import metrics
+from shpkpr.marathon_lb import MarathonLBClient
+from shpkpr.marathon_lb.client import RESOLVE_TTL
+
+
+URLS = ['http://127.0.0.1:9090', 'http://127.0.0.2:9090', 'http://127.0.0.3:9090']
+
+
+@pytest.fixture
+def client():
+    client = MarathonLBClient('http://marathon-lb.somedomain.com:9090')
+    with mock.patch('shpkpr.marathon_lb.resolver.resolve', return_value=URLS):
+        client.urls
+    return client
+
+
+def test_urls_are_resolved_again_after_ttl():
+    client = MarathonLBClient('http://marathon-lb.somedomain.com:9090')
+    with freeze_time("2017-01-01 00:00:00") as frozen_time:
+        with mock.patch('shpkpr.marathon_lb.resolver.resolve', side_effect=[URLS[:2], URLS]) as mock_resolve:
+            assert client.instance_count == 2
+            frozen_time.tick(delta=datetime.timedelta(seconds=RESOLVE_TTL - 1))
+            assert client.instance_count == 2
+            frozen_time.tick(delta=datetime.timedelta(seconds=2))
+            assert client.instance_count == 3
+    assert mock_resolve.call_count == 2
+
+
+@responses.activate
+def test_fetch_pids(client):
+    for i, url in enumerate(URLS):
+        responses.add(responses.GET, url + '/_haproxy_getpids', status=200, body='{0}\n'.format(i))
+
+    assert client._fetch_pids() == {URLS[0]: ['0'], URLS[1]: ['1'], URLS[2]: ['2']}
+    assert not client.is_reloading()
+
+
+@responses.activate
+def test_is_reloading(client):
+    responses.add(responses.GET, URLS[0] + '/_haproxy_getpids', status=200, body='1 2')
+    responses.add(responses.GET, URLS[1] + '/_haproxy_getpids', status=200, body='1')
+    responses.add(responses.GET, URLS[2] + '/_haproxy_getpids', status=503)
+
+    assert client.is_reloading()
+
+
+@responses.activate
+def test_fetch_stats_error(client):
+    for url in URLS:
+        responses.add(responses.GET, url + '/haproxy?stats;csv', status=500)
+
+    with pytest.raises(requests.HTTPError):
+        client.fetch_stats()
+
+
+@responses.activate
+def test_fetch_stats_records_metrics(client, file_fixture, metrics_registry):
+    body = file_fixture("haproxy/stats.csv")
+    for url in URLS:
+        responses.add(responses.GET, url + '/haproxy', status=200, body=body)
+
+    client.fetch_stats()
+
+    assert metrics.MARATHON_LB_REQUESTS.value(resource="stats", status=200) == len(URLS)
+    assert metrics.MARATHON_LB_REQUEST_DURATION.count(resource="stats") == len(URLS)
+    assert metrics.MARATHON_LB_STATS_BYTES.value() == len(URLS) * len(body.encode("utf-8"))
+
+
+def test_instances_are_fetched_concurrently(client):
+    active = []
+    max_active = []
+    lock = threading.Lock()
+
+    def _fetch(url):
+        with lock:
+            active.append(url)
+            max_active.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.remove(url)
+        return url
+
+    assert client._map_instances(_fetch) == URLS
+    assert max(max_active) == len(URLS)
+
+
+def test_concurrency_is_bounded(client):
+    client.max_concurrency = 1
+    active = []
+    max_active = []
+
+    def _fetch(url):
+        active.append(url)
+        max_active.append(len(active))
+        time.sleep(0.01)
+        active.remove(url)
+        return url
+
+    assert client._map_instances(_fetch) == URLS
+    assert max(max_active) == 1
+
+
+@responses.activate
+def test_fetch_stats_scoped_to_proxy(client, file_fixture):
+    for url in URLS:
+        responses.add(responses.GET, url + '/haproxy', status=200, body=file_fixture("haproxy/stats.csv"))
+
+    stats = client.fetch_stats(pxname='git')
+
+    assert len(responses.calls) == len(URLS)
+    for call in responses.calls:
+        assert call.request.url.endswith('/haproxy?stats;csv;scope=git')
+    assert len(stats) == 6 * len(URLS)
+
+
+@responses.activate
+def test_fetch_stats_quotes_scope(client, file_fixture):
+    for url in URLS:
+        responses.add(responses.GET, url + '/haproxy', status=200, body=file_fixture("haproxy/stats.csv"))
+
+    client.fetch_stats(pxname='git;norefresh&x=1')
+
+    for call in responses.calls:
+        assert call.request.url.endswith('/haproxy?stats;csv;scope=git%3Bnorefresh%26x%3D1')
@@ -50,3 +50,17 @@ def test_parse_haproxy_stats_first_row(haproxy_stats):
 def test_parse_haproxy_stats_last_row(haproxy_stats):
     assert haproxy_stats[-1].pxname == 'http-in'
     assert haproxy_stats[-1].svname == '10_0_6_25_23336'
+
+
+def test_parse_haproxy_stats_only_keeps_required_columns(haproxy_stats):
+    assert haproxy_stats[0]._fields == ('pxname', 'svname', 'qcur', 'scur', 'status')
+    assert haproxy_stats[0].status == 'OPEN'
+    assert haproxy_stats[0].scur == '1'
+
+
+def test_parse_haproxy_stats_filtered_by_pxname(file_fixture):
+    csv_data = file_fixture("haproxy/stats.csv")
+    stats = Stats(csv_data, csv_data, pxname='git')
+
+    assert len(stats) == 12
+    assert all(row.pxname == 'git' for row in stats)
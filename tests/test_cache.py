@@ -0,0 +1,91 @@
+# stdlib imports
+import os
+import stat
+
+# third-party imports
+import mock
+import pytest
+from freezegun import freeze_time
+
+# local imports
+from shpkpr.cache import ResponseCache
+from shpkpr.cache import UnsafeCacheDirectory
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return ResponseCache(str(tmpdir.join("responses")))
+
+
+def test_get_missing(cache):
+    assert cache.get(cache.key("missing")) is None
+
+
+def test_set_and_get(cache):
+    key = cache.key("http://marathon", "/v2/apps", {"embed": []})
+    cache.set(key, {"apps": []}, etag='"abc"')
+
+    entry = cache.get(key)
+    assert entry.body == {"apps": []}
+    assert entry.etag == '"abc"'
+
+
+def test_keys_differ_by_params(cache):
+    assert cache.key("/v2/apps", {"id": "a"}) != cache.key("/v2/apps", {"id": "b"})
+    assert cache.key("/v2/apps", {"a": 1, "b": 2}) == cache.key("/v2/apps", {"b": 2, "a": 1})
+
+
+def test_cache_is_private(cache):
+    cache.set(cache.key("secret"), {"env": {"PASSWORD": "hunter2"}})
+
+    assert stat.S_IMODE(os.stat(cache.directory).st_mode) == 0o700
+    for name in os.listdir(cache.directory):
+        assert stat.S_IMODE(os.stat(os.path.join(cache.directory, name)).st_mode) == 0o600
+
+
+def test_directory_accessible_by_others_is_refused(cache):
+    os.mkdir(cache.directory, 0o700)
+    os.chmod(cache.directory, 0o777)
+
+    with pytest.raises(UnsafeCacheDirectory):
+        cache.get(cache.key("planted"))
+    with pytest.raises(UnsafeCacheDirectory):
+        cache.set(cache.key("secret"), {})
+
+
+def test_directory_owned_by_another_user_is_refused(cache):
+    os.mkdir(cache.directory, 0o700)
+
+    with mock.patch("os.getuid", return_value=os.getuid() + 1):
+        with pytest.raises(UnsafeCacheDirectory):
+            cache.get(cache.key("planted"))
+
+
+def test_symlinked_directory_is_refused(cache, tmpdir):
+    target = tmpdir.mkdir("elsewhere")
+    os.chmod(str(target), 0o700)
+    os.symlink(str(target), cache.directory)
+
+    with pytest.raises(UnsafeCacheDirectory):
+        cache.set(cache.key("secret"), {})
+
+
+def test_directory_from_environment(tmpdir, monkeypatch):
+    monkeypatch.setenv("SHPKPR_RESPONSE_CACHE_DIR", str(tmpdir))
+
+    assert ResponseCache().directory == str(tmpdir)
+
+
+def test_fetch(cache):
+    fetch = mock.Mock(return_value=[{"name": "job"}])
+    key = cache.key("jobs")
+
+    with freeze_time("2017-01-01 00:00:00"):
+        assert cache.fetch(key, 60, fetch) == [{"name": "job"}]
+    with freeze_time("2017-01-01 00:00:30"):
+        assert cache.fetch(key, 60, fetch) == [{"name": "job"}]
+    assert fetch.call_count == 1
+
+    with freeze_time("2017-01-01 00:01:01"):
+        cache.fetch(key, 60, fetch)
+    assert fetch.call_count == 2
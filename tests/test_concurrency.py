@@ -0,0 +1,42 @@
+# stdlib imports
+import threading
+
+# third-party imports
+import pytest
+
+# local imports
+from shpkpr.concurrency import map_concurrently
+
+
+def test_map_concurrently_preserves_order():
+    assert map_concurrently(lambda x: x * 2, range(10), 4) == [x * 2 for x in range(10)]
+
+
+def test_map_concurrently_single_item_runs_inline():
+    assert map_concurrently(lambda x: threading.current_thread(), [1], 4) == [threading.current_thread()]
+
+
+def test_map_concurrently_runs_calls_concurrently():
+    barrier = threading.Event()
+    arrived = []
+    lock = threading.Lock()
+
+    def _wait(item):
+        with lock:
+            arrived.append(item)
+            if len(arrived) == 3:
+                barrier.set()
+        # would time out if the calls were made one after another
+        return barrier.wait(5)
+
+    assert map_concurrently(_wait, [1, 2, 3], 3) == [True, True, True]
+
+
+def test_map_concurrently_propagates_exceptions():
+    def _fail(item):
+        if item == 2:
+            raise ValueError(item)
+        return item
+
+    with pytest.raises(ValueError):
+        map_concurrently(_fail, [1, 2, 3], 3)
@@ -0,0 +1,55 @@
+# local imports
+from shpkpr.cron import diff_jobs
+from shpkpr.cron import index_jobs
+
+
+def _job(name, **kwargs):
+    kwargs['name'] = name
+    return kwargs
+
+
+def test_index_jobs():
+    jobs = [_job("a"), _job("b")]
+    assert index_jobs(jobs) == {"a": jobs[0], "b": jobs[1]}
+
+
+def test_diff_jobs():
+    current_jobs = [
+        _job("changed", command="old"),
+        _job("unchanged", command="same", successCount=10),
+    ]
+    new_jobs = [
+        _job("added", command="new"),
+        _job("changed", command="new"),
+        _job("unchanged", command="same", successCount=0, secrets={}),
+    ]
+
+    diff = diff_jobs(current_jobs, new_jobs)
+    assert [j["name"] for j in diff.added] == ["added"]
+    assert [j["name"] for j in diff.changed] == ["changed"]
+    assert [j["name"] for j in diff.unchanged] == ["unchanged"]
+
+
+def test_diff_jobs_detects_removed_fields():
+    current_jobs = [
+        _job("removed", command="same", constraints=[["rack", "EQUALS", "a"]]),
+        _job("defaults", command="same", constraints=[], retries=2, shell=True, disabled=False),
+        _job("non-default", command="same", retries=5),
+    ]
+    new_jobs = [
+        _job("removed", command="same"),
+        _job("defaults", command="same"),
+        _job("non-default", command="same"),
+    ]
+
+    diff = diff_jobs(current_jobs, new_jobs)
+    assert [j["name"] for j in diff.changed] == ["removed", "non-default"]
+    assert [j["name"] for j in diff.unchanged] == ["defaults"]
+
+
+def test_diff_jobs_ignores_environment_variable_order():
+    env = [{"name": "A", "value": "1"}, {"name": "B", "value": "2"}]
+    current_jobs = [_job("job", environmentVariables=env)]
+    new_jobs = [_job("job", environmentVariables=list(reversed(env)))]
+
+    assert diff_jobs(current_jobs, new_jobs).unchanged == new_jobs
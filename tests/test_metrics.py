@@ -0,0 +1,190 @@
+# stdlib imports
+import os
+
+# third-party imports
+import pytest
+from six.moves import BaseHTTPServer
+
+# local imports
+from shpkpr import metrics
+from shpkpr.metrics import Registry
+
+
+class _PushgatewayHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Minimal stand-in for a Prometheus Pushgateway, recording the metrics
+    pushed to it.
+    """
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.pushes.append({
+            "path": self.path,
+            "content_type": self.headers.get("Content-Type"),
+            "body": self.rfile.read(length).decode("utf-8"),
+        })
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def pushgateway(local_http_server):
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _PushgatewayHandler)
+    server.pushes = []
+    server.status = 200
+    return local_http_server(server)
+
+
+@pytest.fixture
+def registry():
+    registry = Registry()
+    registry.counter("test_requests_total", "Requests made.", ["method"])
+    registry.histogram("test_duration_seconds", "Time taken.", buckets=[0.1, 1])
+    return registry
+
+
+def test_counter(registry):
+    counter = registry.counter("test_events_total", "Events.", ["kind"])
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+
+    assert counter.value(kind="a") == 3
+    assert counter.value(kind="b") == 0
+
+
+def test_counter_cannot_decrease(registry):
+    counter = registry.counter("test_events_total", "Events.")
+
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_incorrect_labels(registry):
+    counter = registry.counter("test_events_total", "Events.", ["kind"])
+
+    with pytest.raises(ValueError):
+        counter.inc(other="a")
+
+
+def test_duplicate_metric(registry):
+    with pytest.raises(ValueError):
+        registry.counter("test_requests_total", "Requests made.")
+
+
+def test_histogram_time(registry):
+    histogram = registry.histogram("test_wait_seconds", "Waits.", ["result"])
+
+    with pytest.raises(RuntimeError):
+        with histogram.time(result="error") as labels:
+            labels["result"] = "failed"
+            raise RuntimeError()
+
+    assert histogram.count(result="failed") == 1
+    assert histogram.count(result="error") == 0
+
+
+def test_exposition(registry):
+    registry._metrics["test_requests_total"].inc(method="GET")
+    histogram = registry._metrics["test_duration_seconds"]
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.exposition() == "\n".join([
+        "# HELP test_requests_total Requests made.",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{method="GET"} 1',
+        "# HELP test_duration_seconds Time taken.",
+        "# TYPE test_duration_seconds histogram",
+        'test_duration_seconds_bucket{le="0.1"} 1',
+        'test_duration_seconds_bucket{le="1.0"} 2',
+        'test_duration_seconds_bucket{le="+Inf"} 3',
+        "test_duration_seconds_sum 5.55",
+        "test_duration_seconds_count 3",
+    ]) + "\n"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0, "0"),
+    (3, "3"),
+    (1.0, "1.0"),
+    (0.005, "0.005"),
+    (2.5, "2.5"),
+    (1e-07, "1e-07"),
+    (1e20, "1e+20"),
+    (float("inf"), "+Inf"),
+    (float("-inf"), "-Inf"),
+    (float("nan"), "NaN"),
+])
+def test_format_value(value, expected):
+    assert metrics._format_value(value) == expected
+
+
+def test_histogram_bucket_bounds_are_formatted_as_floats(registry):
+    histogram = registry.histogram("test_size_bytes", "Sizes.", buckets=[1, 0.5, 1024, float("inf")])
+
+    bounds = [labels["le"] for name, labels, _ in histogram.samples() if name.endswith("_bucket")]
+    assert bounds == ["0.5", "1.0", "1024.0", "+Inf"]
+
+
+def test_exposition_escapes_label_values(registry):
+    registry._metrics["test_requests_total"].inc(method='a"b\\c\nd')
+
+    assert 'test_requests_total{method="a\\"b\\\\c\\nd"} 1' in registry.exposition()
+
+
+def test_reset(registry):
+    registry._metrics["test_requests_total"].inc(method="GET")
+    registry._metrics["test_duration_seconds"].observe(0.5)
+    registry.reset()
+
+    assert "test_requests_total{" not in registry.exposition()
+    assert "test_duration_seconds_count 0" in registry.exposition()
+
+
+def test_write_textfile(registry, tmpdir):
+    path = str(tmpdir.join("shpkpr.prom"))
+    registry.write_textfile(path)
+
+    with open(path) as f:
+        assert f.read() == registry.exposition()
+    assert os.listdir(str(tmpdir)) == ["shpkpr.prom"]
+
+
+def test_push(registry, pushgateway):
+    registry._metrics["test_requests_total"].inc(method="GET")
+    registry.push(pushgateway.url, "deploy/job", grouping={"instance": "ci-1"})
+
+    assert pushgateway.pushes == [{
+        "path": "/metrics/job/deploy%2Fjob/instance/ci-1",
+        "content_type": metrics.CONTENT_TYPE,
+        "body": registry.exposition(),
+    }]
+
+
+def test_export(registry, pushgateway, tmpdir):
+    path = str(tmpdir.join("shpkpr.prom"))
+    metrics.export(textfile=path, pushgateway=pushgateway.url, job="shpkpr", registry=registry)
+
+    assert os.path.exists(path)
+    assert len(pushgateway.pushes) == 1
+    assert pushgateway.pushes[0]["path"].startswith("/metrics/job/shpkpr/instance/")
+
+
+def test_export_failures_are_not_raised(registry, pushgateway, tmpdir):
+    pushgateway.status = 500
+    path = str(tmpdir.join("missing", "shpkpr.prom"))
+
+    metrics.export(textfile=path, pushgateway=pushgateway.url, registry=registry)
+
+    assert not os.path.exists(path)
+    assert len(pushgateway.pushes) == 1
+
+
+def test_endpoint():
+    assert metrics.endpoint("/v2/apps/my-group/my-app") == "/v2/apps"
+    assert metrics.endpoint("/v2/info") == "/v2/info"
+    assert metrics.endpoint("/v2/deployments?embed=x") == "/v2/deployments"
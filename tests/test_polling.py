@@ -0,0 +1,37 @@
+# stdlib imports
+import itertools
+import time
+
+# local imports
+from shpkpr.polling import PollSchedule
+
+
+def _take(iterable, n):
+    return list(itertools.islice(iterable, n))
+
+
+def test_exponential_backoff():
+    schedule = PollSchedule(initial_interval=0.5, multiplier=2, max_interval=3, jitter=0)
+    assert _take(schedule.delays(), 5) == [0.5, 1, 2, 3, 3]
+
+
+def test_constant():
+    schedule = PollSchedule.constant(5)
+    assert _take(schedule.delays(), 3) == [5, 5, 5]
+
+
+def test_jitter_stays_within_bounds():
+    schedule = PollSchedule(initial_interval=1, multiplier=1, max_interval=1, jitter=0.2)
+    for delay in _take(schedule.delays(), 100):
+        assert 0.8 <= delay <= 1.2
+
+
+def test_final_delay_is_capped_at_deadline():
+    schedule = PollSchedule.constant(60)
+    delay = next(schedule.delays(deadline=time.time() + 1))
+    assert 0 < delay <= 1
+
+
+def test_delays_stop_after_deadline():
+    schedule = PollSchedule.constant(1)
+    assert list(schedule.delays(deadline=time.time() - 1)) == []
@@ -1,9 +1,13 @@
+import time
+
 import mock
 
+from shpkpr.vault import SecretCache
 from shpkpr.vault import resolve_secrets
+from shpkpr.vault import resolve_secrets_for_templates
 
 
-@mock.patch("shpkpr.cli.options.hvac.Client")
+@mock.patch("hvac.Client")
 def test_resolve_secrets(mock_vault_client_class):
     mock_vault_data = {
         'secret/my_project/my_path': {
@@ -27,3 +31,48 @@ def test_resolve_secrets(mock_vault_client_class):
     result = resolve_secrets(mock_vault_client, mock_rendered_template)
     assert 'MY_SECRET_USING_REL_PATH' not in result
     assert result['MY_SECRET_USING_FULL_PATH'] == 'some_secret_info'
+
+
+def _template(**secrets):
+    return {'secrets': dict((k, {'source': v}) for k, v in secrets.items())}
+
+
+def _vault_client(url="https://vault.somedomain.com"):
+    vault_client = mock.Mock(url=url)
+    vault_client.read.side_effect = lambda path: {
+        'data': {'a': path + ':a', 'b': path + ':b'},
+        'lease_duration': 60,
+    }
+    return vault_client
+
+
+def test_resolve_secrets_for_templates_reads_each_path_once():
+    vault_client = _vault_client("https://vault-1.somedomain.com")
+    templates = [
+        _template(A='secret/one:a', B='secret/one:b'),
+        _template(A='secret/one:a', C='secret/two:a'),
+    ]
+
+    result = resolve_secrets_for_templates(vault_client, templates)
+    assert result == [
+        {'A': 'secret/one:a', 'B': 'secret/one:b'},
+        {'A': 'secret/one:a', 'C': 'secret/two:a'},
+    ]
+    assert sorted(c[0][0] for c in vault_client.read.call_args_list) == ['secret/one', 'secret/two']
+
+
+def test_resolved_secrets_are_cached():
+    vault_client = _vault_client("https://vault-2.somedomain.com")
+
+    resolve_secrets(vault_client, _template(A='secret/one:a'))
+    resolve_secrets(vault_client, _template(B='secret/one:b'))
+    assert vault_client.read.call_count == 1
+
+
+def test_cached_secrets_expire():
+    cache = SecretCache()
+    cache.set('key', {'data': {}, 'lease_duration': 60})
+    assert cache.get('key') is not None
+
+    with mock.patch('time.time', return_value=time.time() + 61):
+        assert cache.get('key') is None
@@ -0,0 +1,215 @@
+# third-party imports
+import mock
+import pytest
+import requests
+
+# local imports
+from shpkpr import metrics
+from shpkpr.cron import JobDiff
+from shpkpr.marathon import DeploymentFailed
+from shpkpr.server import ShpkprServer
+
+
+@pytest.fixture
+def server(local_http_server):
+    chronos_client = mock.Mock()
+    chronos_client.list.return_value = []
+    vault_client = mock.Mock()
+    vault_client.read.return_value = None
+
+    return local_http_server(ShpkprServer(("127.0.0.1", 0),
+                                          marathon_client=mock.Mock(),
+                                          chronos_client=chronos_client,
+                                          vault_client=vault_client,
+                                          template_path="tests/fixtures/templates",
+                                          env_prefix="SHPKPR_TEST_SERVER",
+                                          token="s3cret"))
+
+
+@pytest.fixture
+def session():
+    session = requests.Session()
+    session.headers["Authorization"] = "Bearer s3cret"
+    return session
+
+
+def test_health(server, session):
+    response = session.get(server.url + "/health")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_metrics(server, session, metrics_registry):
+    metrics.SWAP_CHECKS.inc(result="complete")
+    response = session.get(server.url + "/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert 'shpkpr_swap_checks_total{result="complete"} 1' in response.text
+
+
+def test_health_does_not_require_token(server):
+    assert requests.get(server.url + "/health").status_code == 200
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "s3cret", "Basic s3cret"])
+def test_token_required(server, authorization):
+    headers = {"Authorization": authorization} if authorization else {}
+    response = requests.post(server.url + "/apps/deploy", json={}, headers=headers)
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_token_required_for_metrics(server):
+    assert requests.get(server.url + "/metrics").status_code == 401
+
+
+def test_form_encoded_body_rejected(server, session):
+    # browsers can send form-encoded requests cross-origin without a preflight
+    response = session.post(server.url + "/apps/deploy", data={"templates": "x"})
+
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize("host", ["attacker.example.com", "attacker.example.com:8000", ""])
+def test_invalid_host_rejected(server, session, host):
+    # requests addressed to another host name may come from a DNS rebinding attack
+    response = session.post(server.url + "/apps/deploy", json={}, headers={"Host": host})
+
+    assert response.status_code == 400
+    assert "Host" in response.json()["error"]
+
+
+@pytest.mark.parametrize("host", ["localhost:8000", "127.0.0.1", "[::1]:8000", "deploy.internal:8000"])
+@mock.patch("shpkpr.server.deploy_applications")
+def test_allowed_hosts(mock_deploy_applications, server, session, host):
+    server.allowed_hosts = server.allowed_hosts.union(["deploy.internal"])
+    payload = {"values": {"MARATHON_APP_ID": "test-app", "DOCKER_REPOTAG": "goexample/outyet:latest"}}
+    response = session.post(server.url + "/apps/deploy", json=payload, headers={"Host": host})
+
+    assert response.status_code == 200
+
+
+def test_token_is_required_to_start():
+    with pytest.raises(ValueError):
+        ShpkprServer(("127.0.0.1", 0), marathon_client=mock.Mock())
+
+
+def test_unknown_route(server, session):
+    response = session.post(server.url + "/apps/delete")
+
+    assert response.status_code == 404
+
+
+def test_invalid_json(server, session):
+    response = session.post(server.url + "/apps/deploy", data="{not json",
+                            headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 400
+    assert "valid JSON" in response.json()["error"]
+
+
+@mock.patch("shpkpr.server.deploy_applications")
+def test_deploy_apps(mock_deploy_applications, server, session):
+    response = session.post(server.url + "/apps/deploy", json={
+        "templates": ["marathon/test.json.tmpl"],
+        "values": {
+            "APPLICATION": "test-app",
+            "DOCKER_REPOTAG": "goexample/outyet:latest",
+            "DOCKER_EXPOSED_PORT": "8080",
+            "RANDOM_LABEL": "some_value",
+        },
+        "parallelism": 2,
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {"applications": ["test-app"]}
+    args = mock_deploy_applications.call_args[0]
+    assert args[0] is server.marathon_client
+    assert args[2] == "standard"
+    assert [a["id"] for a in args[3]] == ["test-app"]
+    assert args[4:] == (300, 2, False)
+
+
+@mock.patch("shpkpr.server.deploy_applications")
+@mock.patch("shpkpr.template.multiprocessing.Pool")
+def test_deploy_apps_renders_in_process(mock_pool, mock_deploy_applications, server, session):
+    templates = ["marathon/test.json.tmpl"] * 5
+    response = session.post(server.url + "/apps/deploy", json={
+        "templates": templates,
+        "values": {
+            "APPLICATION": "test-app",
+            "DOCKER_REPOTAG": "goexample/outyet:latest",
+            "DOCKER_EXPOSED_PORT": "8080",
+            "RANDOM_LABEL": "some_value",
+        },
+    })
+
+    assert response.status_code == 200
+    assert not mock_pool.called
+
+
+@mock.patch("shpkpr.server.deploy_applications")
+def test_deploy_apps_reuses_clients(mock_deploy_applications, server, session):
+    payload = {"values": {"MARATHON_APP_ID": "test-app", "DOCKER_REPOTAG": "goexample/outyet:latest"}}
+    for _ in range(2):
+        assert session.post(server.url + "/apps/deploy", json=payload).status_code == 200
+
+    clients = [c[0][0] for c in mock_deploy_applications.call_args_list]
+    assert clients == [server.marathon_client, server.marathon_client]
+
+
+def test_deploy_apps_unknown_strategy(server, session):
+    response = session.post(server.url + "/apps/deploy", json={"strategy": "yolo"})
+
+    assert response.status_code == 400
+    assert "yolo" in response.json()["error"]
+
+
+def test_deploy_apps_invalid_parallelism(server, session):
+    response = session.post(server.url + "/apps/deploy", json={"parallelism": 0})
+
+    assert response.status_code == 400
+
+
+def test_deploy_apps_missing_template(server, session):
+    response = session.post(server.url + "/apps/deploy", json={"templates": ["does-not-exist.json.tmpl"]})
+
+    assert response.status_code == 400
+
+
+@mock.patch("shpkpr.server.deploy_applications")
+def test_deploy_apps_failure(mock_deploy_applications, server, session):
+    mock_deploy_applications.side_effect = DeploymentFailed("Timed out: 300 seconds")
+
+    response = session.post(server.url + "/apps/deploy", json={
+        "values": {"MARATHON_APP_ID": "test-app", "DOCKER_REPOTAG": "goexample/outyet:latest"},
+    })
+
+    assert response.status_code == 500
+    assert response.json() == {"error": "Timed out: 300 seconds"}
+
+
+@mock.patch("shpkpr.server.set_jobs")
+def test_set_jobs(mock_set_jobs, server, session):
+    mock_set_jobs.return_value = JobDiff([{"name": "shpkpr-test-job"}], [], [])
+
+    response = session.post(server.url + "/cron/set", json={
+        "templates": ["chronos/test-chronos.json.tmpl"],
+        "values": {"CHRONOS_JOB_NAME": "shpkpr-test-job"},
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {"added": ["shpkpr-test-job"], "changed": [], "unchanged": []}
+    assert mock_set_jobs.call_args[0][0] is server.chronos_client
+
+
+def test_set_jobs_without_chronos(server, session):
+    server.chronos_client = None
+
+    response = session.post(server.url + "/cron/set", json={})
+
+    assert response.status_code == 400
+    assert "--chronos-url" in response.json()["error"]
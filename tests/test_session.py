@@ -0,0 +1,37 @@
+# local imports
+from shpkpr.session import pooled_session
+
+
+def test_pooled_session_mounts_adapters():
+    session = pooled_session(pool_size=3)
+
+    for url in ["http://example.com", "https://example.com"]:
+        adapter = session.get_adapter(url)
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 3
+
+
+def test_pooled_session_retries():
+    session = pooled_session(max_retries=5, backoff_factor=1)
+    retries = session.get_adapter("https://example.com").max_retries
+
+    assert retries.total == 5
+    assert retries.backoff_factor == 1
+    assert 503 in retries.status_forcelist
+
+
+def test_pooled_session_does_not_retry_post():
+    session = pooled_session()
+    retries = session.get_adapter("https://example.com").max_retries
+
+    assert not retries._is_method_retryable("POST")
+    assert retries._is_method_retryable("GET")
+
+
+def test_pooled_session_does_not_retry_put_or_delete():
+    session = pooled_session()
+    retries = session.get_adapter("https://example.com").max_retries
+
+    assert not retries._is_method_retryable("PUT")
+    assert not retries._is_method_retryable("DELETE")
+    assert retries._is_method_retryable("HEAD")
@@ -5,8 +5,10 @@ import pytest
 from shpkpr.template import InvalidJSONError
 from shpkpr.template import MissingTemplateError
 from shpkpr.template import UndefinedError
+from shpkpr.template import get_template_environment
 from shpkpr.template import load_values_from_environment
 from shpkpr.template import render_json_template
+from shpkpr.template import render_json_templates
 from shpkpr.template_filters import IntegerRequired
 from shpkpr.template_filters import IntegerTooLarge
 from shpkpr.template_filters import IntegerTooSmall
@@ -293,3 +295,49 @@ def test_render_json_template_with_inheritance_no_parent(tmpdir):
 
     with pytest.raises(MissingTemplateError):
         render_json_template(template_path, template_name, **{})
+
+
+def test_template_environment_is_cached(tmpdir):
+    assert get_template_environment(tmpdir.strpath) is get_template_environment(tmpdir.strpath)
+    assert get_template_environment(tmpdir.strpath) is not get_template_environment(tmpdir.mkdir("other").strpath)
+
+
+def test_compiled_templates_are_cached_on_disk(tmpdir, monkeypatch):
+    cache_dir = tmpdir.mkdir("cache")
+    monkeypatch.setenv('SHPKPR_TEMPLATE_CACHE_DIR', cache_dir.strpath)
+    template_path, template_name = _write_template_to_disk(tmpdir.mkdir("templates"), 'tmpl.json', '{"a": 1}')
+
+    render_json_template(template_path, template_name)
+    assert len(cache_dir.listdir()) == 1
+
+
+def test_modified_templates_are_reloaded(tmpdir):
+    template_path, template_name = _write_template_to_disk(tmpdir, 'tmpl.json', '{"a": 1}')
+    assert render_json_template(template_path, template_name) == {"a": 1}
+
+    template_file = tmpdir.join(template_name)
+    template_file.write('{"a": 2}')
+    template_file.setmtime(template_file.mtime() + 10)
+    assert render_json_template(template_path, template_name) == {"a": 2}
+
+
+def test_render_multiple_templates_in_parallel(tmpdir):
+    template_names = []
+    for i in range(6):
+        template_path, template_name = _write_template_to_disk(tmpdir, 'tmpl-{0}.json'.format(i),
+                                                               '{"n": %d, "v": "{{ V }}"}' % i)
+        template_names.append(template_name)
+
+    rendered = render_json_templates(template_path, template_names, processes=2, V="x")
+    assert rendered == [{"n": i, "v": "x"} for i in range(6)]
+
+
+def test_render_multiple_templates_in_parallel_error(tmpdir):
+    template_names = []
+    for i in range(6):
+        template_path, template_name = _write_template_to_disk(tmpdir, 'tmpl-{0}.json'.format(i),
+                                                               '{"v": "{{ V%d }}"}' % i)
+        template_names.append(template_name)
+
+    with pytest.raises(UndefinedError):
+        render_json_templates(template_path, template_names, processes=2, V0="x")
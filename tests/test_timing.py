@@ -0,0 +1,92 @@
+# stdlib imports
+import json
+import threading
+
+# third-party imports
+import pytest
+from freezegun import freeze_time
+
+# local imports
+from shpkpr.timing import Timings
+
+
+def test_span():
+    timings = Timings()
+
+    with freeze_time("2017-01-01 00:00:00") as frozen_time:
+        with timings.span("deploy", app="/my-app"):
+            frozen_time.tick()
+
+    assert len(timings.spans) == 1
+    span = timings.spans[0]
+    assert span.name == "deploy"
+    assert span.duration == 1
+    assert span.attributes == {"app": "/my-app"}
+
+
+def test_span_records_errors():
+    timings = Timings()
+
+    with pytest.raises(ValueError):
+        with timings.span("deploy"):
+            raise ValueError("boom")
+
+    assert timings.spans[0].attributes == {"error": "ValueError"}
+
+
+def test_span_attributes_can_be_added():
+    timings = Timings()
+
+    with timings.span("check") as attributes:
+        attributes["result"] = True
+
+    assert timings.spans[0].attributes == {"result": True}
+
+
+def test_phases_and_summary():
+    timings = Timings()
+
+    with freeze_time("2017-01-01 00:00:00") as frozen_time:
+        for name, secs in [("render", 1), ("swap_check", 2), ("swap_check", 3)]:
+            with timings.span(name):
+                frozen_time.tick(secs)
+
+    assert timings.phases() == {
+        "render": {"count": 1, "total": 1.0},
+        "swap_check": {"count": 2, "total": 5.0},
+    }
+    assert timings.summary() == [
+        {"phase": "render", "count": 1, "total": "1.000s"},
+        {"phase": "swap_check", "count": 2, "total": "5.000s"},
+    ]
+
+
+def test_spans_from_multiple_threads():
+    timings = Timings()
+
+    def _record():
+        for _ in range(100):
+            with timings.span("check"):
+                pass
+
+    threads = [threading.Thread(target=_record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert timings.phases()["check"]["count"] == 400
+
+
+def test_write_report(tmpdir):
+    timings = Timings()
+    with timings.span("render"):
+        pass
+
+    path = str(tmpdir.join("timings.json"))
+    timings.write_report(path)
+
+    with open(path) as f:
+        report = json.load(f)
+    assert list(report["phases"]) == ["render"]
+    assert report["spans"][0]["name"] == "render"